@@ -0,0 +1,110 @@
+import time
+import random
+import asyncio
+from typing import Any
+
+class FakeUsage:
+    def __init__(self, prompt_tokens: int, output_tokens: int):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+
+class FakeResponse:
+    def __init__(self, text: str, prompt_tokens: int):
+        self.text = text
+        self.usage_metadata = FakeUsage(prompt_tokens, len(text) // 4)
+
+class FakeQuotaError(Exception):
+    """
+    Mimics the SDK's 429 error, including a RetryInfo delay in the message.
+    """
+
+class FakeBackend:
+    """
+    In-process stand-in for the Gemini API.
+
+    latency:        seconds per call (plus up to `jitter` seconds, uniformly)
+    error_rate:     probability that a call fails with 429 RESOURCE_EXHAUSTED
+    max_tokens:     calls whose prompt exceeds this many tokens fail with 400
+    relevant_rate:  probability that a map-chunk (or triage) prompt is answered as relevant
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        retry_delay: float = 1.0,
+        max_tokens: int = 1_000_000,
+        relevant_rate: float = 0.5,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.retry_delay = retry_delay
+        self.max_tokens = max_tokens
+        self.relevant_rate = relevant_rate
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def _respond(self, model: str, contents: Any) -> FakeResponse:
+        prompt = contents if isinstance(contents, str) else str(contents)
+        tokens = len(prompt) // 4
+        self.calls += 1
+        if tokens > self.max_tokens:
+            self.errors += 1
+            raise ValueError(f"400 INVALID_ARGUMENT: input token count ({tokens}) exceeds the maximum ({self.max_tokens}) for {model}")
+        if self.random.random() < self.error_rate:
+            self.errors += 1
+            raise FakeQuotaError(f"429 RESOURCE_EXHAUSTED {{'@type': 'RetryInfo', 'retryDelay': '{self.retry_delay:g}s'}}")
+        if "matching this JSON Schema" in prompt:
+            return FakeResponse('["python", "automation"]', tokens)
+        if "YES or NO" in prompt:
+            return FakeResponse("YES" if self.random.random() < self.relevant_rate else "NO", tokens)
+        if "PARTIAL CONTEXT" in prompt and self.random.random() >= self.relevant_rate:
+            return FakeResponse("Nothing relevant", tokens)
+        return FakeResponse(f"[{model}] finding #{self.calls}: " + "detail " * 40, tokens)
+
+    def _delay(self) -> float:
+        return self.latency + self.random.uniform(0, self.jitter)
+
+    def track(self, delta: int) -> None:
+        self.in_flight += delta
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+class _AsyncModels:
+    def __init__(self, backend: FakeBackend):
+        self.backend = backend
+
+    async def generate_content(self, model: str, contents: Any, **kwargs: Any) -> FakeResponse:
+        self.backend.track(1)
+        try:
+            await asyncio.sleep(self.backend._delay())
+            return self.backend._respond(model, contents)
+        finally:
+            self.backend.track(-1)
+
+class _SyncModels:
+    def __init__(self, backend: FakeBackend):
+        self.backend = backend
+
+    def generate_content(self, model: str, contents: Any, **kwargs: Any) -> FakeResponse:
+        time.sleep(self.backend._delay())
+        return self.backend._respond(model, contents)
+
+class _Aio:
+    def __init__(self, backend: FakeBackend):
+        self.models = _AsyncModels(backend)
+
+class FakeGeminiClient:
+    """
+    Drop-in replacement for `genai.Client` exposing `.models` and `.aio.models`.
+    """
+
+    def __init__(self, backend: FakeBackend | None = None):
+        self.backend = backend or FakeBackend()
+        self.models = _SyncModels(self.backend)
+        self.aio = _Aio(self.backend)
@@ -0,0 +1,246 @@
+"""
+Offline benchmark suite for the Git-Alchemist engine.
+
+Times the CLI import and drives the context scanner, chunker, map-reduce engine (buffered and streaming), JSON parsing and the
+repo-tool loops against an in-process fake Gemini backend, over synthetic
+repositories. Reports wall time, throughput and peak (Python-heap) memory and
+compares them to stored baselines.
+
+    python -m benchmarks.run                          # 1k files, compare to baselines
+    python -m benchmarks.run --sizes 1000,10000,100000
+    python -m benchmarks.run --latency 0.2 --error-rate 0.05
+    python -m benchmarks.run --update-baseline
+"""
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import subprocess
+import tempfile
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+# Keep benchmark runs away from the user's cache, telemetry and health state.
+_STATE_DIR = tempfile.mkdtemp(prefix="alchemist_bench_state_")
+os.environ["ALCHEMIST_CACHE_DIR"] = _STATE_DIR
+os.environ["ALCHEMIST_NO_CACHE"] = "1"
+os.environ["ALCHEMIST_NO_TELEMETRY"] = "1"
+
+from rich.console import Console
+from rich.table import Table
+
+import src.scheduler
+import src.repo_tools
+from src.client import ClientPool, set_client_pool
+from src.core import generate_content, generate_from_records, split_context, SAFE_TOKEN_LIMIT_FAST
+from src.utils import get_codebase_context, stream_codebase_files, parse_json_response
+from .fake_gemini import FakeBackend, FakeGeminiClient
+from .synthetic import make_synthetic_repo, make_json_blob
+
+console = Console()
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@contextmanager
+def chdir(path: str) -> Iterator[None]:
+    cwd = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+
+def measure(fn: Callable[[], int], memory: bool) -> dict[str, float]:
+    """
+    Runs `fn` once for wall time, and once more under tracemalloc for peak memory.
+    `fn` returns the number of items it processed.
+    """
+    gc.collect()
+    started = time.perf_counter()
+    items = fn()
+    wall = time.perf_counter() - started
+    result = {"wall_s": round(wall, 4), "items": items, "items_per_s": round(items / wall, 1) if wall else 0.0}
+
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        result["peak_mb"] = round(peak / (1024 * 1024), 2)
+    return result
+
+class _FakeShell:
+    """
+    Replays `gh` output for the repo-tool loops; edits are accepted and counted.
+    """
+
+    def __init__(self, n_repos: int):
+        self.repos = [
+            {"name": f"repo-{i}", "description": None if i % 2 else f"Repo {i}", "repositoryTopics": [{"name": "python"}]}
+            for i in range(n_repos)
+        ]
+        self.edits = 0
+
+    def __call__(self, command: str, *args: Any, **kwargs: Any) -> str:
+        if command.startswith("gh repo list"):
+            return json.dumps(self.repos)
+        if command.startswith("gh repo view"):
+            return "# Synthetic README\n\nA tool that does things.\n" * 20
+        if command.startswith("gh repo edit"):
+            self.edits += 1
+        return ""
+
+class _NoSleep:
+    @staticmethod
+    def sleep(seconds: float) -> None:
+        pass
+
+def measure_cli_import() -> dict[str, float]:
+    """
+    Cumulative `import src.cli` time reported by `python -X importtime` in a
+    fresh interpreter; eager imports of the commands or the SDKs show up here.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import src.cli"], cwd=ROOT, capture_output=True, text=True)
+    lines = [line for line in result.stderr.splitlines() if line.rstrip().endswith("| src.cli")]
+    seconds = int(lines[-1].split("|")[1]) / 1_000_000 if lines else 0.0
+    return {"wall_s": round(seconds, 4), "items": 1, "items_per_s": round(1 / seconds, 1) if seconds else 0.0}
+
+def silence_engine_output() -> None:
+    """
+    Mutes the per-module rich consoles so only the report is printed.
+    """
+    for name, module in list(sys.modules.items()):
+        if name.startswith("src.") and isinstance(getattr(module, "console", None), Console):
+            module.console.quiet = True
+
+def run_suite(sizes: list[int], backend_args: dict[str, Any], memory: bool, real_limits: bool) -> dict[str, dict[str, float]]:
+    backend = FakeBackend(**backend_args)
+    client = FakeGeminiClient(backend)
+    set_client_pool(ClientPool(factory=lambda key: client, keys=["fake"]))
+    silence_engine_output()
+    if not real_limits:
+        src.scheduler.MODEL_RATE_LIMITS = {}
+        src.scheduler.DEFAULT_RATE_LIMIT = (1_000_000, 10_000_000_000)
+
+    results: dict[str, dict[str, float]] = {"cli_import": measure_cli_import()}
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix="alchemist_bench_repo_") as root:
+            console.print(f"[cyan]Generating synthetic repository with {size} files...[/cyan]")
+            make_synthetic_repo(root, size)
+            with chdir(root):
+                context = get_codebase_context()
+                results[f"scan@{size}"] = measure(lambda: len(get_codebase_context()) and size, memory)
+
+                def map_reduce_stream() -> int:
+                    before = backend.calls
+                    generate_from_records("Summarize the architecture of this codebase.", stream_codebase_files(report=False), mode="fast")
+                    return backend.calls - before
+                results[f"map_reduce_stream@{size}"] = measure(map_reduce_stream, memory)
+
+        results[f"chunk@{size}"] = measure(lambda: len(split_context(context, SAFE_TOKEN_LIMIT_FAST)), memory)
+
+        def map_reduce() -> int:
+            before = backend.calls
+            generate_content("Summarize the architecture of this codebase.", mode="fast", context=context)
+            return backend.calls - before
+        results[f"map_reduce@{size}"] = measure(map_reduce, memory)
+        results[f"map_reduce@{size}"]["peak_in_flight"] = backend.peak_in_flight
+        del context
+
+        blob = make_json_blob(max(1, size // 10))
+        results[f"parse_json@{size}"] = measure(lambda: len(parse_json_response(blob) or []), memory)
+
+        shell = _FakeShell(max(1, size // 100))
+        original_shell, original_time = src.repo_tools.run_shell, src.repo_tools.time
+        src.repo_tools.run_shell, src.repo_tools.time = shell, _NoSleep
+        try:
+            def repo_tools() -> int:
+                src.repo_tools.optimize_topics("bench", mode="fast")
+                src.repo_tools.generate_descriptions("bench", mode="fast")
+                return len(shell.repos) * 2
+            results[f"repo_tools@{size}"] = measure(repo_tools, memory)
+        finally:
+            src.repo_tools.run_shell, src.repo_tools.time = original_shell, original_time
+    return results
+
+def compare(results: dict[str, dict[str, float]], baselines: dict[str, dict[str, float]], tolerance: float) -> list[str]:
+    """
+    Returns a list of human-readable regressions beyond `tolerance` (fractional).
+    """
+    regressions = []
+    for name, current in results.items():
+        base = baselines.get(name)
+        if not base:
+            continue
+        for metric in ("wall_s", "peak_mb"):
+            if metric in base and metric in current and base[metric] > 0:
+                ratio = current[metric] / base[metric]
+                if ratio > 1 + tolerance:
+                    regressions.append(f"{name} {metric}: {base[metric]} -> {current[metric]} ({ratio:.2f}x)")
+    return regressions
+
+def render(results: dict[str, dict[str, float]], baselines: dict[str, dict[str, float]]) -> None:
+    table = Table(title="Git-Alchemist Benchmarks", border_style="blue")
+    table.add_column("Scenario", style="cyan")
+    table.add_column("Wall", justify="right")
+    table.add_column("Baseline", justify="right")
+    table.add_column("Items/s", justify="right")
+    table.add_column("Peak MB", justify="right")
+    for name, r in results.items():
+        base = baselines.get(name, {})
+        table.add_row(
+            name,
+            f"{r['wall_s']:.3f}s",
+            f"{base['wall_s']:.3f}s" if "wall_s" in base else "-",
+            f"{r['items_per_s']:,.1f}",
+            f"{r['peak_mb']:.2f}" if "peak_mb" in r else "-",
+        )
+    console.print(table)
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline Git-Alchemist benchmarks")
+    parser.add_argument("--sizes", default="1000", help="Comma-separated synthetic repo sizes (files)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake model latency per call (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Extra random latency per call (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of an injected 429 per call")
+    parser.add_argument("--max-tokens", type=int, default=1_000_000, help="Fake model input token limit")
+    parser.add_argument("--real-limits", action="store_true", help="Keep the production RPM/TPM limits")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed slowdown before flagging a regression")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baselines")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    backend_args = {"latency": args.latency, "jitter": args.jitter, "error_rate": args.error_rate, "max_tokens": args.max_tokens}
+    results = run_suite(sizes, backend_args, memory=not args.no_memory, real_limits=args.real_limits)
+
+    try:
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            baselines = json.load(f)
+    except (OSError, ValueError):
+        baselines = {}
+
+    render(results, baselines)
+
+    if args.update_baseline:
+        baselines.update(results)
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        console.print(f"[green]Baselines updated: {BASELINE_PATH}[/green]")
+        return 0
+
+    regressions = compare(results, baselines, args.tolerance)
+    for line in regressions:
+        console.print(f"[red]Regression:[/red] {line}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+import os
+import json
+import random
+
+_PY_TEMPLATE = '''"""Module {name}: synthetic code for benchmarking."""
+import os
+
+
+class {cls}:
+    def __init__(self, value):
+        self.value = value
+
+    def compute(self, factor):
+        # Scale the value by the given factor
+        return self.value * factor + {n}
+
+
+def helper_{n}(items):
+    total = 0
+    for item in items:
+        total += len(str(item))
+    return total
+'''
+
+_MD_TEMPLATE = """# Component {n}
+
+This document describes component {n} of the synthetic repository.
+
+## Usage
+
+Call `helper_{n}` with a list of items to get the total rendered length.
+"""
+
+def make_synthetic_repo(root: str, n_files: int, seed: int = 0) -> str:
+    """
+    Writes `n_files` source files (Python, Markdown, JSON) under `root`,
+    spread across nested package directories. Returns `root`.
+    """
+    rng = random.Random(seed)
+    for n in range(n_files):
+        package = os.path.join(root, "src", f"pkg{n // 100}", f"sub{n % 10}")
+        os.makedirs(package, exist_ok=True)
+        kind = rng.random()
+        if kind < 0.7:
+            path = os.path.join(package, f"module_{n}.py")
+            body = _PY_TEMPLATE.format(name=n, cls=f"Widget{n}", n=n) * rng.randint(1, 4)
+        elif kind < 0.9:
+            path = os.path.join(package, f"README_{n}.md")
+            body = _MD_TEMPLATE.format(n=n)
+        else:
+            path = os.path.join(package, f"config_{n}.json")
+            body = json.dumps({"id": n, "tags": [f"t{i}" for i in range(rng.randint(1, 20))]}, indent=2)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(body)
+
+    # Directories the scanner must skip
+    for ignored in ("node_modules", "__pycache__"):
+        os.makedirs(os.path.join(root, ignored), exist_ok=True)
+        with open(os.path.join(root, ignored, "ignored.js"), "w", encoding="utf-8") as f:
+            f.write("module.exports = {};\n" * 100)
+    return root
+
+def make_json_blob(n_items: int, seed: int = 0) -> str:
+    """
+    A model-style answer: prose, then a fenced JSON array of issue objects.
+    """
+    rng = random.Random(seed)
+    items = [
+        {"title": f"Issue {i}", "body": "Details " * rng.randint(5, 50), "label": "bug", "easy": bool(i % 2)}
+        for i in range(n_items)
+    ]
+    return "Here are the issues I found:\n```json\n" + json.dumps(items, indent=2) + "\n```\nHope this helps!"
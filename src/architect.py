@@ -1,5 +1,4 @@
 import os
-import json
 import shutil
 import tempfile
 import subprocess
@@ -7,10 +6,18 @@ from typing import Optional, Literal
 from rich.console import Console
 from rich.prompt import Confirm
 from .core import generate_content
-from .utils import run_shell, parse_json_response
+from .utils import run_shell
+from .structured import generate_structured
+from .render import StreamPrinter
 
 console = Console()
 
+SCAFFOLD_SCHEMA = {
+    "type": "object",
+    "properties": {"commands": {"type": "array", "items": {"type": "string"}}},
+    "required": ["commands"],
+}
+
 def scaffold_project(
     instruction: str, 
     mode: Literal["fast", "smart"] = "fast"
@@ -30,21 +37,18 @@ User Goal: "{instruction}"
 Operating System: Linux/Unix (Termux)
 Constraint: Return ONLY a JSON object with a single key "commands" containing an array of shell strings.
 The commands should assume they are running INSIDE the project root.
-Example: {{'commands': ['mkdir src', 'touch src/main.py', "echo 'print(1)' > src/main.py"]}}
+Example: {{"commands": ["mkdir src", "touch src/main.py", "echo 'print(1)' > src/main.py"]}}
 Do NOT use markdown blocks.
 """
 
-    result = generate_content(prompt, mode=mode)
-    if not result:
+    data = generate_structured(prompt, SCAFFOLD_SCHEMA, mode=mode)
+    if data is None:
+        console.print("[red]Failed to get a valid scaffolding plan.[/red]")
         shutil.rmtree(temp_dir)
         return
 
     try:
-        data = parse_json_response(result)
-        if not data or not isinstance(data, dict):
-             raise ValueError("Failed to parse AI response as JSON")
-             
-        commands = data.get("commands", [])
+        commands = data["commands"]
         
         console.print("[green]Generated Plan:[/green]")
         for cmd in commands:
@@ -106,8 +110,6 @@ Do NOT use markdown blocks.
             finally:
                 os.chdir(cwd)
         
-    except json.JSONDecodeError:
-        console.print(f"[red]Failed to parse AI response:[/red] {result}")
     finally:
         if os.path.exists(temp_dir):
             shutil.rmtree(temp_dir)
@@ -180,6 +182,6 @@ def explain_code(
     """
     prompt = f"Task: Explain Concept/Code. Context is provided. Keep it concise and technical."
     # Pass context separately
-    result = generate_content(prompt, mode=mode, context=context)
-    if result:
-        console.print(f"\n[bold white]--- Explanation ---[/bold white]\n{result}\n[bold white]-------------------[/bold white]")
\ No newline at end of file
+    printer = StreamPrinter("\n[bold white]--- Explanation ---[/bold white]", "[bold white]-------------------[/bold white]")
+    result = generate_content(prompt, mode=mode, context=context, stream=printer)
+    printer.finish(result)
\ No newline at end of file
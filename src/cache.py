@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from typing import Any
+from .utils import get_cache_dir
+
+# Defaults (overridable via environment)
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+def make_key(model: str, prompt: str, mode: str, schema: dict[str, Any] | None = None) -> str:
+    """
+    Content-addressed cache key for a (model, prompt, mode) triple and the
+    response schema the answer was constrained to, if any.
+    """
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8", errors="replace")).hexdigest()
+    schema_key = json.dumps(schema, sort_keys=True) if schema else ""
+    return hashlib.sha256(f"{model}\0{mode}\0{prompt_hash}\0{schema_key}".encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """
+    On-disk LLM response cache with TTL expiry and size-bounded LRU eviction.
+
+    Each entry is a small JSON file under `<cache_dir>/responses/<xx>/<key>.json`.
+    File mtime is the creation time that the TTL runs from; atime is the LRU
+    timestamp: hits touch only the atime, eviction removes the least recently
+    used files first.
+    """
+
+    def __init__(
+        self,
+        directory: str | None = None,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        enabled: bool = True,
+    ):
+        self.directory = directory or os.path.join(get_cache_dir(), "responses")
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._size: int | None = None
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, model: str, prompt: str, mode: str, schema: dict[str, Any] | None = None) -> str | None:
+        """
+        Returns the cached response text, or None on miss/expiry.
+        """
+        return self._record(self._read(model, prompt, mode, schema))
+
+    def lookup(self, models: list[str], prompt: str, mode: str, schema: dict[str, Any] | None = None) -> tuple[str, str] | None:
+        """
+        Returns (model, text) for the first model in `models` with a cached answer.
+        Counts a single hit or miss for the whole lookup.
+        """
+        found = None
+        for model in models:
+            text = self._read(model, prompt, mode, schema)
+            if text is not None:
+                found = (model, text)
+                break
+        return self._record(found)
+
+    def _read(self, model: str, prompt: str, mode: str, schema: dict[str, Any] | None = None) -> str | None:
+        if not self.enabled:
+            return None
+        path = self._path(make_key(model, prompt, mode, schema))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if self.ttl and time.time() - entry.get("created", 0) > self.ttl:
+            self._remove(path)
+            return None
+
+        try:
+            # Refresh the LRU position (atime) and keep mtime as the creation time
+            os.utime(path, (time.time(), os.stat(path).st_mtime))
+        except OSError:
+            pass
+        return entry.get("text")
+
+    def _record(self, result: Any) -> Any:
+        if self.enabled:
+            with self._lock:
+                if result is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+        return result
+
+    def put(self, model: str, prompt: str, mode: str, text: str, schema: dict[str, Any] | None = None) -> None:
+        """
+        Stores a response atomically and evicts old entries if over budget.
+        """
+        if not self.enabled or not text:
+            return
+        path = self._path(make_key(model, prompt, mode, schema))
+        created = time.time()
+        entry = {"model": model, "mode": mode, "created": created, "text": text}
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.utime(tmp, (created, created))
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp, path)
+            new_size = os.path.getsize(path)
+        except OSError:
+            return
+
+        with self._lock:
+            self.writes += 1
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += new_size - old_size
+            over_budget = self._size > self.max_bytes
+        if over_budget:
+            self.evict()
+
+    def evict(self) -> None:
+        """
+        Removes expired entries (by creation time), then least-recently-used
+        ones until the cache is back under 90% of its byte budget.
+        """
+        entries = []
+        now = time.time()
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_atime, st.st_mtime, st.st_size, path))
+
+        entries.sort()
+        total = sum(size for _, _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for _, created, size, path in entries:
+            expired = self.ttl and now - created > self.ttl
+            if total <= target and not expired:
+                continue
+            if self._remove(path):
+                total -= size
+                removed += 1
+
+        with self._lock:
+            self._size = total
+            self.evictions += removed
+
+    def clear(self) -> None:
+        """
+        Deletes every cached entry.
+        """
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                self._remove(os.path.join(root, name))
+        with self._lock:
+            self._size = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+        }
+
+    def _scan_size(self) -> int:
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    continue
+        return total
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+_response_cache: ResponseCache | None = None
+
+def get_response_cache() -> ResponseCache:
+    """
+    Returns the process-wide response cache, configured from the environment:
+    ALCHEMIST_NO_CACHE, ALCHEMIST_CACHE_TTL (seconds), ALCHEMIST_CACHE_MAX_MB.
+    """
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            ttl=float(os.getenv("ALCHEMIST_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+            max_bytes=int(float(os.getenv("ALCHEMIST_CACHE_MAX_MB", DEFAULT_MAX_BYTES / (1024 * 1024))) * 1024 * 1024),
+            enabled=not os.getenv("ALCHEMIST_NO_CACHE"),
+        )
+    return _response_cache
+
+def disable_cache() -> None:
+    """
+    Bypasses the response cache for the rest of the process (`--no-cache`).
+    """
+    get_response_cache().enabled = False
@@ -0,0 +1,152 @@
+import re
+from typing import Iterable, Iterator
+
+# Record header emitted by utils.get_codebase_context
+FILE_HEADER_RE = re.compile(r"^--- FILE: (.+?) ---$", re.MULTILINE)
+
+# Lines where it is reasonable to cut an oversized file: top-level definitions
+# in the languages we scan, and markdown headings.
+BOUNDARY_RE = re.compile(
+    r"^(?:async\s+def|def|class|function|export|fn|func|impl|struct|interface|"
+    r"public|private|protected|static|#{1,6}\s)"
+)
+
+# Open chunks kept by `stream_records` while packing
+STREAM_WINDOW = 4
+
+def parse_file_records(context: str) -> list[tuple[str | None, str]]:
+    """
+    Splits an aggregated context string into (path, body) records.
+    Text before the first header (or a context without headers) has path None.
+    """
+    records: list[tuple[str | None, str]] = []
+    matches = list(FILE_HEADER_RE.finditer(context))
+    if not matches:
+        return [(None, context)] if context else []
+
+    preamble = context[:matches[0].start()]
+    if preamble.strip():
+        records.append((None, preamble))
+
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(context)
+        body = context[match.end() + 1:end]
+        records.append((match.group(1), body.rstrip("\n") + "\n"))
+    return records
+
+def _blocks(text: str) -> list[str]:
+    """
+    Groups lines into blocks that end at blank lines or before definitions.
+    """
+    blocks: list[str] = []
+    current: list[str] = []
+    for line in text.splitlines(keepends=True):
+        if current and BOUNDARY_RE.match(line):
+            blocks.append("".join(current))
+            current = []
+        current.append(line)
+        if not line.strip():
+            blocks.append("".join(current))
+            current = []
+    if current:
+        blocks.append("".join(current))
+    return blocks
+
+def split_text(text: str, max_chars: int) -> list[str]:
+    """
+    Splits text into pieces of at most `max_chars`, preferring blank-line and
+    definition boundaries, then line boundaries, then hard cuts.
+    """
+    if max_chars <= 0:
+        raise ValueError("max_chars must be positive")
+
+    pieces: list[str] = []
+    current = ""
+    for block in _blocks(text):
+        units = [block] if len(block) <= max_chars else block.splitlines(keepends=True)
+        for unit in units:
+            if len(unit) > max_chars:
+                if current:
+                    pieces.append(current)
+                    current = ""
+                pieces.extend(unit[i:i + max_chars] for i in range(0, len(unit), max_chars))
+                continue
+            if len(current) + len(unit) > max_chars:
+                pieces.append(current)
+                current = ""
+            current += unit
+    if current:
+        pieces.append(current)
+    return pieces
+
+def _render(path: str | None, body: str, part: tuple[int, int] | None = None) -> str:
+    if path is None:
+        return body
+    label = f"{path} (part {part[0]}/{part[1]})" if part else path
+    return f"--- FILE: {label} ---\n{body}"
+
+def _render_items(path: str | None, body: str, max_chars: int) -> list[str]:
+    """
+    A rendered record, or its header-prefixed pieces if it exceeds `max_chars`.
+    """
+    rendered = _render(path, body)
+    if len(rendered) <= max_chars:
+        return [rendered]
+    header_len = len(_render(path, "", (999, 999))) if path is not None else 0
+    pieces = split_text(body, max(max_chars - header_len, max_chars // 2))
+    return [_render(path, piece, (i, len(pieces)) if path is not None else None) for i, piece in enumerate(pieces, 1)]
+
+def pack_records(records: list[tuple[str | None, str]], max_chars: int) -> list[str]:
+    """
+    Bin-packs file records into as few chunks as possible (first-fit decreasing).
+    Oversized files are split on boundaries and each piece keeps its file header.
+    """
+    if max_chars <= 0:
+        raise ValueError("max_chars must be positive")
+
+    items: list[tuple[int, str]] = []  # (original order, rendered text)
+    for order, (path, body) in enumerate(records):
+        items.extend((order, text) for text in _render_items(path, body, max_chars))
+
+    bins: list[list] = []  # [used_chars, [(order, seq, text), ...]]
+    ordered = sorted(enumerate(items), key=lambda it: len(it[1][1]), reverse=True)
+    for seq, (order, text) in ordered:
+        for b in bins:
+            sep = 1 if b[1] else 0
+            if b[0] + sep + len(text) <= max_chars:
+                b[0] += sep + len(text)
+                b[1].append((order, seq, text))
+                break
+        else:
+            bins.append([len(text), [(order, seq, text)]])
+
+    # Keep files in their original (repository) order inside each chunk
+    bins.sort(key=lambda b: min(entry[:2] for entry in b[1]))
+    return ["\n".join(text for _, _, text in sorted(b[1])) for b in bins]
+
+def stream_records(records: Iterable[tuple[str | None, str]], max_chars: int, window: int = STREAM_WINDOW) -> Iterator[str]:
+    """
+    Streaming counterpart of `pack_records`: first-fit over at most `window`
+    open chunks, emitting the fullest one whenever a record fits none of them.
+    Only the open chunks are held in memory, never the whole input.
+    """
+    if max_chars <= 0:
+        raise ValueError("max_chars must be positive")
+
+    bins: list[list] = []  # [used_chars, [text, ...]]
+    for path, body in records:
+        for text in _render_items(path, body, max_chars):
+            for b in bins:
+                sep = 1 if b[1] else 0
+                if b[0] + sep + len(text) <= max_chars:
+                    b[0] += sep + len(text)
+                    b[1].append(text)
+                    break
+            else:
+                if len(bins) >= window:
+                    fullest = max(bins, key=lambda b: b[0])
+                    bins.remove(fullest)
+                    yield "\n".join(fullest[1])
+                bins.append([len(text), [text]])
+    for b in bins:
+        yield "\n".join(b[1])
@@ -1,25 +1,51 @@
 import argparse
+import importlib
+import os
 import sys
+from typing import Any, Callable
 from rich.console import Console
-from .profile_gen import generate_profile
-from .architect import scaffold_project, fix_code, explain_code
-from .repo_tools import optimize_topics, generate_descriptions
-from .issue_gen import create_issue
-from .audit import run_audit
-from .sage import ask_sage
-from .committer import suggest_commits
-from .forge import forge_pr
-from .helper import run_helper
+from .cache import get_response_cache, disable_cache
+from .telemetry import get_telemetry, write_prometheus_textfile
 
 console = Console()
 
+def lazy(module: str, attr: str) -> Callable[..., Any]:
+    """
+    Returns a callable that imports `src.<module>` only when first invoked, so
+    commands never pay for each other's imports (or for google.genai).
+    """
+    def call(*args: Any, **kwargs: Any) -> Any:
+        return getattr(importlib.import_module(f"{__package__}.{module}"), attr)(*args, **kwargs)
+    return call
+
+# Subcommand registry: command -> handler(args, mode)
+COMMANDS: dict[str, Callable[[argparse.Namespace, str], Any]] = {
+    "profile": lambda args, mode: lazy("profile_gen", "generate_profile")(args.user, args.force, mode=mode),
+    "topics": lambda args, mode: lazy("repo_tools", "optimize_topics")(args.user, mode=mode),
+    "describe": lambda args, mode: lazy("repo_tools", "generate_descriptions")(args.user, mode=mode),
+    "issue": lambda args, mode: lazy("issue_gen", "create_issue")(args.idea, mode=mode, rev=args.rev),
+    "scaffold": lambda args, mode: lazy("architect", "scaffold_project")(args.instruction, mode=mode),
+    "fix": lambda args, mode: lazy("architect", "fix_code")(args.file, args.instruction, mode=mode),
+    "explain": lambda args, mode: lazy("architect", "explain_code")(args.context, mode=mode),
+    "audit": lambda args, mode: lazy("audit", "run_audit")(repo_name=args.repo),
+    "sage": lambda args, mode: lazy("sage", "ask_sage")(args.question, mode=mode, use_index=not args.no_index, rev=args.rev),
+    "commit": lambda args, mode: lazy("committer", "suggest_commits")(mode=mode),
+    "forge": lambda args, mode: lazy("forge", "forge_pr")(mode=mode),
+    "helper": lambda args, mode: lazy("helper", "run_helper")(mode=mode, digest=args.digest),
+    "index": lambda args, mode: lazy("summary_index", "run_index_command")(args.action, args.path, mode=mode),
+    "stats": lambda args, mode: lazy("stats", "show_stats")(days=args.days),
+}
+
 def main():
     parser = argparse.ArgumentParser(description="Git-Alchemist: AI-powered Git Operations")
     parser.add_argument("--smart", action="store_true", help="Use high-end Gemini Pro models (slower/lower quota)")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the local LLM response cache")
+    parser.add_argument("--provider", choices=["gemini", "local"], help="LLM backend (default: ALCHEMIST_PROVIDER or gemini)")
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
     
     # Helper Command
     helper_parser = subparsers.add_parser("helper", help="Interactive assistant for project help and tool usage")
+    helper_parser.add_argument("--digest", action="store_true", help="Summarize the codebase in the background before the first question (uses API quota)")
 
     # Forge Command
     forge_parser = subparsers.add_parser("forge", help="Automatically generate and open a PR from the current branch")
@@ -30,6 +56,13 @@ def main():
     # Sage Command
     sage_parser = subparsers.add_parser("sage", help="Ask the Sage questions about your codebase")
     sage_parser.add_argument("question", help="The question about your code")
+    sage_parser.add_argument("--no-index", action="store_true", help="Re-read every file instead of using the summary index")
+    sage_parser.add_argument("--rev", help="Answer about this commit/branch instead of the working tree")
+
+    # Summary Index Command
+    index_parser = subparsers.add_parser("index", help="Build, inspect, export or import the Sage's file summary index")
+    index_parser.add_argument("action", choices=["build", "status", "export", "import"], help="What to do with the index")
+    index_parser.add_argument("path", nargs="?", help="File to export to or import from")
 
     # Audit Command
     audit_parser = subparsers.add_parser("audit", help="Check repository 'Gold' status and metadata")
@@ -50,6 +83,7 @@ def main():
     # Issue Generator
     issue_parser = subparsers.add_parser("issue", help="Draft a technical issue from an idea")
     issue_parser.add_argument("idea", help="The feature or bug idea")
+    issue_parser.add_argument("--rev", help="Scan this commit/branch instead of the working tree")
 
     # Architect Commands
     scaffold_parser = subparsers.add_parser("scaffold", help="Generate a new project structure (safe mode)")
@@ -62,6 +96,9 @@ def main():
     explain_parser = subparsers.add_parser("explain", help="Explain code or concepts")
     explain_parser.add_argument("context", help="The code or concept to explain")
 
+    stats_parser = subparsers.add_parser("stats", help="Show LLM latency, token and fallback statistics")
+    stats_parser.add_argument("--days", type=float, help="Only include calls from the last N days")
+
     args = parser.parse_args()
     
     # Check if a command was selected
@@ -70,31 +107,25 @@ def main():
         return
 
     mode = "smart" if args.smart else "fast"
+    get_telemetry().command = args.command
+    if args.no_cache:
+        disable_cache()
+    if args.provider:
+        lazy("providers", "set_provider")(args.provider)
     
-    if args.command == "profile":
-        generate_profile(args.user, args.force, mode=mode)
-    elif args.command == "topics":
-        optimize_topics(args.user, mode=mode)
-    elif args.command == "describe":
-        generate_descriptions(args.user, mode=mode)
-    elif args.command == "issue":
-        create_issue(args.idea, mode=mode)
-    elif args.command == "scaffold":
-        scaffold_project(args.instruction, mode=mode)
-    elif args.command == "fix":
-        fix_code(args.file, args.instruction, mode=mode)
-    elif args.command == "explain":
-        explain_code(args.context, mode=mode)
-    elif args.command == "audit":
-        run_audit(repo_name=args.repo)
-    elif args.command == "sage":
-        ask_sage(args.question, mode=mode)
-    elif args.command == "commit":
-        suggest_commits(mode=mode)
-    elif args.command == "forge":
-        forge_pr(mode=mode)
-    elif args.command == "helper":
-        run_helper(mode=mode)
+    COMMANDS[args.command](args, mode)
+    if args.command == "stats":
+        return
+
+    cache_stats = get_response_cache().stats()
+    if cache_stats["hits"] or cache_stats["misses"]:
+        console.print(f"[gray]Response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses.[/gray]")
+
+    telemetry = get_telemetry()
+    telemetry.flush()
+    prom_path = os.getenv("ALCHEMIST_PROM_TEXTFILE")
+    if prom_path:
+        write_prometheus_textfile(list(telemetry.iter_records()), prom_path)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,70 @@
+import os
+import hashlib
+import threading
+from typing import Any, Callable
+from dotenv import load_dotenv
+
+class ClientPool:
+    """
+    Process-wide pool of Gemini clients, one per API key.
+
+    The environment is loaded once, each client (and its HTTP connection pool)
+    is built once and reused, and `next()` rotates round-robin across keys so
+    bulk jobs spread their quota. Keys come from GEMINI_API_KEYS (comma
+    separated) or GEMINI_API_KEY.
+    """
+
+    def __init__(self, factory: Callable[[str], Any] | None = None, keys: list[str] | None = None):
+        self._factory = factory or _build_gemini_client
+        self._keys = keys
+        self._clients: dict[str, Any] = {}
+        self._index = 0
+        self._lock = threading.Lock()
+
+    def keys(self) -> list[str]:
+        with self._lock:
+            if self._keys is None:
+                load_dotenv()
+                raw = os.getenv("GEMINI_API_KEYS") or os.getenv("GEMINI_API_KEY") or ""
+                self._keys = [k.strip() for k in raw.split(",") if k.strip()]
+            return self._keys
+
+    def next(self) -> Any | None:
+        """
+        Returns the next client in rotation, or None if no key is configured.
+        """
+        keys = self.keys()
+        if not keys:
+            return None
+        with self._lock:
+            key = keys[self._index % len(keys)]
+            self._index += 1
+            if key not in self._clients:
+                self._clients[key] = self._factory(key)
+            return self._clients[key]
+
+    def label(self, client: Any) -> str | None:
+        """
+        Short, stable id of the key behind `client` (a hash, never the key itself).
+        """
+        with self._lock:
+            for key, built in self._clients.items():
+                if built is client:
+                    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:8]
+        return None
+
+def _build_gemini_client(api_key: str) -> Any:
+    from google import genai
+    return genai.Client(api_key=api_key, http_options={'api_version': 'v1alpha'})
+
+_client_pool = ClientPool()
+
+def get_client_pool() -> ClientPool:
+    return _client_pool
+
+def set_client_pool(pool: ClientPool) -> None:
+    """
+    Replaces the process-wide pool (used by tests and benchmarks to inject fakes).
+    """
+    global _client_pool
+    _client_pool = pool
@@ -0,0 +1,267 @@
+import io
+import os
+import re
+import json
+import tokenize
+import hashlib
+from typing import Callable, Iterable, Iterator
+from rich.console import Console
+
+console = Console()
+
+# A rule maps (path, content) to smaller content; it must keep the code's meaning
+Rule = Callable[[str, str], str]
+
+# Literals longer than this (e.g. embedded base64 or data tables) are collapsed
+LONG_LITERAL = 200
+LITERAL_KEEP = 40
+# A long literal with more whitespace than this is prose (a docstring or message) and is kept
+LITERAL_MAX_SPACE_SHARE = 0.05
+
+HASH_COMMENT_EXTS = {'.sh', '.ps1', '.yml', '.yaml', '.toml', '.Dockerfile'}
+SLASH_COMMENT_EXTS = {'.js', '.ts', '.c', '.cpp', '.h'}
+
+_BLANK_RUN_RE = re.compile(r"\n{3,}")
+_LONG_LITERAL_RE = re.compile(r"""(["'`])((?:(?!\1)[^\\\n]|\\.){%d,})\1""" % LONG_LITERAL)
+# Block comments that start a line (so "src/*" inside a string is never matched)
+_BLOCK_COMMENT_RE = re.compile(r"^[ \t]*/\*.*?\*/[ \t]*\n?", re.DOTALL | re.MULTILINE)
+_YAML_BLOCK_RE = re.compile(r":\s*[|>][+-]?\d*\s*$")
+
+def _ext(path: str) -> str:
+    name = os.path.basename(path)
+    return ".Dockerfile" if name == "Dockerfile" else os.path.splitext(name)[1]
+
+def normalize_whitespace(path: str, content: str) -> str:
+    """
+    Trailing whitespace and runs of blank lines; indentation is untouched.
+    """
+    content = "\n".join(line.rstrip() for line in content.split("\n"))
+    return _BLANK_RUN_RE.sub("\n\n", content)
+
+def minify_json(path: str, content: str) -> str:
+    if _ext(path) != ".json":
+        return content
+    try:
+        return json.dumps(json.loads(content), separators=(",", ":"), ensure_ascii=False) + "\n"
+    except ValueError:
+        return content
+
+def minify_yaml(path: str, content: str) -> str:
+    """
+    Drops comment-only and blank lines outside block scalars (`key: |`).
+    """
+    if _ext(path) not in {'.yml', '.yaml'}:
+        return content
+    kept = []
+    block_indent = None
+    for line in content.split("\n"):
+        indent = len(line) - len(line.lstrip())
+        if block_indent is not None:
+            if not line.strip() or indent > block_indent:
+                kept.append(line)
+                continue
+            block_indent = None
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        kept.append(line)
+        if _YAML_BLOCK_RE.search(line):
+            block_indent = indent
+    return "\n".join(kept) + "\n"
+
+def _is_data(body: str) -> bool:
+    return len(body) >= LONG_LITERAL and sum(c.isspace() for c in body) <= LITERAL_MAX_SPACE_SHARE * len(body)
+
+def _collapsed(quote: str, body: str) -> str:
+    return f"{quote}{body[:LITERAL_KEEP]}...<{len(body)} chars>{quote}"
+
+def collapse_literals(path: str, content: str) -> str:
+    """
+    Long data literals (base64 blobs, data tables) in code files. Python
+    strings come from the tokenizer; the C-style languages use a quote-matching
+    pattern. Prose never qualifies: other files are skipped, and literals with
+    prose-like whitespace are kept, so apostrophes in text are never mistaken
+    for string quotes.
+    """
+    ext = _ext(path)
+    # Cheap prefilter: tokenizing is only worth it if some line has a long quoted run
+    if ext not in SLASH_COMMENT_EXTS | {".py"} or not _LONG_LITERAL_RE.search(content):
+        return content
+    if ext == ".py":
+        return _collapse_python_literals(content)
+
+    def collapse(match: re.Match) -> str:
+        quote, body = match.group(1), match.group(2)
+        return _collapsed(quote, body) if _is_data(body) else match.group(0)
+    return _LONG_LITERAL_RE.sub(collapse, content)
+
+def _collapse_python_literals(content: str) -> str:
+    try:
+        tokens = list(tokenize.generate_tokens(io.StringIO(content).readline))
+    except (tokenize.TokenError, SyntaxError):
+        return content
+
+    offsets = [0]
+    for line in content.split("\n"):
+        offsets.append(offsets[-1] + len(line) + 1)
+    parts: list[str] = []
+    pos = 0
+    for tok in tokens:
+        if tok.type != tokenize.STRING or len(tok.string) < LONG_LITERAL:
+            continue
+        text = tok.string
+        prefix = len(text) - len(text.lstrip("rRbBuUfF"))
+        quote = text[prefix:prefix + 3] if text[prefix:prefix + 3] in ('"""', "'''") else text[prefix]
+        body = text[prefix + len(quote):-len(quote)]
+        if not _is_data(body):
+            continue
+        start = offsets[tok.start[0] - 1] + tok.start[1]
+        end = offsets[tok.end[0] - 1] + tok.end[1]
+        parts.append(content[pos:start])
+        parts.append(text[:prefix] + _collapsed(quote, body))
+        pos = end
+    if not parts:
+        return content
+    parts.append(content[pos:])
+    return "".join(parts)
+
+def strip_comments(path: str, content: str) -> str:
+    """
+    Full-line comments per language plus C-style block comments and Python
+    docstrings. Shebangs are kept. Opt-in: comments often carry intent.
+    """
+    ext = _ext(path)
+    if ext == ".py":
+        return _strip_python(content)
+    if ext in SLASH_COMMENT_EXTS:
+        content = _BLOCK_COMMENT_RE.sub("", content)
+        marker = "//"
+    elif ext in HASH_COMMENT_EXTS:
+        marker = "#"
+    else:
+        return content
+    lines = content.split("\n")
+    return "\n".join(
+        line for i, line in enumerate(lines)
+        if not line.lstrip().startswith(marker) or (i == 0 and line.startswith("#!"))
+    )
+
+def _strip_python(content: str) -> str:
+    """
+    Drops comment-only lines and docstrings using the tokenizer, so `#` or
+    triple quotes inside other strings are left alone. A docstring that is a
+    block's only statement becomes `pass`.
+    """
+    try:
+        tokens = list(tokenize.generate_tokens(io.StringIO(content).readline))
+    except (tokenize.TokenError, SyntaxError):
+        return content
+
+    significant = [t for t in tokens if t.type not in (tokenize.NL, tokenize.COMMENT)]
+    lines = content.split("\n")
+    drop: set[int] = set()
+    for tok in tokens:
+        if tok.type == tokenize.COMMENT and tok.line.strip().startswith("#") and not (tok.start[0] == 1 and tok.string.startswith("#!")):
+            drop.add(tok.start[0] - 1)
+    for i, tok in enumerate(significant):
+        if tok.type != tokenize.STRING or i + 1 >= len(significant) or significant[i + 1].type != tokenize.NEWLINE:
+            continue
+        before = significant[i - 1].type if i else tokenize.NEWLINE
+        if before not in (tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT):
+            continue
+        first, last = tok.start[0] - 1, tok.end[0] - 1
+        after = significant[i + 2].type if i + 2 < len(significant) else tokenize.ENDMARKER
+        if before == tokenize.INDENT and after in (tokenize.DEDENT, tokenize.ENDMARKER):
+            lines[first] = lines[first][:tok.start[1]] + "pass"
+            drop.update(range(first + 1, last + 1))
+        else:
+            drop.update(range(first, last + 1))
+    return "\n".join(line for i, line in enumerate(lines) if i not in drop)
+
+# Registry: rule name -> rule, applied in this order
+RULES: dict[str, Rule] = {
+    "comments": strip_comments,
+    "json": minify_json,
+    "yaml": minify_yaml,
+    "literals": collapse_literals,
+    "whitespace": normalize_whitespace,
+}
+
+# Rules on by default (plus "dedupe", which works across files)
+DEFAULT_RULES = ["json", "yaml", "literals", "whitespace", "dedupe"]
+
+def register_rule(name: str, rule: Rule) -> None:
+    RULES[name] = rule
+
+def configured_rules() -> list[str]:
+    """
+    Rules from ALCHEMIST_COMPRESS (comma-separated, "none" disables) or the defaults.
+    """
+    value = os.getenv("ALCHEMIST_COMPRESS")
+    if value is None:
+        return list(DEFAULT_RULES)
+    if value.strip().lower() in ("", "none", "off", "0"):
+        return []
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+class CompressionReport:
+    """
+    Characters in, characters out, and characters saved per rule.
+    """
+
+    def __init__(self):
+        self.before = 0
+        self.after = 0
+        self.saved: dict[str, int] = {}
+
+    def add(self, rule: str, saved: int) -> None:
+        if saved:
+            self.saved[rule] = self.saved.get(rule, 0) + saved
+
+    def summary(self) -> str:
+        total = self.before - self.after
+        share = (100 * total / self.before) if self.before else 0.0
+        rules = ", ".join(f"{name} {saved / 1024:.0f} KB" for name, saved in sorted(self.saved.items(), key=lambda kv: -kv[1]))
+        return f"Compression saved {total / 1024:.0f} KB ({share:.0f}%): {rules}."
+
+    def print(self) -> None:
+        if self.saved:
+            console.print(f"[gray]{self.summary()}[/gray]")
+
+def compress_records(
+    records: Iterable[tuple[str, str]],
+    rules: list[str] | None = None,
+    report: CompressionReport | None = None,
+) -> Iterator[tuple[str, str]]:
+    """
+    Applies the compression rules to each (path, content) record as it streams
+    by. With "dedupe", a file identical to an earlier one is replaced by a
+    pointer to it when the pointer is shorter.
+    """
+    rules = configured_rules() if rules is None else rules
+    report = report if report is not None else CompressionReport()
+    unknown = [name for name in rules if name != "dedupe" and name not in RULES]
+    if unknown:
+        console.print(f"[yellow]Ignoring unknown compression rule(s): {', '.join(unknown)}[/yellow]")
+    active = [(name, RULES[name]) for name in RULES if name in rules]
+    seen: dict[str, str] = {}
+
+    for path, content in records:
+        report.before += len(content)
+        if "dedupe" in rules:
+            digest = hashlib.sha1(content.encode("utf-8", errors="replace")).hexdigest()
+            original = seen.setdefault(digest, path)
+            stub = f"(identical to {original})\n"
+            # Tiny duplicates (e.g. empty __init__.py files) are cheaper to send as they are
+            if original != path and len(stub) < len(content):
+                report.add("dedupe", len(content) - len(stub))
+                report.after += len(stub)
+                yield path, stub
+                continue
+        for name, rule in active:
+            smaller = rule(path, content)
+            if len(smaller) < len(content):
+                report.add(name, len(content) - len(smaller))
+                content = smaller
+        report.after += len(content)
+        yield path, content
@@ -1,60 +1,287 @@
 import os
 import sys
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from google import genai
-from dotenv import load_dotenv
+import random
+import hashlib
+import asyncio
+import threading
 from rich.console import Console
-from typing import Any
+from rich.markup import escape
+from collections import deque
+from typing import Any, Callable, Iterable, Iterator
+from .cache import get_response_cache
+from .providers import get_provider, GEMINI_TIERS, GEMINI_TOKEN_LIMITS
+from .telemetry import get_telemetry, usage_tokens
+from .tokens import get_token_estimator
+from .scheduler import get_rate_limiter, get_hedge_budget, MAX_WAIT_SECONDS
+from .health import get_health_registry, parse_retry_after
+from .chunker import parse_file_records, pack_records, split_text, stream_records
+from .retrieval import tokenize, best_piece, MIN_COVERAGE
 
 console = Console()
 
-# User-specified model tiers
-SMART_MODELS = [
-    "gemini-3-flash",
-    "gemini-2.5-flash",
-    "gemini-2.5-flash-lite",
-]
+# Gemini model tiers and safe token limits; the active provider decides
+# what the engine actually uses (see tier_models and safe_token_limit)
+SMART_MODELS = GEMINI_TIERS["smart"]
+FAST_MODELS = GEMINI_TIERS["fast"]
 
-FAST_MODELS = [
-    "gemma-3-27b-it",
-    "gemma-3-12b-it",
-    "gemma-3-4b-it",
-]
+SAFE_TOKEN_LIMIT_FAST = GEMINI_TOKEN_LIMITS["fast"]
+SAFE_TOKEN_LIMIT_SMART = GEMINI_TOKEN_LIMITS["smart"]
 
-# Safe token limits
-SAFE_TOKEN_LIMIT_FAST = 12000
-SAFE_TOKEN_LIMIT_SMART = 230000 
-
-# Heuristic: ~4 characters per token
+# Characters per token of plain prose; other content is estimated per class (see tokens.py)
 CHARS_PER_TOKEN = 4
 
-def get_gemini_client() -> Any:
-    load_dotenv()
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        console.print("[bold red]Error:[/bold red] GEMINI_API_KEY not found.")
+# Depth cap for hierarchical reduce before the final call is forced
+MAX_REDUCE_LEVELS = 4
+
+# Upper bound on concurrent requests per map/reduce phase; per-model AIMD limits gate actual concurrency
+MAX_IN_FLIGHT = int(os.getenv("ALCHEMIST_MAX_IN_FLIGHT", "64"))
+
+# Per-call timeout (seconds) before a model attempt is abandoned; a client
+# with its own `call_timeout` (e.g. a local server) overrides it
+CALL_TIMEOUT_SECONDS = float(os.getenv("ALCHEMIST_CALL_TIMEOUT", "120"))
+
+# Relevance pass before a map chunk reaches the full tier: a free local term
+# check, plus (opt-in) a YES/NO call to the tier's smallest model. That model
+# shares the tier's quota, so it only sees the chunk's best-matching piece.
+TRIAGE_ENABLED = not os.getenv("ALCHEMIST_NO_TRIAGE")
+TRIAGE_MODEL = bool(os.getenv("ALCHEMIST_TRIAGE"))
+TRIAGE_SAMPLE_CHARS = 2000
+
+# Hedged map calls (opt-in): duplicate a chunk call that runs past its model's
+# p90 latency to the next model; within the scheduler's HEDGE_BUDGET
+HEDGING = bool(os.getenv("ALCHEMIST_HEDGE"))
+HEDGE_PERCENTILE = 90
+
+# Receives answer text as it is generated (see generate_with_fallback_async)
+TextSink = Callable[[str], None]
+
+# Characters of each chunk's findings shown while a streamed map phase runs
+FINDING_PREVIEW_CHARS = 160
+
+class _EngineLoop:
+    """
+    A single background event loop shared by every LLM call in the process,
+    so async clients and connection pools are never bound to a dead loop.
+    """
+
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="alchemist-engine", daemon=True).start()
+            return self._loop
+
+_engine = _EngineLoop()
+
+class MissingClientError(RuntimeError):
+    """
+    The active provider cannot build a client (e.g. no API key is set).
+    """
+
+def run_sync(coro: Any) -> Any:
+    """
+    Runs a coroutine on the engine loop and blocks until it finishes.
+    Ctrl-C cancels the coroutine (and every task it awaits) before re-raising.
+    A missing client exits with status 1 here, on the caller's thread: a
+    SystemExit on the engine thread would kill the loop and hang the caller.
+    """
+    loop = _engine.get()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_sync() called from the engine loop; await the coroutine instead.")
+
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    try:
+        return future.result()
+    except KeyboardInterrupt:
+        future.cancel()
+        raise
+    except MissingClientError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
         sys.exit(1)
-    return genai.Client(api_key=api_key, http_options={'api_version':'v1alpha'})
+
+def get_llm_client() -> Any:
+    """
+    Returns a reusable client for the active provider (for Gemini, round-robin
+    across keys) and registers the provider's quotas with the rate limiter.
+    """
+    provider = get_provider()
+    client = provider.client()
+    if client is None:
+        raise MissingClientError(f"{provider.required_setting} not found.")
+    provider.configure(get_rate_limiter())
+    return client
+
+def tier_models(mode: str = "fast") -> list[str]:
+    """
+    The active provider's models for `mode`, strongest first.
+    """
+    return get_provider().models(mode)
+
+def safe_token_limit(mode: str = "fast") -> int:
+    """
+    Tokens a single call may use on the active provider's `mode` tier.
+    """
+    return get_provider().token_limit(mode)
 
 def estimate_tokens(text: str) -> int:
     """
-    Estimates token count using a simple character heuristic.
+    Estimates token count offline from per-content-class character ratios,
+    corrected by what past responses reported.
     """
     if not text:
         return 0
-    return len(text) // CHARS_PER_TOKEN
+    return get_token_estimator().estimate(text)
+
+def estimate_record_tokens(records: Iterable[tuple[str, str]]) -> int:
+    """
+    Tokens of (path, content) records in the `--- FILE: path ---` context
+    format, estimated without rendering that string.
+    """
+    return sum(estimate_tokens(path) + estimate_tokens(content) + 6 for path, content in records)
+
+def chars_for_tokens(tokens: int, sample: str) -> int:
+    """
+    How many characters of text like `sample` fit in `tokens` tokens.
+    """
+    return int(tokens * get_token_estimator().chars_per_token(sample))
+
+def context_budget(prompt: str, mode: str = "fast") -> int:
+    """
+    Tokens of context that fit next to `prompt` in a single call for `mode`.
+    """
+    return max(0, safe_token_limit(mode) - estimate_tokens(prompt) - 100)
 
 def split_context(context: str, limit: int) -> list[str]:
     """
     Splits context into chunks that fit within the token limit.
+    `--- FILE: path ---` records are packed whole where possible; plain text
+    is cut on blank-line/definition boundaries.
     """
-    chunk_size = limit * CHARS_PER_TOKEN
-    return [context[i:i+chunk_size] for i in range(0, len(context), chunk_size)]
+    chunk_size = chars_for_tokens(limit, context)
+    records = parse_file_records(context)
+    if chunk_size <= 0:
+        raise ValueError("limit must be positive")
+    if all(path is None for path, _ in records):
+        return split_text(context, chunk_size) if context else []
+    return pack_records(records, chunk_size)
 
-def process_chunk(client: Any, chunk: str, prompt: str, models: list[str]) -> str | None:
+def map_order(models: list[str], tokens: int, client: Any = None) -> list[str]:
+    """
+    Model order for one map chunk. Chunks are spread over the tier, except
+    the strongest model, which is kept for the reduce step. Each model is
+    weighted by measured throughput and remaining quota (of `client`'s key).
+    The strongest model is still the last fallback.
     """
-    Worker function to process a single chunk.
+    if len(models) < 2:
+        return models
+    pool = models[1:]
+    provider, limiter, health = get_provider(), get_rate_limiter(), get_health_registry()
+    keys = [provider.quota_key(client, m) for m in pool]
+    weights = [limiter.for_model(k).score(tokens) if health.available(k) else 0.0 for k in keys]
+    if sum(weights) <= 0:
+        return pool + models[:1]
+    first = random.choices(pool, weights)[0]
+    return [first] + [m for m in pool if m != first] + models[:1]
+
+async def generate_hedged_async(client: Any, prompt: str, models: list[str], mode: str = "fast") -> str | None:
+    """
+    generate_with_fallback_async with request hedging: if the call outlives
+    the p90 latency of its first model, a duplicate starts on the next model,
+    the first successful answer wins and the other call is cancelled.
+    """
+    budget = get_hedge_budget()
+    budget.record_call()
+    primary = asyncio.ensure_future(generate_with_fallback_async(client, prompt, models, silent=True, mode=mode, wait_for_quota=True))
+    first = get_rate_limiter().for_model(get_provider().quota_key(client, models[0]))
+    delay = first.latency_percentile(HEDGE_PERCENTILE) if len(models) > 1 else None
+    if delay is None:
+        return await primary
+
+    pending = {primary}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if done or not budget.try_hedge():
+            return await primary
+        get_telemetry().record(kind="hedge", mode=mode, model=models[1], delay_ms=round(delay * 1000, 1))
+        pending.add(asyncio.ensure_future(
+            generate_with_fallback_async(client, prompt, models[1:] + models[:1], silent=True, mode=mode)
+        ))
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() is None and task.result():
+                    return task.result()
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
+
+def build_triage_prompt(sample: str, question: str) -> str:
+    return f"""
+    Does the following excerpt of a codebase contain information needed to answer this question?
+    "{question}"
+    PARTIAL CONTEXT:
+    '''
+    {sample}
+    '''
+
+    Answer with exactly one word: YES or NO.
+    """
+
+async def triage_chunk_async(client: Any, chunk: str, question: str, mode: str = "fast") -> bool:
+    """
+    Cheap relevance check for a map chunk. Chunks that cover most of the
+    question's terms are relevant without a call. With TRIAGE_MODEL, the
+    smallest model of the tier judges the chunk's best-matching piece for the
+    rest (cached per chunk hash and question); otherwise only chunks sharing
+    no term with the question are skipped. Fails open: a failed triage call
+    counts as relevant.
+    """
+    terms = set(tokenize(question))
+    if not terms:
+        return True
+    coverage = len(terms & set(tokenize(chunk))) / len(terms)
+    if coverage >= MIN_COVERAGE:
+        return True
+    if not TRIAGE_MODEL:
+        return coverage > 0
+
+    cache = get_response_cache()
+    key = f"{hashlib.sha256(chunk.encode('utf-8', errors='replace')).hexdigest()}\0{question}"
+    cached = cache.get("triage", key, mode)
+    if cached is not None:
+        return cached == "yes"
+
+    sample = best_piece(chunk, question, TRIAGE_SAMPLE_CHARS)
+    answer = await generate_with_fallback_async(client, build_triage_prompt(sample, question), tier_models(mode)[-1:], silent=True, mode=mode)
+    if not answer:
+        return True
+    relevant = not answer.strip().strip("*.").upper().startswith("NO")
+    cache.put("triage", key, mode, "yes" if relevant else "no")
+    return relevant
+
+async def process_chunk_async(
+    client: Any,
+    chunk: str,
+    prompt: str,
+    models: list[str],
+    mode: str = "fast",
+    question: str | None = None,
+) -> str | None:
+    """
+    Worker coroutine to process a single chunk. With `question` (the user's
+    own words, without the command's instructions), a triage pass can skip
+    the chunk first.
     """
     chunk_prompt = f"""
     Analyze the following part of the codebase context based on this instruction:
@@ -66,105 +293,572 @@ def process_chunk(client: Any, chunk: str, prompt: str, models: list[str]) -> st
     
     Extract any relevant information found in this chunk. If nothing is relevant, say "Nothing relevant".
     """
-    return generate_with_fallback(client, chunk_prompt, models, silent=True)
+    started = time.monotonic()
+    if TRIAGE_ENABLED and question and not await triage_chunk_async(client, chunk, question, mode):
+        get_telemetry().record(
+            kind="chunk",
+            mode=mode,
+            est_tokens=estimate_tokens(chunk_prompt),
+            latency_ms=round((time.monotonic() - started) * 1000, 1),
+            outcome="triaged",
+        )
+        return "Nothing relevant"
+    order = map_order(models, estimate_tokens(chunk_prompt), client)
+    if HEDGING:
+        result = await generate_hedged_async(client, chunk_prompt, order, mode)
+    else:
+        result = await generate_with_fallback_async(client, chunk_prompt, order, silent=True, mode=mode, wait_for_quota=True)
+    get_telemetry().record(
+        kind="chunk",
+        mode=mode,
+        est_tokens=estimate_tokens(chunk_prompt),
+        latency_ms=round((time.monotonic() - started) * 1000, 1),
+        outcome="failed" if not result else "irrelevant" if "Nothing relevant" in result else "relevant",
+    )
+    return result
+
+def build_reduce_prompt(findings: str, prompt: str) -> str:
+    return f"""
+        Here are the findings from analyzing different parts of the codebase:
+        
+        {findings}
+        
+        Based on these findings, answer the original user request:
+        {prompt}
+        """
+
+def build_merge_prompt(findings: str, prompt: str) -> str:
+    return f"""
+    Merge the following findings from different parts of a codebase into one condensed set of findings.
+    Keep every detail (file names, symbols, facts) relevant to this instruction:
+    "{prompt}"
+    Drop duplicates and anything irrelevant. Do not answer the instruction yet.
+
+    FINDINGS:
+    '''
+    {findings}
+    '''
+    """
+
+def group_summaries(summaries: list[str], budget: int) -> list[list[str]]:
+    """
+    Greedily groups summaries into batches whose combined size fits `budget` tokens.
+    Summaries that are too large on their own are split first.
+    """
+    groups: list[list[str]] = []
+    current: list[str] = []
+    used = 0
+    for summary in summaries:
+        pieces = [summary] if estimate_tokens(summary) <= budget else split_text(summary, chars_for_tokens(budget, summary))
+        for piece in pieces:
+            size = estimate_tokens(piece) + 1
+            if current and used + size > budget:
+                groups.append(current)
+                current, used = [], 0
+            current.append(piece)
+            used += size
+    if current:
+        groups.append(current)
+    return groups
+
+async def _bounded(semaphore: asyncio.Semaphore, coro: Any) -> Any:
+    async with semaphore:
+        return await coro
+
+async def gather_bounded(coros: list[Any]) -> list[Any]:
+    """
+    Runs coroutines concurrently (at most MAX_IN_FLIGHT at a time) and returns
+    their results in order, exceptions included. If the caller is cancelled,
+    every outstanding task is cancelled too.
+    """
+    semaphore = asyncio.Semaphore(MAX_IN_FLIGHT)
+    tasks = [asyncio.ensure_future(_bounded(semaphore, c)) for c in coros]
+    try:
+        return await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def reduce_summaries_async(
+    client: Any,
+    summaries: list[str],
+    prompt: str,
+    models: list[str],
+    mode: str,
+    safe_limit: int,
+    silent: bool = False,
+    on_text: TextSink | None = None,
+    schema: dict[str, Any] | None = None,
+) -> str | None:
+    """
+    Hierarchical (tree) reduce: merges budget-sized groups of findings in
+    parallel, level by level, until they fit into one final synthesis call.
+    Only the final call is streamed to `on_text` and constrained by `schema`.
+    """
+    level = 1
+    while level <= MAX_REDUCE_LEVELS and len(summaries) > 1:
+        if estimate_tokens(build_reduce_prompt("\n".join(summaries), prompt)) <= safe_limit:
+            break
+
+        budget = max(1, safe_limit - estimate_tokens(build_merge_prompt("", prompt)))
+        groups = group_summaries(summaries, budget)
+        if not silent:
+            console.print(f"[cyan]Reduce level {level}: merging {len(summaries)} findings into {len(groups)} groups...[/cyan]")
+
+        results = await gather_bounded([
+            generate_with_fallback_async(client, build_merge_prompt("\n".join(group), prompt), models, silent=True, mode=mode)
+            for group in groups
+        ])
+        merged: list[str] = []
+        for res in results:
+            if isinstance(res, Exception):
+                if not silent:
+                    console.print(f"[red]Reduce group failed:[/red] {res}")
+            elif res:
+                merged.append(res)
+
+        if not merged:
+            break
+        summaries = merged
+        level += 1
+
+    if not silent:
+        console.print("[cyan]Synthesizing final answer...[/cyan]")
+    combined = "\n".join(summaries)
+    overflow = estimate_tokens(build_reduce_prompt(combined, prompt)) - safe_limit
+    if overflow > 0:
+        # Depth cap reached: trim rather than overflow the model window
+        combined = combined[:max(0, len(combined) - chars_for_tokens(overflow, combined))]
+    return await generate_with_fallback_async(
+        client, build_reduce_prompt(combined, prompt), models, silent=silent, mode=mode, on_text=on_text, schema=schema
+    )
 
-def generate_content(prompt: str, mode: str = "fast", context: str | None = None) -> str:
+def preview_finding(index: int, total: int, finding: str) -> None:
+    """
+    One-line preview of a map chunk's findings, printed as the chunk completes.
+    """
+    text = " ".join(finding.split())
+    if len(text) > FINDING_PREVIEW_CHARS:
+        text = text[:FINDING_PREVIEW_CHARS] + "..."
+    console.print(f"[gray]Chunk {index}/{total}:[/gray] {escape(text)}")
+
+def warn_failed_chunks(failed: int, total: int) -> None:
+    """
+    Tells the user, before the reduce, that part of the input is missing from the answer.
+    """
+    console.print(f"[yellow]Warning: {failed} of {total} chunks failed and are left out of the answer.[/yellow]")
+
+async def generate_content_async(
+    prompt: str,
+    mode: str = "fast",
+    context: str | None = None,
+    silent: bool = False,
+    on_text: TextSink | None = None,
+    schema: dict[str, Any] | None = None,
+    question: str | None = None,
+) -> str:
     """
     Generates content with strict model separation and parallel smart chunking.
+    With `on_text`, the answer is streamed to it as it is generated and each
+    map chunk's findings are previewed as soon as that chunk completes.
+    With `schema` (a JSON Schema), the answering call requests JSON output
+    matching it on models that support response schemas. `question` is the
+    user's question on its own, used to triage map chunks.
     """
-    client = get_gemini_client()
-    # Strict separation: Fast uses ONLY Gemma, Smart uses ONLY Gemini
-    models = SMART_MODELS if mode == "smart" else FAST_MODELS
+    client = get_llm_client()
+    # Strict separation: each mode uses only its own tier of the active provider
+    models = tier_models(mode)
     
     # Determine safe limit based on mode
-    safe_limit = SAFE_TOKEN_LIMIT_SMART if mode == "smart" else SAFE_TOKEN_LIMIT_FAST
+    safe_limit = safe_token_limit(mode)
     
     total_tokens = estimate_tokens(prompt) + estimate_tokens(context or "")
     
     # 1. Smart Chunking (Map-Reduce) for large contexts
     if context and total_tokens > safe_limit:
-        console.print(f"[yellow]Large context detected (~{total_tokens} tokens). Engaging Smart Chunking with {models[0]}...[/yellow]")
+        if not silent:
+            console.print(f"[yellow]Large context detected (~{total_tokens} tokens). Engaging Smart Chunking with {models[0]}...[/yellow]")
         
         chunks = split_context(context, safe_limit)
         summaries = []
-        batch_size = 2 # Process 2 chunks in parallel
-        
-        with ThreadPoolExecutor(max_workers=batch_size) as executor:
-            # Iterate through chunks in batches
-            for i in range(0, len(chunks), batch_size):
-                batch = chunks[i:i + batch_size]
-                futures = []
-                
-                console.print(f"[cyan]Processing batch {i//batch_size + 1} ({len(batch)} chunks)...[/cyan]")
-                
-                for chunk in batch:
-                    futures.append(executor.submit(process_chunk, client, chunk, prompt, models))
-                
-                for future in as_completed(futures):
-                    try:
-                        res = future.result()
-                        if res and "Nothing relevant" not in res:
-                            summaries.append(res)
-                    except Exception as e:
+        failed = 0
+        if not silent:
+            console.print(f"[cyan]Processing {len(chunks)} chunks...[/cyan]")
+
+        # No batch barrier: every chunk is scheduled at once and the rate limiter
+        # admits each one as soon as its model has RPM/TPM and concurrency headroom.
+        semaphore = asyncio.Semaphore(MAX_IN_FLIGHT)
+        tasks = [asyncio.ensure_future(_bounded(semaphore, process_chunk_async(get_llm_client(), chunk, prompt, models, mode, question))) for chunk in chunks]
+        try:
+            for done, future in enumerate(asyncio.as_completed(tasks), 1):
+                try:
+                    res = await future
+                    if not res:
+                        failed += 1
+                    elif "Nothing relevant" not in res:
+                        summaries.append(res)
+                        if on_text and not silent:
+                            preview_finding(done, len(chunks), res)
+                except Exception as e:
+                    failed += 1
+                    if not silent:
                         console.print(f"[red]Chunk processing failed:[/red] {e}")
+                if done % 5 == 0 and done < len(chunks) and not silent:
+                    console.print(f"[gray]{done}/{len(chunks)} chunks processed...[/gray]")
+        finally:
+            for task in tasks:
+                task.cancel()
 
-                # Delay between batches to respect rate limits (if not the last batch)
-                if i + batch_size < len(chunks):
-                    console.print("[gray]Pausing briefly for rate limits...[/gray]")
-                    time.sleep(2)
+        if failed and not silent:
+            warn_failed_chunks(failed, len(chunks))
 
         # REDUCE STEP
         if not summaries:
             return "No relevant information found in the provided context."
-            
-        console.print("[cyan]Synthesizing final answer...[/cyan]")
-        combined_summaries = "\n".join(summaries)
-        final_prompt = f"""
-        Here are the findings from analyzing different parts of the codebase:
-        
-        {combined_summaries}
-        
-        Based on these findings, answer the original user request:
-        {prompt}
-        """
-        result = generate_with_fallback(client, final_prompt, models)
+
+        result = await reduce_summaries_async(client, summaries, prompt, models, mode, safe_limit, silent=silent, on_text=on_text, schema=schema)
         return result or "No relevant information found in the provided context."
 
     # 2. Standard Generation
     full_prompt = f"{prompt}\n\nCONTEXT:\n{context}" if context else prompt
-    result = generate_with_fallback(client, full_prompt, models)
+    result = await generate_with_fallback_async(client, full_prompt, models, silent=silent, mode=mode, on_text=on_text, schema=schema)
     return result or "No relevant information found in the provived context."
 
-def generate_with_fallback(
+def generate_content(
+    prompt: str,
+    mode: str = "fast",
+    context: str | None = None,
+    stream: TextSink | None = None,
+    schema: dict[str, Any] | None = None,
+    question: str | None = None,
+) -> str:
+    """
+    Synchronous entry point used by the commands; runs the async engine.
+    `stream` receives the answer text as it arrives (called on the engine thread).
+    """
+    return run_sync(generate_content_async(prompt, mode=mode, context=context, on_text=stream, schema=schema, question=question))
+
+async def generate_from_records_async(
+    prompt: str,
+    records: Iterable[tuple[str, str]],
+    mode: str = "fast",
+    silent: bool = False,
+    schema: dict[str, Any] | None = None,
+    on_text: TextSink | None = None,
+    question: str | None = None,
+) -> str:
+    """
+    Streaming counterpart of generate_content_async over (path, content) records.
+    Small inputs still get a single call; large ones are packed into chunks as
+    records are read and each chunk is dispatched (and released) right away, so
+    memory stays bounded by the in-flight chunks rather than the whole codebase.
+    `on_text` and `question` work as in generate_content_async.
+    """
+    models = tier_models(mode)
+    safe_limit = safe_token_limit(mode)
+    budget = safe_limit - estimate_tokens(prompt)
+    records = iter(records)
+
+    # Read until we know whether the input fits one call. Reads run off the
+    # engine loop so in-flight requests keep progressing.
+    head: deque[tuple[str, str]] = deque()
+    used = used_chars = 0
+    while used <= budget:
+        record = await asyncio.to_thread(next, records, None)
+        if record is None:
+            context = "\n".join(f"--- FILE: {path} ---\n{content}\n" for path, content in head)
+            return await generate_content_async(prompt, mode=mode, context=context or None, silent=silent, on_text=on_text, schema=schema, question=question)
+        head.append(record)
+        used += estimate_record_tokens([record])
+        used_chars += len(record[0]) + len(record[1]) + 16
+
+    def remaining() -> Iterator[tuple[str, str]]:
+        while head:
+            yield head.popleft()
+        yield from records
+
+    if not silent:
+        console.print(f"[yellow]Large codebase detected. Streaming chunks to {models[0]}...[/yellow]")
+    # Chunk size in characters follows the token density of what was read so far
+    chunks = stream_records(remaining(), int(safe_limit * used_chars / max(1, used)))
+    semaphore = asyncio.Semaphore(MAX_IN_FLIGHT)
+    tasks: list[asyncio.Future] = []
+    summaries: list[str] = []
+    completed = [0]
+    failed = 0
+
+    def preview_done(task: asyncio.Future) -> None:
+        # The total grows while records are still being read
+        completed[0] += 1
+        if not task.cancelled() and task.exception() is None:
+            res = task.result()
+            if res and "Nothing relevant" not in res:
+                preview_finding(completed[0], len(tasks), res)
+
+    try:
+        while True:
+            # Backpressure: only read ahead while a request slot is free
+            await semaphore.acquire()
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                semaphore.release()
+                break
+            task = asyncio.ensure_future(process_chunk_async(get_llm_client(), chunk, prompt, models, mode, question))
+            task.add_done_callback(lambda _: semaphore.release())
+            if on_text and not silent:
+                task.add_done_callback(preview_done)
+            tasks.append(task)
+            del chunk
+            if len(tasks) % 5 == 0 and not silent:
+                console.print(f"[gray]{len(tasks)} chunks dispatched...[/gray]")
+
+        for res in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(res, Exception):
+                failed += 1
+                if not silent:
+                    console.print(f"[red]Chunk processing failed:[/red] {res}")
+            elif not res:
+                failed += 1
+            elif "Nothing relevant" not in res:
+                summaries.append(res)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    if failed and not silent:
+        warn_failed_chunks(failed, len(tasks))
+
+    if not summaries:
+        return "No relevant information found in the provided context."
+    result = await reduce_summaries_async(get_llm_client(), summaries, prompt, models, mode, safe_limit, silent=silent, on_text=on_text, schema=schema)
+    return result or "No relevant information found in the provided context."
+
+def generate_from_records(
+    prompt: str,
+    records: Iterable[tuple[str, str]],
+    mode: str = "fast",
+    schema: dict[str, Any] | None = None,
+    stream: TextSink | None = None,
+    question: str | None = None,
+) -> str:
+    """
+    Synchronous entry point for streaming (path, content) records through the engine.
+    `stream` receives the answer text as it arrives (called on the engine thread).
+    """
+    return run_sync(generate_from_records_async(prompt, records, mode=mode, schema=schema, on_text=stream, question=question))
+
+def synthesize(
+    prompt: str,
+    findings: list[str],
+    mode: str = "fast",
+    silent: bool = False,
+    stream: TextSink | None = None,
+) -> str:
+    """
+    Answers `prompt` from pre-computed findings (e.g. cached file summaries)
+    using the hierarchical reduce, skipping the map phase entirely.
+    """
+    if not findings:
+        return "No relevant information found in the provided context."
+    models = tier_models(mode)
+    safe_limit = safe_token_limit(mode)
+    result = run_sync(reduce_summaries_async(
+        get_llm_client(), findings, prompt, models, mode, safe_limit, silent=silent, on_text=stream
+    ))
+    return result or "No relevant information found in the provided context."
+
+async def _stream_text(client: Any, model_name: str, prompt: str, on_text: TextSink) -> tuple[str, Any]:
+    """
+    Streams one generation, passing each piece of text to `on_text`.
+    Returns the full text and the last response (which carries usage metadata).
+    """
+    parts: list[str] = []
+    last = None
+    async for piece in await client.aio.models.generate_content_stream(model=model_name, contents=prompt):
+        last = piece
+        text = piece.text if piece else None
+        if text:
+            parts.append(text)
+            on_text(text)
+    return "".join(parts), last
+
+async def generate_with_fallback_async(
     client: Any,
     prompt: str,
     models: list[str],
     silent: bool = False,
+    mode: str = "fast",
+    on_text: TextSink | None = None,
+    schema: dict[str, Any] | None = None,
+    wait_for_quota: bool = False,
 ) -> str | None:
     """
     Helper to try a list of models in order.
+    Answers are served from (and stored in) the on-disk response cache.
+    With `on_text`, the answer is generated with the SDK's streaming call and
+    passed to `on_text` piece by piece; a cached answer is passed in one piece.
+    With `schema`, models that support it are asked for JSON matching the
+    schema (the prompt should describe the format too, for the others).
+    With `wait_for_quota`, a model whose local quota stays saturated is tried
+    again on the next pass instead of given up on, so map chunks queue for
+    quota rather than being dropped.
     """
-    for model_name in models:
-        try:
-            if not silent:
-                console.print(f"[gray]Attempting with {model_name}...[/gray]")
-            response = client.models.generate_content(
-                model=model_name,
-                contents=prompt
-            )
-            if response and response.text:
-                return response.text
-        except Exception as e:
-            err_msg = str(e)
-            if "429" in err_msg or "RESOURCE_EXHAUSTED" in err_msg:
+    telemetry = get_telemetry()
+    started = time.monotonic()
+    prompt_tokens = estimate_tokens(prompt)
+    first_text: list[float] = []
+    streaming = on_text is not None and schema is None and hasattr(client.aio.models, "generate_content_stream")
+
+    def emit(text: str) -> None:
+        if not first_text:
+            first_text.append(time.monotonic())
+        on_text(text)
+
+    def record(outcome: str, model: str | None = None, depth: int | None = None, attempts: int = 0,
+               cache_status: str = "miss", response: Any = None) -> None:
+        actual_prompt, actual_output = usage_tokens(response)
+        # Real token counts calibrate future estimates
+        get_token_estimator().observe(prompt, actual_prompt)
+        telemetry.record(
+            kind="call",
+            mode=mode,
+            model=model,
+            est_tokens=prompt_tokens,
+            prompt_tokens=actual_prompt,
+            output_tokens=actual_output,
+            latency_ms=round((time.monotonic() - started) * 1000, 1),
+            # Earlier models tried (and failed) before this outcome
+            failed_attempts=attempts if outcome == "exhausted" else max(0, attempts - 1),
+            fallback_depth=depth,
+            cache=cache_status,
+            outcome=outcome,
+            **({"first_text_ms": round((first_text[0] - started) * 1000, 1)} if first_text else {}),
+        )
+
+    cache = get_response_cache()
+    cached = cache.lookup(models, prompt, mode, schema)
+    if cached:
+        if not silent:
+            console.print(f"[gray]Cache hit ({cached[0]}).[/gray]")
+        if on_text:
+            emit(cached[1])
+        record("ok", cached[0], models.index(cached[0]), cache_status="hit")
+        return cached[1]
+    cache_status = "miss" if cache.enabled else "bypass"
+
+    # Health and quotas are tracked per model, and per API key where keys have their own quota
+    health = get_health_registry()
+    keys = {m: get_provider().quota_key(client, m) for m in models}
+    call_timeout = getattr(client, "call_timeout", CALL_TIMEOUT_SECONDS)
+    attempts = 0
+    waited = 0.0
+    pending = list(models)
+    while pending:
+        # If every remaining model is cooling down (or being probed by another
+        # call), wait for the first one to recover when that is cheaper than giving up.
+        wait = health.seconds_until_available([keys[m] for m in pending])
+        if waited + wait > MAX_WAIT_SECONDS:
+            break
+        if wait > 0:
+            if wait >= 1 and not silent:
+                console.print(f"[yellow]All models cooling down. Waiting {wait:.0f}s...[/yellow]")
+            await asyncio.sleep(wait)
+            waited += wait
+
+        skipped = []
+        saturated = []
+        for model_name in pending:
+            depth = models.index(model_name)
+            key = keys[model_name]
+            if not health.allow(key):
+                skipped.append(model_name)
+                if not silent and not waited:
+                    console.print(f"[gray]Skipping {model_name} (cooling down).[/gray]")
+                continue
+
+            limiter = get_rate_limiter().for_model(key)
+            if not await limiter.acquire(prompt_tokens):
+                health.cancel_probe(key)
+                if wait_for_quota:
+                    saturated.append(model_name)
                 if not silent:
-                    console.print(f"[yellow]Quota/TPM hit for {model_name}. Trying next...[/yellow]")
+                    console.print(f"[yellow]Local rate limit saturated for {model_name}. Trying next...[/yellow]")
                 continue
-            else:
+
+            throttled = False
+            attempts += 1
+            sent_at = time.time()
+            try:
                 if not silent:
-                    console.print(f"[red]Error with {model_name}:[/red] {err_msg}")
+                    console.print(f"[gray]Attempting with {model_name}...[/gray]")
+                call_started = time.monotonic()
+                if streaming:
+                    if first_text and not silent:
+                        console.print(f"\n[yellow]Stream interrupted; restarting the answer with {model_name}...[/yellow]")
+                    text, response = await asyncio.wait_for(
+                        _stream_text(client, model_name, prompt, emit),
+                        timeout=call_timeout,
+                    )
+                else:
+                    options = get_provider().request_options(model_name, schema) if schema else {}
+                    response = await asyncio.wait_for(
+                        client.aio.models.generate_content(model=model_name, contents=prompt, **options),
+                        timeout=call_timeout,
+                    )
+                    text = response.text if response else None
+                    if text and on_text:
+                        emit(text)
+                limiter.observe_latency(time.monotonic() - call_started)
+                health.record_success(key)
+                if text:
+                    cache.put(model_name, prompt, mode, text, schema)
+                    record("ok", model_name, depth, attempts, cache_status, response)
+                    return text
+            except asyncio.CancelledError:
+                health.cancel_probe(key)
+                record("cancelled", model_name, depth, attempts, cache_status)
+                raise
+            except asyncio.TimeoutError:
+                health.record_failure(key, started=sent_at)
+                if not silent:
+                    console.print(f"[yellow]{model_name} timed out after {call_timeout:.0f}s. Trying next...[/yellow]")
                 continue
-                
+            except Exception as e:
+                err_msg = str(e)
+                if "429" in err_msg or "RESOURCE_EXHAUSTED" in err_msg:
+                    throttled = True
+                    cooldown = health.record_failure(key, throttled=True, retry_after=parse_retry_after(e), started=sent_at)
+                    if not silent:
+                        console.print(f"[yellow]Quota/TPM hit for {model_name} (cooling down {cooldown:.0f}s). Trying next...[/yellow]")
+                    continue
+                else:
+                    health.record_failure(key, started=sent_at)
+                    if not silent:
+                        console.print(f"[red]Error with {model_name}:[/red] {err_msg}")
+                    continue
+            finally:
+                limiter.release(prompt_tokens, throttled=throttled)
+
+        if len(skipped) == len(pending) and wait <= 0:
+            # Another thread took every probe in between; don't spin
+            break
+        pending = [m for m in pending if m in skipped or m in saturated]
+
     if not silent:
         console.print("[bold red]Critical:[/bold red] All models exhausted or failed.")
+    record("exhausted", attempts=attempts, cache_status=cache_status)
     return None
+
+def generate_with_fallback(
+    client: Any,
+    prompt: str,
+    models: list[str],
+    silent: bool = False,
+    mode: str = "fast",
+    on_text: TextSink | None = None,
+    schema: dict[str, Any] | None = None,
+) -> str | None:
+    """
+    Synchronous wrapper around generate_with_fallback_async.
+    """
+    return run_sync(generate_with_fallback_async(client, prompt, models, silent=silent, mode=mode, on_text=on_text, schema=schema))
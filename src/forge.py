@@ -6,10 +6,21 @@ from typing import Optional, Tuple
 from rich.console import Console
 from rich.prompt import Confirm
 from .core import generate_content
-from .utils import run_shell, check_gh_auth, parse_json_response
+from .utils import run_shell, check_gh_auth
+from .structured import generate_structured
 
 console = Console()
 
+PR_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "body": {"type": "string"},
+        "fixes_issue": {"type": ["integer", "null"]},
+    },
+    "required": ["title", "body"],
+}
+
 def get_open_issues() -> str:
     """Fetches a list of open issues from the repository."""
     try:
@@ -164,22 +175,12 @@ Example Output:
 }}
 """
 
-    result = generate_content(prompt, mode=mode)
-    if not result:
+    pr_data = generate_structured(prompt, PR_SCHEMA, mode=mode)
+    if pr_data is None:
+        console.print("[red]Failed to forge PR: no valid title and body from the model.[/red]")
         return
 
     try:
-        pr_data = parse_json_response(result)
-        if not pr_data or not isinstance(pr_data, dict):
-            # Fallback: Maybe the AI just gave us the text directly
-            clean_text = re.sub(r'```(?:[a-zA-Z]+)?', '', result).strip()
-            clean_text = clean_text.replace('```', '').strip()
-            lines = clean_text.split('\n', 1)
-            if len(lines) >= 2:
-                pr_data = {"title": lines[0].strip(), "body": lines[1].strip()}
-            else:
-                pr_data = {"title": lines[0].strip(), "body": clean_text[:100]}
-        
         title = pr_data.get("title", "AI PR Update")
         body = pr_data.get("body", "Automated PR created by Git-Alchemist.")
         
@@ -220,5 +221,4 @@ Example Output:
                  console.print(f"[yellow]Warning: Cleanup failed ({cleanup_error}). You may still be on the forge branch.[/yellow]")
             
     except Exception as e:
-        console.print(f"[red]Failed to forge PR:[/red] {e}")
-        console.print(f"[gray]Raw AI response:[/gray] {result}")
\ No newline at end of file
+        console.print(f"[red]Failed to forge PR:[/red] {e}")
\ No newline at end of file
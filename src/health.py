@@ -0,0 +1,218 @@
+import os
+import re
+import json
+import time
+import random
+import tempfile
+import threading
+from typing import Any
+from .utils import get_cache_dir
+
+# Circuit breaker tuning
+FAILURE_THRESHOLD = 3       # Consecutive non-quota errors before opening
+BASE_COOLDOWN = 10.0        # Seconds, doubled on every consecutive open
+MAX_COOLDOWN = 600.0
+PROBE_WAIT = 0.5            # Seconds other callers wait before rechecking a probing circuit
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_RETRY_PATTERNS = [
+    re.compile(r"retryDelay['\"]?\s*:\s*['\"]?(\d+(?:\.\d+)?)s"),
+    re.compile(r"retry in (\d+(?:\.\d+)?)\s*s", re.IGNORECASE),
+]
+
+def parse_retry_after(error: Exception) -> float | None:
+    """
+    Extracts the server's retry hint (seconds) from an API error, if any.
+    Looks at a Retry-After header first, then at RetryInfo details in the message.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        try:
+            value = headers.get("retry-after") or headers.get("Retry-After")
+            if value:
+                return float(value)
+        except (TypeError, ValueError):
+            pass
+
+    message = str(error)
+    for pattern in _RETRY_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            return float(match.group(1))
+    return None
+
+class ModelHealth:
+    def __init__(self, state: str = CLOSED, open_until: float = 0.0, opens: int = 0):
+        self.state = state
+        self.open_until = open_until  # Wall-clock time, so it survives restarts
+        self.opens = opens            # Consecutive opens, drives the backoff exponent
+        self.opened_at = 0.0          # Wall-clock time of the last trip
+        self.failures = 0
+        self.probing = False
+
+class HealthRegistry:
+    """
+    Per-model circuit breakers shared by every call in the process.
+
+    A quota error (429/RESOURCE_EXHAUSTED) opens a model's circuit right away
+    for the server's retry hint, or a jittered exponential backoff; other errors
+    open it after FAILURE_THRESHOLD in a row. Once the cooldown passes a single
+    half-open probe is let through; other callers wait for its outcome. Open
+    circuits are persisted so the next CLI invocation skips models that are
+    still cooling down.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(get_cache_dir(), "health.json")
+        self._models: dict[str, ModelHealth] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _get(self, model: str) -> ModelHealth:
+        if model not in self._models:
+            self._models[model] = ModelHealth()
+        return self._models[model]
+
+    def available(self, model: str) -> bool:
+        """
+        Non-mutating check: closed, or open with an expired cooldown.
+        """
+        with self._lock:
+            health = self._get(model)
+            if health.state == CLOSED:
+                return True
+            if health.state == HALF_OPEN:
+                return not health.probing
+            return time.time() >= health.open_until
+
+    def allow(self, model: str) -> bool:
+        """
+        Returns True if a request may be sent to `model` now.
+        An expired open circuit turns half-open and admits exactly one probe.
+        """
+        with self._lock:
+            health = self._get(model)
+            if health.state == CLOSED:
+                return True
+            if health.state == OPEN and time.time() >= health.open_until:
+                health.state = HALF_OPEN
+                health.probing = False
+            if health.state == HALF_OPEN and not health.probing:
+                health.probing = True
+                return True
+            return False
+
+    def cancel_probe(self, model: str) -> None:
+        """
+        Gives back a half-open probe slot that was granted but never used.
+        """
+        with self._lock:
+            self._get(model).probing = False
+
+    def seconds_until_available(self, models: list[str]) -> float:
+        """
+        Seconds until the first of `models` leaves its cooldown (0 if one is ready).
+        A circuit whose probe is in flight counts as PROBE_WAIT away, so callers
+        poll for the probe's outcome instead of giving up on the model.
+        """
+        with self._lock:
+            waits = []
+            for model in models:
+                health = self._get(model)
+                if health.state == CLOSED or (health.state == HALF_OPEN and not health.probing):
+                    return 0.0
+                if health.state == HALF_OPEN:
+                    waits.append(PROBE_WAIT)
+                else:
+                    waits.append(max(0.0, health.open_until - time.time()))
+            return min(waits) if waits else 0.0
+
+    def record_success(self, model: str) -> None:
+        with self._lock:
+            health = self._get(model)
+            was_open = health.state != CLOSED
+            self._models[model] = ModelHealth()
+        if was_open:
+            self._save()
+
+    def record_failure(
+        self,
+        model: str,
+        throttled: bool = False,
+        retry_after: float | None = None,
+        started: float | None = None,
+    ) -> float:
+        """
+        Records a failed call and returns the cooldown applied (0 if still closed).
+        Only a closed or half-open circuit trips, so the requests that were in
+        flight when it opened (sent before `started`, a wall-clock time) neither
+        reopen it nor escalate the backoff.
+        """
+        with self._lock:
+            health = self._get(model)
+            if health.state == OPEN or (started is not None and started < health.opened_at):
+                return max(0.0, health.open_until - time.time())
+            health.failures += 1
+            health.probing = False
+            if not throttled and health.state == CLOSED and health.failures < FAILURE_THRESHOLD:
+                return 0.0
+
+            backoff = min(MAX_COOLDOWN, BASE_COOLDOWN * (2 ** health.opens))
+            cooldown = random.uniform(backoff / 2, backoff)  # Jitter avoids synchronized probes
+            if retry_after is not None:
+                cooldown = max(retry_after, 0.0) + random.uniform(0, 1)
+            health.state = OPEN
+            health.opened_at = time.time()
+            health.open_until = health.opened_at + cooldown
+            health.opens += 1
+        self._save()
+        return cooldown
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return {
+                model: {"state": h.state, "open_until": h.open_until, "opens": h.opens}
+                for model, h in self._models.items()
+                if h.state != CLOSED
+            }
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for model, entry in data.items():
+            try:
+                open_until = float(entry.get("open_until", 0))
+                opens = int(entry.get("opens", 0))
+            except (AttributeError, TypeError, ValueError):
+                continue
+            # Recently expired cooldowns come back as open so the next call is a
+            # single probe; stale entries are forgotten.
+            if open_until > now - MAX_COOLDOWN:
+                self._models[model] = ModelHealth(OPEN, open_until, opens)
+
+    def _save(self) -> None:
+        data = self.snapshot()
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+_health_registry: HealthRegistry | None = None
+
+def get_health_registry() -> HealthRegistry:
+    global _health_registry
+    if _health_registry is None:
+        _health_registry = HealthRegistry()
+    return _health_registry
@@ -1,7 +1,16 @@
+import os
+import hashlib
+import threading
+from typing import Callable
 from rich.console import Console
 from rich.prompt import Prompt
-from .core import generate_content
-from .utils import get_codebase_context
+from .core import (
+    generate_content, synthesize, context_budget, estimate_tokens, estimate_record_tokens, safe_token_limit,
+)
+from .utils import collect_codebase_files, render_file_records
+from .retrieval import LexicalIndex, select_relevant_context
+from .summary_index import SummaryIndex, content_sha
+from .render import StreamPrinter
 
 console = Console()
 
@@ -21,23 +30,152 @@ Git-Alchemist Capabilities:
 - `alchemist scaffold "instruction"`: Generate a new project structure.
 - `alchemist fix "file" "instruction"`: Modify a file using AI.
 - `alchemist explain "context"`: Explain code or concepts.
+- `alchemist stats`: Show LLM latency, token and fallback statistics.
 
 If the user asks how to do something that one of these commands solves, recommend the specific command.
 If the user asks for coding help, debugging, or structuring advice, use the provided Codebase Context.
 """
 
-def run_helper(mode="fast"):
+# Summarize large codebases into the digest before the first question (spends API quota)
+DIGEST_ON_START = bool(os.getenv("ALCHEMIST_HELPER_DIGEST"))
+
+# Conversation turns carried into each prompt, and how much of each answer
+HISTORY_TURNS = 4
+HISTORY_ANSWER_CHARS = 1500
+
+DIGEST_PROMPT = """
+Task: Condense these per-file summaries into a technical digest of the codebase that will be used
+to answer follow-up questions without re-reading the code.
+Keep: architecture, module responsibilities, key classes/functions with signatures, data flow,
+configuration and external dependencies. Mention file paths.
+"""
+
+class HelperSession:
+    """
+    Codebase state shared across helper turns: the files (never a rendered
+    copy of them), their lexical index and, for large codebases, a digest that
+    later turns reuse; any file change invalidates it.
+    """
+
+    def __init__(self, mode: str = "fast"):
+        self.mode = mode
+        self.files: list[tuple[str, str]] = []
+        self.fingerprint: str | None = None
+        self.tokens = 0
+        self.index = LexicalIndex([])
+        self.summary_index: SummaryIndex | None = None
+        self.digest: str | None = None
+        self.history: list[tuple[str, str]] = []
+        self.ready = threading.Event()
+        self._lock = threading.RLock()
+
+    def warm_up(self, build_digest: bool = False) -> None:
+        """
+        Reads the codebase and builds the local lexical index and the stored
+        summary index. Only with `build_digest` does it also condense codebases
+        too large to send whole into the digest, which spends API quota before
+        the first question. Meant to run in a background thread while the user
+        types, so it prints nothing; turns reuse whatever is ready.
+        """
+        try:
+            self.refresh()
+            self.summary_index = SummaryIndex()
+        finally:
+            self.ready.set()  # Never leave the first turn waiting on a failed read
+        if build_digest and self.needs_digest():
+            try:
+                self.build_digest(silent=True)
+            except Exception:
+                pass  # The first turn that needs the digest will build (and report) it
+
+    def start_warm_up(self, build_digest: bool = False) -> threading.Thread:
+        thread = threading.Thread(target=self.warm_up, args=(build_digest,), name="alchemist-helper-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def needs_digest(self) -> bool:
+        return self.tokens > context_budget(ALCHEMIST_MANUAL, self.mode)
+
+    def refresh(self) -> bool:
+        """
+        Re-reads the codebase; returns True (and drops the digest) if it changed.
+        """
+        with self._lock:
+            files = collect_codebase_files(report=False)
+            fingerprint = hashlib.sha1(
+                "\n".join(f"{path}\0{content_sha(content)}" for path, content in files).encode("utf-8")
+            ).hexdigest()
+            changed = fingerprint != self.fingerprint
+            if changed:
+                self.files = files
+                self.fingerprint = fingerprint
+                self.tokens = estimate_record_tokens(files)
+                self.index = LexicalIndex(files)
+                self.digest = None
+            self.ready.set()
+            return changed
+
+    def build_digest(self, silent: bool = False) -> str:
+        """
+        Digest of the codebase from the per-file summary index, reduced further
+        if needed so that a turn over it stays a single call.
+        """
+        with self._lock:
+            if self.digest is None:
+                self.digest = self._build_digest(silent)
+            return self.digest
+
+    def _build_digest(self, silent: bool) -> str:
+        summary_index = self.summary_index or SummaryIndex()
+        summary_index.update(self.files, mode=self.mode, silent=silent)
+        findings = summary_index.findings(self.files)
+        digest = "\n\n".join(findings)
+        if estimate_tokens(digest) > safe_token_limit(self.mode) // 2:
+            digest = synthesize(DIGEST_PROMPT, findings, mode=self.mode, silent=silent)
+        return digest
+
+    def context_for(self, query: str, prompt: str, progress: Callable[[str], None] | None = None) -> str:
+        """
+        The whole codebase when it fits, else the most relevant files, else the
+        digest. `progress` receives a status line for each slow step.
+        """
+        if progress and not self.ready.is_set():
+            progress("[magenta]Reading the codebase...[/magenta]")
+        self.ready.wait()
+        if not self.files:
+            return "No code found in repository."
+        budget = context_budget(prompt, self.mode)
+        if self.tokens <= budget:
+            # Rendered per turn rather than kept next to the files
+            return render_file_records(self.files)
+        selection = select_relevant_context(self.index, query, budget)
+        if selection:
+            context, paths = selection
+            console.print(f"[gray]Focusing on {len(paths)} relevant files.[/gray]")
+            return context
+        if progress and self.digest is None:
+            progress("[magenta]Summarizing the codebase (first broad question only)...[/magenta]")
+        return "CODEBASE DIGEST (per-file summaries):\n" + self.build_digest()
+
+    def remember(self, query: str, answer: str) -> None:
+        self.history.append((query, answer[:HISTORY_ANSWER_CHARS]))
+        del self.history[:-HISTORY_TURNS]
+
+    def history_text(self) -> str:
+        return "\n".join(f"User: {q}\nHelper: {a}" for q, a in self.history)
+
+def run_helper(mode="fast", digest=False):
     """
     Interactive helper that reads codebase context and answers user queries.
+    With `digest` (or ALCHEMIST_HELPER_DIGEST), large codebases are summarized
+    in the background right away instead of on the first question that needs it.
     """
     console.print("[bold green]Alchemist Helper initialized.[/bold green]")
-    console.print("I have read your current directory context. How can I assist you today?")
+    console.print("I am reading your current directory context. How can I assist you today?")
     
-    # 1. Gather Context
-    with console.status("[cyan]Reading directory context...[/cyan]"):
-        code_context = get_codebase_context()
-        if not code_context:
-            code_context = "No code found in repository."
+    # 1. Gather Context in the background while the user types
+    session = HelperSession(mode)
+    session.start_warm_up(build_digest=digest or DIGEST_ON_START)
 
     # 2. Interactive Input
     while True:
@@ -50,10 +188,16 @@ def run_helper(mode="fast"):
         if not user_query.strip():
             continue
 
+        if session.history and session.refresh():
+            console.print("[gray]Files changed; refreshing context.[/gray]")
+
         # 3. Construct Prompt (Without huge context inside)
+        history = session.history_text()
+        if history:
+            history = f"CONVERSATION SO FAR:\n{history}\n"
         prompt = f"""
 {ALCHEMIST_MANUAL}
-
+{history}
 USER QUERY:
 {user_query}
 
@@ -63,10 +207,14 @@ Instructions:
 3. Be helpful, concise, and technical.
 """
 
-        # 4. Generate Answer (Pass context separately)
-        with console.status("[magenta]Thinking...[/magenta]"):
-            response = generate_content(prompt, mode=mode, context=code_context)
+        # 4. Whole codebase, the most relevant files, or the session digest
+        # 5. Generate Answer (Pass context separately), streamed as it arrives;
+        # the spinner stops with the first token
+        with console.status("[magenta]Thinking...[/magenta]") as status:
+            query_context = session.context_for(user_query, prompt, progress=status.update)
+            printer = StreamPrinter("\n[bold cyan]Alchemist Helper:[/bold cyan]", on_start=status.stop)
+            response = generate_content(prompt, mode=mode, context=query_context, stream=printer, question=user_query)
 
+        printer.finish(response)
         if response:
-            console.print("\n[bold cyan]Alchemist Helper:[/bold cyan]")
-            console.print(response)
\ No newline at end of file
+            session.remember(user_query, response)
@@ -1,25 +1,38 @@
-import json
 import tempfile
 import os
 from typing import Literal
 from rich.console import Console
-from .core import generate_content
-from .utils import run_shell, get_codebase_context
+from .utils import run_shell, stream_codebase_files
+from .scanner import resolve_revision
+from .structured import generate_structured
 
 console = Console()
 
-def create_issue(idea: str, mode: Literal["fast", "smart"] = "fast") -> None:
+# A single object is accepted too (see structured.coerce)
+ISSUES_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "title": {"type": "string"},
+            "body": {"type": "string"},
+            "label": {"type": "string"},
+            "easy": {"type": "boolean"},
+        },
+        "required": ["title", "body"],
+    },
+}
+
+def create_issue(idea: str, mode: Literal["fast", "smart"] = "fast", rev: str | None = None) -> None:
     """
     Translates an idea into technical GitHub issue(s).
     """
     # Heuristic: If the user wants to "find", "search", or "scan", we need context.
     needs_context = any(kw in idea.lower() for kw in ["find", "search", "scan", "identify", "check", "issues", "bugs", "todos", "fixme"])
+    if needs_context and rev and not resolve_revision(rev):
+        console.print(f"[red]Unknown revision: {rev}[/red]")
+        return
     
-    context = None
-    if needs_context:
-        console.print("[cyan]Scanning codebase context for analysis...[/cyan]")
-        context = get_codebase_context()
-
     console.print(f"[cyan]Drafting technical issue(s) for: {idea} ({mode} mode)...[/cyan]")
     
     prompt = f"""
@@ -51,21 +64,15 @@ Example Output:
 No markdown blocks.
 """
 
-    result = generate_content(prompt, mode=mode, context=context)
-    if not result: return
+    if needs_context:
+        # Files are read, chunked and sent as they stream in
+        console.print("[cyan]Scanning codebase context for analysis...[/cyan]")
+        issues = generate_structured(prompt, ISSUES_SCHEMA, mode=mode, records=stream_codebase_files(rev=rev))
+    else:
+        issues = generate_structured(prompt, ISSUES_SCHEMA, mode=mode)
+    if issues is None: return
 
     try:
-        clean_json = result.replace("```json", "").replace("```", "").strip()
-        
-        # Handle cases where the LLM might return a single object or a list
-        if clean_json.strip().startswith("{"):
-            issues = [json.loads(clean_json)]
-        else:
-            issues = json.loads(clean_json)
-            
-        if not isinstance(issues, list):
-            issues = [issues]
-            
         if not issues:
              console.print("[yellow]No issues generated.[/yellow]")
              return
@@ -125,4 +132,3 @@ No markdown blocks.
         
     except Exception as e:
         console.print(f"[red]Failed to create issue(s):[/red] {e}")
-        console.print(f"[gray]Raw Output:[/gray] {result}")
@@ -0,0 +1,252 @@
+import os
+import json
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator
+from .client import get_client_pool
+from .scheduler import RateLimiter, quota_key
+
+# User-specified Gemini model tiers
+GEMINI_TIERS = {
+    "smart": [
+        "gemini-3-flash",
+        "gemini-2.5-flash",
+        "gemini-2.5-flash-lite",
+    ],
+    "fast": [
+        "gemma-3-27b-it",
+        "gemma-3-12b-it",
+        "gemma-3-4b-it",
+    ],
+}
+
+# Safe token limits for Gemini
+GEMINI_TOKEN_LIMITS = {"fast": 12000, "smart": 230000}
+
+# Local OpenAI-compatible server (llama.cpp, vLLM, Ollama)
+LOCAL_URL = os.getenv("ALCHEMIST_LOCAL_URL", "http://localhost:8080/v1")
+LOCAL_CONTEXT_TOKENS = int(os.getenv("ALCHEMIST_LOCAL_CONTEXT", "8000"))
+# Requests the server processes in parallel (llama.cpp --parallel, Ollama OLLAMA_NUM_PARALLEL)
+LOCAL_CONCURRENCY = int(os.getenv("ALCHEMIST_LOCAL_CONCURRENCY", "4"))
+# No per-minute quota on our own hardware: only concurrency bounds a local model
+LOCAL_RATE_LIMIT = (1_000_000, 1_000_000_000)
+LOCAL_TIMEOUT_SECONDS = 600.0
+
+class Provider(ABC):
+    """
+    An LLM backend: how to build a client, which models make up each tier
+    (strongest first), and how many tokens and concurrent calls each takes.
+
+    Clients expose `aio.models.generate_content(model=, contents=)` (and
+    optionally `generate_content_stream`) returning objects with `.text` and
+    `.usage_metadata`, the shape of the google-genai SDK the engine is built on.
+    """
+
+    name = "base"
+    # Setting named in the error when client() returns None
+    required_setting = "an API key"
+
+    def __init__(self, tiers: dict[str, list[str]], token_limits: dict[str, int]):
+        self.tiers = tiers
+        self.token_limits = token_limits
+
+    def models(self, mode: str = "fast") -> list[str]:
+        return self.tiers["smart" if mode == "smart" else "fast"]
+
+    def token_limit(self, mode: str = "fast") -> int:
+        return self.token_limits["smart" if mode == "smart" else "fast"]
+
+    @abstractmethod
+    def client(self) -> Any | None:
+        """
+        The client for the next call, or None when the backend is not configured.
+        """
+
+    def request_options(self, model: str, schema: dict[str, Any]) -> dict[str, Any]:
+        """
+        Extra generate_content arguments that constrain `model` to JSON
+        matching `schema`, or none if the model cannot do structured output.
+        """
+        return {"config": {"response_mime_type": "application/json", "response_json_schema": schema}}
+
+    def quota_key(self, client: Any, model: str) -> str:
+        """
+        Name under which `model`'s rate limits and circuit breaker are tracked
+        for calls made through `client`.
+        """
+        return model
+
+    def configure(self, limiter: RateLimiter) -> None:
+        """
+        Registers this provider's quotas with the rate limiter.
+        """
+
+class GeminiProvider(Provider):
+    """
+    Google Gemini through the shared multi-key client pool. Quotas come from
+    scheduler.MODEL_RATE_LIMITS; with several keys, each key has its own
+    quota and circuit breaker per model.
+    """
+
+    name = "gemini"
+    required_setting = "GEMINI_API_KEY"
+
+    def __init__(self):
+        super().__init__(GEMINI_TIERS, GEMINI_TOKEN_LIMITS)
+
+    def client(self) -> Any | None:
+        return get_client_pool().next()
+
+    def request_options(self, model: str, schema: dict[str, Any]) -> dict[str, Any]:
+        # Gemma models reject JSON mode; the prompt alone has to do there
+        return super().request_options(model, schema) if model.startswith("gemini") else {}
+
+    def quota_key(self, client: Any, model: str) -> str:
+        # A 429 on one exhausted key must not bench the model for the others
+        pool = get_client_pool()
+        return quota_key(model, pool.label(client) if len(pool.keys()) > 1 else None)
+
+class OpenAICompatibleProvider(Provider):
+    """
+    Any server speaking the OpenAI chat completions API. Models are
+    ALCHEMIST_LOCAL_MODELS (fast tier) and ALCHEMIST_LOCAL_SMART_MODELS
+    (smart tier, defaults to the fast one), comma separated.
+    """
+
+    name = "local"
+    required_setting = "ALCHEMIST_LOCAL_URL"
+
+    def __init__(
+        self,
+        base_url: str = LOCAL_URL,
+        models: list[str] | None = None,
+        smart_models: list[str] | None = None,
+        context_tokens: int = LOCAL_CONTEXT_TOKENS,
+        concurrency: int = LOCAL_CONCURRENCY,
+        api_key: str | None = None,
+    ):
+        fast = models or _env_list("ALCHEMIST_LOCAL_MODELS") or ["local"]
+        smart = smart_models or _env_list("ALCHEMIST_LOCAL_SMART_MODELS") or fast
+        super().__init__({"fast": fast, "smart": smart}, {"fast": context_tokens, "smart": context_tokens})
+        self.concurrency = concurrency
+        self._client = OpenAICompatibleClient(base_url, api_key or os.getenv("ALCHEMIST_LOCAL_API_KEY"))
+
+    def client(self) -> Any | None:
+        return self._client
+
+    def configure(self, limiter: RateLimiter) -> None:
+        for model in set(self.tiers["fast"] + self.tiers["smart"]):
+            limiter.configure(model, *LOCAL_RATE_LIMIT, max_concurrency=self.concurrency)
+
+def _env_list(name: str) -> list[str]:
+    return [item.strip() for item in os.getenv(name, "").split(",") if item.strip()]
+
+class _Usage:
+    def __init__(self, usage: dict[str, Any] | None):
+        usage = usage or {}
+        self.prompt_token_count = usage.get("prompt_tokens")
+        self.candidates_token_count = usage.get("completion_tokens")
+
+class CompletionResponse:
+    """
+    A chat completion (or one streamed delta) in the SDK's response shape.
+    """
+
+    def __init__(self, text: str | None, usage: dict[str, Any] | None = None):
+        self.text = text
+        self.usage_metadata = _Usage(usage) if usage else None
+
+class _ChatModels:
+    def __init__(self, owner: "OpenAICompatibleClient"):
+        self.owner = owner
+
+    def _body(self, model: str, contents: Any, stream: bool, config: dict[str, Any] | None = None) -> dict[str, Any]:
+        body = {"model": model, "messages": [{"role": "user", "content": str(contents)}], "stream": stream}
+        if stream:
+            body["stream_options"] = {"include_usage": True}
+        schema = (config or {}).get("response_json_schema")
+        if schema:
+            body["response_format"] = {"type": "json_schema", "json_schema": {"name": "response", "schema": schema}}
+        return body
+
+    async def generate_content(self, model: str, contents: Any, config: dict[str, Any] | None = None, **kwargs: Any) -> CompletionResponse:
+        response = await self.owner.http().post("/chat/completions", json=self._body(model, contents, False, config))
+        response.raise_for_status()
+        data = response.json()
+        choices = data.get("choices") or [{}]
+        return CompletionResponse((choices[0].get("message") or {}).get("content"), data.get("usage"))
+
+    async def generate_content_stream(self, model: str, contents: Any, **kwargs: Any) -> AsyncIterator[CompletionResponse]:
+        return self._stream(model, contents)
+
+    async def _stream(self, model: str, contents: Any) -> AsyncIterator[CompletionResponse]:
+        async with self.owner.http().stream("POST", "/chat/completions", json=self._body(model, contents, True)) as response:
+            if response.is_error:
+                await response.aread()
+                response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                payload = line[5:].strip()
+                if payload == "[DONE]":
+                    break
+                data = json.loads(payload)
+                choices = data.get("choices") or [{}]
+                yield CompletionResponse((choices[0].get("delta") or {}).get("content"), data.get("usage"))
+
+class _ChatAio:
+    """
+    The client's `aio` namespace, as in the google-genai SDK.
+    """
+
+    def __init__(self, models: _ChatModels):
+        self.models = models
+
+class OpenAICompatibleClient:
+    """
+    Minimal async client for /chat/completions. The HTTP connection pool is
+    created on first use, on the engine loop that every call runs on.
+    """
+
+    def __init__(self, base_url: str, api_key: str | None = None):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self._http: Any = None
+        # Local models can take minutes per call; the engine uses this instead of its default
+        self.call_timeout = LOCAL_TIMEOUT_SECONDS
+        self.aio = _ChatAio(_ChatModels(self))
+
+    def http(self) -> Any:
+        if self._http is None:
+            import httpx
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            self._http = httpx.AsyncClient(base_url=self.base_url, headers=headers, timeout=LOCAL_TIMEOUT_SECONDS)
+        return self._http
+
+# Registry: provider name -> factory
+PROVIDERS = {
+    "gemini": GeminiProvider,
+    "local": OpenAICompatibleProvider,
+}
+
+_provider: Provider | None = None
+
+def get_provider() -> Provider:
+    """
+    Returns the process-wide provider, chosen by ALCHEMIST_PROVIDER (default gemini).
+    """
+    global _provider
+    if _provider is None:
+        _provider = make_provider(os.getenv("ALCHEMIST_PROVIDER", "gemini"))
+    return _provider
+
+def make_provider(name: str) -> Provider:
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown provider '{name}'. Choose from: {', '.join(PROVIDERS)}")
+    return PROVIDERS[name]()
+
+def set_provider(provider: Provider | str) -> None:
+    """
+    Replaces the process-wide provider (by instance or registry name).
+    """
+    global _provider
+    _provider = make_provider(provider) if isinstance(provider, str) else provider
@@ -0,0 +1,37 @@
+from typing import Callable
+from rich.console import Console
+
+console = Console()
+
+class StreamPrinter:
+    """
+    Prints an answer as it is generated, under a header that appears with the
+    first piece of text. Used as the `stream` callback of generate_content.
+    """
+
+    def __init__(self, header: str, footer: str | None = None, on_start: Callable[[], None] | None = None):
+        self.header = header
+        self.footer = footer
+        self.on_start = on_start
+        self.started = False
+
+    def __call__(self, text: str) -> None:
+        if not self.started:
+            self.started = True
+            if self.on_start:
+                self.on_start()
+            console.print(self.header)
+        console.print(text, end="", markup=False, highlight=False, soft_wrap=True)
+
+    def finish(self, result: str | None) -> None:
+        """
+        Closes the streamed answer, or prints `result` whole if nothing was
+        streamed (e.g. the "no relevant information" fallback).
+        """
+        if not self.started:
+            if not result:
+                return
+            self(result)
+        console.print()
+        if self.footer:
+            console.print(self.footer)
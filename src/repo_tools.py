@@ -4,9 +4,12 @@ from typing import Optional, Literal
 from rich.console import Console
 from .core import generate_content
 from .utils import run_shell, check_gh_auth
+from .structured import generate_structured
 
 console = Console()
 
+TOPICS_SCHEMA = {"type": "array", "items": {"type": "string"}, "maxItems": 5}
+
 def optimize_topics(user: Optional[str] = None, mode: Literal["fast", "smart"] = "fast") -> None:
     """
     Analyzes repositories and adds relevant topics using Gemini.
@@ -45,24 +48,20 @@ Return ONLY a JSON array of strings (max 5 total topics).
 Focus on technical keywords like 'python', 'api', 'automation', 'cli'.
 Output Example: ["python", "automation"]
 """
-        result = generate_content(prompt, mode=mode)
-        if not result: continue
-
-        try:
-            clean_json = result.replace("```json", "").replace("```", "").strip()
-            new_tags = json.loads(clean_json)
-            
-            # Filter out existing
-            to_add = [t for t in new_tags if t not in existing]
-            
-            if to_add:
-                tag_str = ",".join(to_add)
-                console.print(f"  [green]Adding tags:[/green] {tag_str}")
-                run_shell(f'gh repo edit {username}/{name} --add-topic "{tag_str}"')
-                count += 1
-                time.sleep(0.5)
-        except json.JSONDecodeError:
+        new_tags = generate_structured(prompt, TOPICS_SCHEMA, mode=mode)
+        if new_tags is None:
             console.print(f"  [red]Failed to parse topics for {name}[/red]")
+            continue
+
+        # Filter out existing
+        to_add = [t for t in new_tags if t not in existing]
+
+        if to_add:
+            tag_str = ",".join(to_add)
+            console.print(f"  [green]Adding tags:[/green] {tag_str}")
+            run_shell(f'gh repo edit {username}/{name} --add-topic "{tag_str}"')
+            count += 1
+            time.sleep(0.5)
 
     console.print(f"[cyan]Done! Optimized {count} repositories.[/cyan]")
 
@@ -0,0 +1,164 @@
+import re
+import math
+from collections import Counter
+from .chunker import split_text
+from .tokens import get_token_estimator
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+# Field weights: a query term in the path or a symbol name counts more than in the body
+PATH_WEIGHT = 3
+SYMBOL_WEIGHT = 2
+
+# Default number of files handed to the model
+TOP_K = 8
+
+# Minimum share of (non-stopword) question terms the selected files must cover
+# before we trust retrieval over a full map-reduce pass.
+MIN_COVERAGE = 0.6
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how",
+    "i", "in", "is", "it", "my", "of", "on", "or", "that", "the", "this", "to", "what", "when",
+    "where", "which", "who", "why", "with", "you", "your", "me", "we", "our", "there", "work",
+    "works", "code", "codebase", "file", "files", "use", "used", "using",
+}
+
+_IDENT_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+_SYMBOL_RE = re.compile(
+    r"^\s*(?:async\s+def|def|class|function|const|let|var|fn|func|struct|interface|type)\s+([A-Za-z_][A-Za-z0-9_]*)",
+    re.MULTILINE,
+)
+
+def tokenize(text: str) -> list[str]:
+    """
+    Lowercased terms with identifiers expanded: `get_codebase_context` and
+    `getCodebaseContext` both yield the whole identifier plus its parts.
+    """
+    terms = []
+    for ident in _IDENT_RE.findall(text):
+        lower = ident.lower()
+        parts = [p.lower() for piece in ident.split("_") for p in _CAMEL_RE.findall(piece)]
+        if lower not in STOPWORDS and len(lower) > 1:
+            terms.append(lower)
+        if len(parts) > 1:
+            terms.extend(p for p in parts if p not in STOPWORDS and len(p) > 1)
+    return terms
+
+def extract_symbols(content: str) -> list[str]:
+    return _SYMBOL_RE.findall(content)
+
+class LexicalIndex:
+    """
+    In-memory BM25 index over files, built locally with no network access.
+    Paths and symbol names are indexed as boosted fields.
+    """
+
+    def __init__(self, records: list[tuple[str, str]]):
+        self.records = records
+        self.term_freqs: list[Counter] = []
+        self.lengths: list[int] = []
+        self.doc_freq: Counter = Counter()
+        for path, content in records:
+            tf = Counter(tokenize(content))
+            for term in tokenize(path):
+                tf[term] += PATH_WEIGHT
+            for symbol in extract_symbols(content):
+                for term in tokenize(symbol):
+                    tf[term] += SYMBOL_WEIGHT
+            self.term_freqs.append(tf)
+            self.lengths.append(sum(tf.values()))
+            self.doc_freq.update(tf.keys())
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+    def idf(self, term: str) -> float:
+        n = len(self.records)
+        df = self.doc_freq.get(term, 0)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def score(self, doc: int, terms: list[str]) -> float:
+        tf = self.term_freqs[doc]
+        norm = K1 * (1 - B + B * self.lengths[doc] / self.avg_length) if self.avg_length else K1
+        total = 0.0
+        for term in terms:
+            freq = tf.get(term, 0)
+            if freq:
+                total += self.idf(term) * freq * (K1 + 1) / (freq + norm)
+        return total
+
+    def search(self, query: str, k: int = TOP_K) -> list[tuple[int, float]]:
+        """
+        Returns up to `k` (record index, score) pairs with a positive score, best first.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        scored = [(i, self.score(i, terms)) for i in range(len(self.records))]
+        scored = [(i, s) for i, s in scored if s > 0]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:k]
+
+    def coverage(self, query: str, docs: list[int]) -> float:
+        """
+        Share of query terms that occur in at least one of `docs`.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return 0.0
+        found = {t for t in terms for d in docs if t in self.term_freqs[d]}
+        return len(found) / len(terms)
+
+def best_piece(content: str, query: str, max_chars: int) -> str:
+    """
+    The piece of an oversized file that shares the most terms with the query.
+    """
+    terms = set(tokenize(query))
+    pieces = split_text(content, max_chars)
+    return max(pieces, key=lambda p: len(terms & set(tokenize(p))))
+
+def select_relevant_context(
+    index: LexicalIndex,
+    question: str,
+    budget_tokens: int,
+    k: int = TOP_K,
+) -> tuple[str, list[str]] | None:
+    """
+    Builds a `--- FILE: path ---` context from the top-k files for `question`
+    within `budget_tokens`, as counted by the per-class token estimator.
+    Returns (context, paths), or None when recall is uncertain (no hits, or
+    the hits miss too many of the question's terms) and the caller should
+    fall back to a full map-reduce pass.
+    """
+    hits = index.search(question, k)
+    if not hits or index.coverage(question, [i for i, _ in hits]) < MIN_COVERAGE:
+        return None
+
+    estimator = get_token_estimator()
+    parts: list[str] = []
+    paths: list[str] = []
+    used = 0
+    for doc, _ in hits:
+        path, content = index.records[doc]
+        header = f"--- FILE: {path} ---\n"
+        block = f"{header}{content}\n"
+        tokens = estimator.estimate(block)
+        remaining = budget_tokens - used
+        if tokens > remaining:
+            # Only trim a file when a meaningful slice of the budget is left
+            if remaining < budget_tokens // 4:
+                continue
+            max_chars = int((remaining - estimator.estimate(header) - 1) * estimator.chars_per_token(content))
+            block = f"{header}{best_piece(content, question, max_chars)}\n"
+            tokens = estimator.estimate(block)
+            if tokens > remaining:
+                continue
+        parts.append(block)
+        paths.append(path)
+        used += tokens + 1
+
+    if not parts:
+        return None
+    return "\n".join(parts), paths
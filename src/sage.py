@@ -1,21 +1,24 @@
 import os
 from rich.console import Console
-from .core import generate_content
-from .utils import run_shell, get_codebase_context
+from .core import generate_content, generate_from_records, synthesize, context_budget, estimate_record_tokens
+from .utils import run_shell, collect_codebase_files, stream_codebase_files
+from .retrieval import LexicalIndex, select_relevant_context
+from .summary_index import SummaryIndex
+from .render import StreamPrinter
 
 console = Console()
 
-def ask_sage(question: str, mode: str = "fast") -> None:
+def ask_sage(question: str, mode: str = "fast", use_index: bool = True, rev: str | None = None) -> None:
     """
-    Queries Gemini using the aggregated codebase as context.
+    Queries Gemini using the aggregated codebase (at `rev`, if given) as context.
     """
-    console.print("[cyan]The Sage is meditating on your codebase...[/cyan]")
+    console.print(f"[cyan]The Sage is meditating on your codebase{f' at {rev}' if rev else ''}...[/cyan]")
     
-    code_context = get_codebase_context()
-    
-    if not code_context:
-        console.print("[yellow]Warning: No source files found to analyze.[/yellow]")
-        code_context = "No code found in repository."
+    try:
+        files = collect_codebase_files(rev=rev)
+    except ValueError as e:
+        console.print(f"[red]{e}[/red]")
+        return
 
     # Prompt focuses only on the persona and the question
     prompt = f"""
@@ -31,10 +34,40 @@ Instructions:
 3. If the answer isn't in the code, say so.
 """
 
-    # Pass code_context separately to trigger smart chunking if needed
-    result = generate_content(prompt, mode=mode, context=code_context)
-    
-    if result:
-        console.print("\n[bold fuchsia]--- The Sage's Wisdom ---[/bold fuchsia]")
-        console.print(result)
-        console.print("[bold fuchsia]-----------------------[/bold fuchsia]")
\ No newline at end of file
+    budget = context_budget(prompt, mode)
+    records = files
+    result = None
+    printer = StreamPrinter(
+        "\n[bold fuchsia]--- The Sage's Wisdom ---[/bold fuchsia]",
+        "[bold fuchsia]-----------------------[/bold fuchsia]",
+    )
+
+    # Narrow questions only need a handful of files: answer from the most
+    # relevant ones in a single call, and fall back to map-reduce otherwise.
+    if estimate_record_tokens(files) > budget:
+        selection = select_relevant_context(LexicalIndex(files), question, budget)
+        if selection:
+            code_context, paths = selection
+            console.print(f"[gray]Focusing on {len(paths)} relevant files: {', '.join(paths)}[/gray]")
+            result = generate_content(prompt, mode=mode, context=code_context, stream=printer)
+        elif use_index:
+            # Broad questions: reduce over cached per-file summaries, only
+            # re-summarizing files whose content changed since the last run.
+            index = SummaryIndex()
+            # Other revisions share summaries by content hash but must not prune the working tree's
+            index.update(files, mode=mode, prune=rev is None)
+            result = synthesize(prompt, index.findings(files), mode=mode, stream=printer)
+        else:
+            # Full map-reduce: release the scan and stream the files through the
+            # chunker again, so only the in-flight chunks are held in memory
+            files = None
+            records = stream_codebase_files(report=False, rev=rev)
+
+    if result is None:
+        if not records:
+            console.print("[yellow]Warning: No source files found to analyze.[/yellow]")
+            result = generate_content(prompt, mode=mode, context="No code found in repository.", stream=printer)
+        else:
+            result = generate_from_records(prompt, records, mode=mode, stream=printer, question=question)
+
+    printer.finish(result)
@@ -0,0 +1,368 @@
+import os
+import re
+import mmap
+import fnmatch
+import subprocess
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Iterator
+from rich.console import Console
+
+console = Console()
+
+# Extensions to include
+EXTENSIONS = {'.py', '.md', '.ps1', '.sh', '.js', '.ts', '.c', '.cpp', '.h', '.yml', '.yaml', '.Dockerfile', '.json', '.toml'}
+# Folders to ignore (also applied to tracked files, e.g. committed node_modules)
+IGNORE_DIRS = {'__pycache__', '.git', 'venv', 'node_modules', '.tmp', 'docs', 'dist', 'build', '.gemini'}
+# Extra gitignore-style patterns, read from the scan root
+IGNORE_FILE = ".alchemistignore"
+
+# Generated or vendored files that are never worth sending to a model
+GENERATED_PATTERNS = ("*.min.js", "*.min.css", "*.bundle.js", "*.map", "package-lock.json", "*-lock.json", "*.lock.json")
+_GENERATED_RE = re.compile("|".join(fnmatch.translate(p) for p in GENERATED_PATTERNS))
+GENERATED_MARKERS = (b"@generated", b"DO NOT EDIT", b"Code generated by", b"autogenerated")
+
+# Caps, overridable via ALCHEMIST_MAX_FILE_KB / ALCHEMIST_MAX_TOTAL_MB
+MAX_FILE_BYTES = int(os.getenv("ALCHEMIST_MAX_FILE_KB", "512")) * 1024
+MAX_TOTAL_BYTES = int(os.getenv("ALCHEMIST_MAX_TOTAL_MB", "64")) * 1024 * 1024
+
+# Files at least this big are read through mmap instead of a buffered read
+MMAP_THRESHOLD = 256 * 1024
+# Bytes inspected for the binary / generated heuristics
+SNIFF_BYTES = 8192
+# Average line length above which a file is treated as minified
+MINIFIED_LINE_LENGTH = 300
+
+SCAN_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+# Files handed to a worker per task; amortizes pool overhead on small files
+READ_BATCH = 16
+
+class ScanReport:
+    """
+    What a scan read and what it skipped (reason -> paths).
+    """
+
+    def __init__(self):
+        self.files = 0
+        self.bytes = 0
+        self.skipped: dict[str, list[str]] = {}
+
+    def skip(self, path: str, reason: str) -> None:
+        self.skipped.setdefault(reason, []).append(path)
+
+    @property
+    def skipped_count(self) -> int:
+        return sum(len(paths) for paths in self.skipped.values())
+
+    def summary(self) -> str:
+        reasons = ", ".join(f"{len(paths)} {reason}" for reason, paths in sorted(self.skipped.items()))
+        return f"Read {self.files} files ({self.bytes / 1024:.0f} KB); skipped {self.skipped_count} ({reasons})."
+
+    def print(self) -> None:
+        if not self.skipped:
+            return
+        console.print(f"[gray]{self.summary()}[/gray]")
+        for reason, paths in sorted(self.skipped.items()):
+            if reason != "total cap":
+                shown = ", ".join(paths[:3]) + (f" +{len(paths) - 3} more" if len(paths) > 3 else "")
+                console.print(f"[gray]  {reason}: {shown}[/gray]")
+
+def load_ignore_patterns(root: str = ".") -> list[str]:
+    try:
+        with open(os.path.join(root, IGNORE_FILE), "r", encoding="utf-8") as f:
+            lines = [line.strip() for line in f]
+    except OSError:
+        return []
+    return [line for line in lines if line and not line.startswith("#")]
+
+def is_ignored(path: str, patterns: list[str]) -> bool:
+    """
+    gitignore-style matching for .alchemistignore: patterns containing a slash
+    match from the root, others match any path component; a trailing slash
+    matches directories only; a later `!pattern` re-includes.
+    """
+    parts = path.split("/")
+    ignored = False
+    for pattern in patterns:
+        negate = pattern.startswith("!")
+        pattern = pattern[1:] if negate else pattern
+        dir_only = pattern.endswith("/")
+        pattern = pattern.strip("/")
+        if "/" in pattern:
+            prefixes = ["/".join(parts[:i]) for i in range(1, len(parts) + (0 if dir_only else 1))]
+            matched = any(fnmatch.fnmatch(p, pattern) for p in prefixes)
+        else:
+            candidates = parts[:-1] if dir_only else parts
+            matched = any(fnmatch.fnmatch(p, pattern) for p in candidates)
+        if matched:
+            ignored = not negate
+    return ignored
+
+def _git_ls_files(root: str) -> list[str] | None:
+    """
+    Tracked plus untracked-but-not-ignored files, relative to `root`.
+    None when `root` is not inside a git work tree.
+    """
+    try:
+        result = subprocess.run(
+            ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+            cwd=root, capture_output=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    paths = result.stdout.decode("utf-8", errors="replace").split("\0")
+    # Deleted-but-still-indexed files show up in the list too
+    return [p for p in dict.fromkeys(paths) if p and os.path.isfile(os.path.join(root, p))]
+
+def _walk(root: str) -> list[str]:
+    paths = []
+    for dirpath, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if d not in IGNORE_DIRS)
+        rel = os.path.relpath(dirpath, root)
+        for name in sorted(files):
+            paths.append(name if rel == "." else f"{rel.replace(os.sep, '/')}/{name}")
+    return paths
+
+def select_paths(paths: list[str], patterns: list[str], report: ScanReport) -> list[str]:
+    """
+    Source files among repository-relative `paths`, as `./relative/path`.
+    """
+    selected = []
+    for path in paths:
+        parts = path.split("/")
+        if os.path.splitext(parts[-1])[1] not in EXTENSIONS:
+            continue
+        if any(part in IGNORE_DIRS for part in parts[:-1]):
+            continue
+        display = f"./{path}"
+        if patterns and is_ignored(path, patterns):
+            report.skip(display, "ignored")
+        elif _GENERATED_RE.match(parts[-1]):
+            report.skip(display, "generated")
+        else:
+            selected.append(display)
+    return selected
+
+def list_codebase_paths(root: str = ".", report: ScanReport | None = None) -> list[str]:
+    """
+    Candidate source files under `root` as `./relative/path`, from `git ls-files`
+    when available (honoring .gitignore) and a directory walk otherwise.
+    """
+    report = report if report is not None else ScanReport()
+    paths = _git_ls_files(root)
+    if paths is None:
+        paths = _walk(root)
+    return select_paths(paths, load_ignore_patterns(root), report)
+
+def _looks_minified(data: bytes) -> bool:
+    if len(data) < SNIFF_BYTES:
+        return False
+    return len(data) / (data.count(b"\n") + 1) > MINIFIED_LINE_LENGTH
+
+def read_source_file(path: str, max_bytes: int = MAX_FILE_BYTES) -> tuple[str | None, str | None]:
+    """
+    Returns (content, None), or (None, reason) for files that should be skipped.
+    Content is UTF-8 with newlines normalized, as a text-mode read would give.
+    """
+    try:
+        size = os.path.getsize(path)
+        if size > max_bytes:
+            return None, "too large"
+        with open(path, "rb") as f:
+            if size >= MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    # Only copy the mapping out once it is known to be text
+                    if b"\0" in mm[:SNIFF_BYTES]:
+                        return None, "binary"
+                    data = mm[:]
+            else:
+                data = f.read()
+    except (OSError, ValueError):
+        return None, "unreadable"
+    return decode_source(data)
+
+def decode_source(data: bytes) -> tuple[str | None, str | None]:
+    """
+    Applies the binary / generated / minified heuristics to raw file bytes.
+    """
+    head = data[:SNIFF_BYTES]
+    if b"\0" in head:
+        return None, "binary"
+    # Generators announce themselves in the first few lines
+    if any(marker in line for line in head.split(b"\n", 5)[:5] for marker in GENERATED_MARKERS):
+        return None, "generated"
+    if _looks_minified(data):
+        return None, "minified"
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError:
+        return None, "not utf-8"
+    return text.replace("\r\n", "\n").replace("\r", "\n"), None
+
+def iter_codebase_files(
+    root: str = ".",
+    report: ScanReport | None = None,
+    max_file_bytes: int = MAX_FILE_BYTES,
+    max_total_bytes: int = MAX_TOTAL_BYTES,
+    workers: int = SCAN_WORKERS,
+) -> Iterator[tuple[str, str]]:
+    """
+    Yields (path, content) in path order while a thread pool reads ahead in
+    batches of READ_BATCH files. Read-ahead is bounded to `workers` batches,
+    so memory stays proportional to the pool, not the codebase.
+    """
+    report = report if report is not None else ScanReport()
+    paths = list_codebase_paths(root, report)
+    workers = max(1, workers)
+
+    def read_batch(batch: list[str]) -> list[tuple[str | None, str | None]]:
+        return [read_source_file(p if root == "." else os.path.join(root, p[2:]), max_file_bytes) for p in batch]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending: deque[tuple[list[str], Future]] = deque()
+        queued = iter(paths)
+
+        def refill() -> None:
+            while len(pending) < workers:
+                batch = list(islice(queued, READ_BATCH))
+                if not batch:
+                    return
+                pending.append((batch, pool.submit(read_batch, batch)))
+
+        refill()
+        while pending:
+            batch, future = pending.popleft()
+            results = future.result()
+            refill()
+            for path, (content, reason) in zip(batch, results):
+                if reason:
+                    report.skip(path, reason)
+                elif report.bytes + len(content) > max_total_bytes:
+                    report.skip(path, "total cap")
+                else:
+                    report.files += 1
+                    report.bytes += len(content)
+                    yield path, content
+
+def resolve_revision(rev: str, root: str = ".") -> str | None:
+    """
+    Tree SHA of `rev` (any commit-ish), or None if it does not exist.
+    """
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--verify", "--quiet", f"{rev}^{{tree}}"],
+            cwd=root, capture_output=True, check=True, text=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+class GitObjectReader:
+    """
+    Reads objects through one persistent `git cat-file --batch` process, so a
+    whole revision is read without spawning a process or opening a file per blob.
+    """
+
+    def __init__(self, root: str = "."):
+        self.process = subprocess.Popen(
+            ["git", "cat-file", "--batch"],
+            cwd=root, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+
+    def read(self, sha: str) -> bytes | None:
+        """
+        Object contents, or None if the object is missing.
+        """
+        self.process.stdin.write(f"{sha}\n".encode("ascii"))
+        self.process.stdin.flush()
+        header = self.process.stdout.readline().split()
+        if len(header) != 3:
+            return None
+        data = self.process.stdout.read(int(header[2]))
+        self.process.stdout.read(1)  # Trailing newline
+        return data
+
+    def close(self) -> None:
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            self.process.wait()
+
+    def __enter__(self) -> "GitObjectReader":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+def _ls_tree(tree: str, root: str) -> list[tuple[str, int, str]]:
+    """
+    (blob sha, size, path) for every regular file in `tree`. Run from a
+    subdirectory, git limits the listing to it and prints paths relative to
+    it, which matches what `git ls-files` gives for the working tree.
+    """
+    result = subprocess.run(["git", "ls-tree", "-r", "-z", "--long", tree], cwd=root, capture_output=True, check=True)
+    entries = []
+    for line in result.stdout.decode("utf-8", errors="replace").split("\0"):
+        if not line:
+            continue
+        meta, path = line.split("\t", 1)
+        mode, kind, sha, size = meta.split()
+        # Skip submodules and symlinks
+        if kind == "blob" and mode != "120000":
+            entries.append((sha, int(size), path))
+    return entries
+
+def iter_revision_files(
+    rev: str,
+    root: str = ".",
+    report: ScanReport | None = None,
+    max_file_bytes: int = MAX_FILE_BYTES,
+    max_total_bytes: int = MAX_TOTAL_BYTES,
+) -> Iterator[tuple[str, str]]:
+    """
+    Like iter_codebase_files, but reads the files of `rev` from the object
+    database instead of the working tree. Sizes come from the tree listing, so
+    oversized blobs are skipped without being read. Raises ValueError for an
+    unknown revision.
+    """
+    report = report if report is not None else ScanReport()
+    tree = resolve_revision(rev, root)
+    if tree is None:
+        raise ValueError(f"Unknown revision: {rev}")
+
+    entries = _ls_tree(tree, root)
+    blobs = {path: (sha, size) for sha, size, path in entries}
+    with GitObjectReader(root) as reader:
+        patterns = load_ignore_patterns(root)
+        if IGNORE_FILE in blobs:
+            data = reader.read(blobs[IGNORE_FILE][0]) or b""
+            lines = [line.strip() for line in data.decode("utf-8", errors="replace").splitlines()]
+            patterns = [line for line in lines if line and not line.startswith("#")]
+
+        for path in select_paths([path for _, _, path in entries], patterns, report):
+            sha, size = blobs[path[2:]]
+            if size > max_file_bytes:
+                report.skip(path, "too large")
+                continue
+            data = reader.read(sha)
+            content, reason = decode_source(data) if data is not None else (None, "unreadable")
+            if reason:
+                report.skip(path, reason)
+            elif report.bytes + len(content) > max_total_bytes:
+                report.skip(path, "total cap")
+            else:
+                report.files += 1
+                report.bytes += len(content)
+                yield path, content
+
+def scan_codebase(root: str = ".", rev: str | None = None, **kwargs: Any) -> tuple[list[tuple[str, str]], ScanReport]:
+    """
+    All readable source files under `root` (at `rev`, if given), plus the
+    report of what was skipped.
+    """
+    report = ScanReport()
+    if rev:
+        records = list(iter_revision_files(rev, root, report, **kwargs))
+    else:
+        records = list(iter_codebase_files(root, report, **kwargs))
+    return records, report
@@ -0,0 +1,244 @@
+import os
+import math
+import time
+import asyncio
+import threading
+from collections import deque
+
+# Per-model quotas: (requests per minute, tokens per minute).
+# Conservative free-tier defaults; unknown models fall back to DEFAULT_RATE_LIMIT.
+MODEL_RATE_LIMITS = {
+    "gemma-3-27b-it": (30, 15000),
+    "gemma-3-12b-it": (30, 15000),
+    "gemma-3-4b-it": (30, 15000),
+    "gemini-3-flash": (10, 250000),
+    "gemini-2.5-flash": (10, 250000),
+    "gemini-2.5-flash-lite": (15, 250000),
+}
+DEFAULT_RATE_LIMIT = (10, 100000)
+
+# AIMD concurrency bounds (per model)
+INITIAL_CONCURRENCY = 4
+MAX_CONCURRENCY = 16
+
+# Longest we wait for a model's quota before falling back to the next model
+MAX_WAIT_SECONDS = 30.0
+
+# Latency assumed for a model before any call has completed, and the EWMA weight of new samples
+DEFAULT_LATENCY_SECONDS = 2.0
+LATENCY_ALPHA = 0.2
+
+# Recent latencies kept per model for percentiles, and how many are needed first
+LATENCY_SAMPLES = 100
+MIN_LATENCY_SAMPLES = 10
+
+# Hedged requests: at most this share of calls may get a duplicate
+HEDGE_BUDGET = float(os.getenv("ALCHEMIST_HEDGE_BUDGET", "0.1"))
+
+def quota_key(model: str, label: str | None = None) -> str:
+    """
+    Name under which a model's quota and health are tracked: the model itself,
+    or one per API key (`model@label`) when several keys have their own quotas.
+    """
+    return f"{model}@{label}" if label else model
+
+def base_model(key: str) -> str:
+    return key.split("@", 1)[0]
+
+class TokenBucket:
+    """
+    Classic token bucket refilled continuously at `per_minute / 60` per second.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay_for(self, amount: float) -> float:
+        """
+        Seconds until `amount` can be consumed without going into debt.
+        """
+        self._refill()
+        deficit = min(amount, self.capacity) - self.level
+        return max(0.0, deficit / self.rate) if self.rate else 0.0
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def drain(self) -> None:
+        self._refill()
+        self.level = min(self.level, 0.0)
+
+class ModelLimiter:
+    """
+    Tracks RPM/TPM budgets and in-flight work for one model.
+
+    Concurrency is AIMD-controlled: every success grows the limit by ~1 per
+    window, every RESOURCE_EXHAUSTED halves it. A request is also held back
+    while the tokens already in flight would exceed the model's TPM budget,
+    so large chunks run with fewer siblings than small ones.
+
+    Limiters live on the engine's event loop and are not thread-safe.
+    """
+
+    def __init__(self, rpm: int, tpm: int, max_concurrency: int = MAX_CONCURRENCY):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.tpm = tpm
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = float(min(INITIAL_CONCURRENCY, self.max_concurrency))
+        self.in_flight = 0
+        self.in_flight_tokens = 0
+        self.latency = DEFAULT_LATENCY_SECONDS
+        self.samples: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._changed = asyncio.Event()
+
+    def _has_capacity(self, tokens: int) -> bool:
+        if self.in_flight == 0:
+            return True
+        return self.in_flight < int(self.limit) and self.in_flight_tokens + tokens <= self.tpm
+
+    async def acquire(self, tokens: int, max_wait: float = MAX_WAIT_SECONDS) -> bool:
+        """
+        Waits until a slot and enough quota are available.
+        Returns False if that would take longer than `max_wait` seconds.
+        """
+        deadline = time.monotonic() + max_wait
+        while not self._has_capacity(tokens):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                return False
+
+        delay = max(self.requests.delay_for(1), self.tokens.delay_for(tokens))
+        if time.monotonic() + delay > deadline:
+            return False
+        self.requests.consume(1)
+        self.tokens.consume(tokens)
+        self.in_flight += 1
+        self.in_flight_tokens += tokens
+
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.release(tokens)
+                raise
+        return True
+
+    def release(self, tokens: int, throttled: bool = False) -> None:
+        self.in_flight = max(0, self.in_flight - 1)
+        self.in_flight_tokens = max(0, self.in_flight_tokens - tokens)
+        if throttled:
+            self.limit = max(1.0, self.limit / 2)
+            self.requests.drain()
+            self.tokens.drain()
+        else:
+            self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+        self._changed.set()
+
+    def observe_latency(self, seconds: float) -> None:
+        self.latency += LATENCY_ALPHA * (seconds - self.latency)
+        self.samples.append(seconds)
+
+    def latency_percentile(self, pct: float) -> float | None:
+        """
+        Nearest-rank percentile of recent call latencies, or None until enough
+        calls have completed.
+        """
+        if len(self.samples) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+    def score(self, tokens: int) -> float:
+        """
+        Share of new work this model should get: measured throughput (bounded
+        by its RPM) times the fraction of RPM/TPM quota it has left.
+        """
+        self.requests._refill()
+        self.tokens._refill()
+        headroom = min(
+            self.requests.level / self.requests.capacity if self.requests.capacity else 0.0,
+            (self.tokens.level - tokens) / self.tokens.capacity if self.tokens.capacity else 0.0,
+        )
+        throughput = min(self.limit / max(self.latency, 1e-3), self.requests.rate)
+        return throughput * max(0.0, headroom)
+
+class RateLimiter:
+    """
+    Process-wide registry of per-model limiters, keyed by quota_key() so that
+    every API key gets its own buckets for a model.
+    """
+
+    def __init__(self):
+        self._models: dict[str, ModelLimiter] = {}
+        self._limits: dict[str, tuple[int, int, int]] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, model: str, rpm: int, tpm: int, max_concurrency: int = MAX_CONCURRENCY) -> None:
+        """
+        Sets a model's quotas, overriding MODEL_RATE_LIMITS (e.g. for a local
+        provider, whose only limit is how many requests the server runs at once).
+        """
+        with self._lock:
+            if self._limits.get(model) != (rpm, tpm, max_concurrency):
+                self._limits[model] = (rpm, tpm, max_concurrency)
+                for key in [k for k in self._models if base_model(k) == model]:
+                    del self._models[key]
+
+    def for_model(self, key: str) -> ModelLimiter:
+        with self._lock:
+            if key not in self._models:
+                model = base_model(key)
+                if model in self._limits:
+                    rpm, tpm, max_concurrency = self._limits[model]
+                    self._models[key] = ModelLimiter(rpm, tpm, max_concurrency)
+                else:
+                    rpm, tpm = MODEL_RATE_LIMITS.get(model, DEFAULT_RATE_LIMIT)
+                    self._models[key] = ModelLimiter(rpm, tpm)
+            return self._models[key]
+
+class HedgeBudget:
+    """
+    Caps duplicate (hedged) requests to a share of all hedgeable calls.
+    """
+
+    def __init__(self, ratio: float = HEDGE_BUDGET):
+        self.ratio = ratio
+        self.calls = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+
+    def record_call(self) -> None:
+        with self._lock:
+            self.calls += 1
+
+    def try_hedge(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.ratio * self.calls:
+                return False
+            self.hedges += 1
+            return True
+
+_rate_limiter = RateLimiter()
+
+def get_rate_limiter() -> RateLimiter:
+    return _rate_limiter
+
+_hedge_budget = HedgeBudget()
+
+def get_hedge_budget() -> HedgeBudget:
+    return _hedge_budget
@@ -0,0 +1,113 @@
+import os
+import math
+import time
+from typing import Any, Optional
+from rich.console import Console
+from rich.table import Table
+from .telemetry import get_telemetry, write_prometheus_textfile
+
+console = Console()
+
+def percentile(values: list[float], pct: float) -> float | None:
+    """
+    Nearest-rank percentile; None for an empty list.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def summarize(records: list[dict[str, Any]]) -> dict[str, dict[str, dict[str, Any]]]:
+    """
+    Aggregates call records per model and per command.
+    """
+    models: dict[str, dict[str, Any]] = {}
+    commands: dict[str, dict[str, Any]] = {}
+    for r in records:
+        command = r.get("command") or "-"
+        cmd = commands.setdefault(command, {"calls": 0, "cache_hits": 0, "est_tokens": 0, "api_tokens": 0, "chunks": 0, "relevant_chunks": 0})
+        if r.get("kind") == "chunk":
+            cmd["chunks"] += 1
+            cmd["relevant_chunks"] += r.get("outcome") == "relevant"
+            continue
+        if r.get("kind") != "call":
+            continue
+
+        cmd["calls"] += 1
+        cmd["est_tokens"] += r.get("est_tokens") or 0
+        cmd["api_tokens"] += (r.get("prompt_tokens") or 0) + (r.get("output_tokens") or 0)
+        if r.get("cache") == "hit":
+            cmd["cache_hits"] += 1
+            continue
+
+        model = models.setdefault(r.get("model") or "(none)", {"calls": 0, "latencies": [], "fallbacks": 0, "failures": 0, "failed_attempts": 0})
+        model["calls"] += 1
+        model["failed_attempts"] += r.get("failed_attempts") or 0
+        if r.get("outcome") == "ok":
+            model["latencies"].append(r.get("latency_ms") or 0.0)
+            model["fallbacks"] += (r.get("fallback_depth") or 0) > 0
+        else:
+            model["failures"] += 1
+    return {"models": models, "commands": commands}
+
+def _ms(value: float | None) -> str:
+    return "-" if value is None else f"{value / 1000:.2f}s"
+
+def _pct(part: int, whole: int) -> str:
+    return f"{100 * part / whole:.0f}%" if whole else "-"
+
+def show_stats(days: Optional[float] = None) -> None:
+    """
+    Prints latency, token and fallback statistics from the local telemetry store.
+    """
+    since = time.time() - days * 86400 if days else 0.0
+    records = list(get_telemetry().iter_records(since=since))
+    if not records:
+        console.print("[yellow]No telemetry recorded yet. Run a few commands first.[/yellow]")
+        return
+
+    summary = summarize(records)
+
+    model_table = Table(title="LLM Calls by Model", border_style="blue")
+    model_table.add_column("Model", style="cyan")
+    model_table.add_column("Calls", justify="right")
+    model_table.add_column("p50", justify="right")
+    model_table.add_column("p95", justify="right")
+    model_table.add_column("Fallback", justify="right")
+    model_table.add_column("Failed", justify="right")
+    model_table.add_column("Failed Attempts", justify="right")
+    for name, m in sorted(summary["models"].items()):
+        model_table.add_row(
+            name,
+            str(m["calls"]),
+            _ms(percentile(m["latencies"], 50)),
+            _ms(percentile(m["latencies"], 95)),
+            _pct(m["fallbacks"], len(m["latencies"])),
+            _pct(m["failures"], m["calls"]),
+            str(m["failed_attempts"]),
+        )
+    console.print(model_table)
+
+    command_table = Table(title="Usage by Command", border_style="blue")
+    command_table.add_column("Command", style="cyan")
+    command_table.add_column("Calls", justify="right")
+    command_table.add_column("Cache Hits", justify="right")
+    command_table.add_column("Est. Tokens", justify="right")
+    command_table.add_column("API Tokens", justify="right")
+    command_table.add_column("Relevant Chunks", justify="right")
+    for name, c in sorted(summary["commands"].items()):
+        command_table.add_row(
+            name,
+            str(c["calls"]),
+            _pct(c["cache_hits"], c["calls"]),
+            f"{c['est_tokens']:,}",
+            f"{c['api_tokens']:,}",
+            f"{c['relevant_chunks']}/{c['chunks']}" if c["chunks"] else "-",
+        )
+    console.print(command_table)
+
+    prom_path = os.getenv("ALCHEMIST_PROM_TEXTFILE")
+    if prom_path:
+        write_prometheus_textfile(records, prom_path)
+        console.print(f"[gray]Prometheus metrics written to {prom_path}[/gray]")
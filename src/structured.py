@@ -0,0 +1,128 @@
+import json
+from typing import Any, Iterable
+from rich.console import Console
+from .core import generate_content, generate_from_records
+from .telemetry import get_telemetry
+from .utils import parse_json_response
+
+console = Console()
+
+# Characters of a rejected answer quoted back in the repair prompt
+REPAIR_QUOTE_CHARS = 6000
+
+REPAIR_PROMPT = """
+Your previous answer did not match the required JSON format.
+
+PROBLEMS:
+{errors}
+
+PREVIOUS ANSWER:
+'''
+{answer}
+'''
+
+Return the same content as ONLY a JSON value matching this JSON Schema:
+{schema}
+"""
+
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "boolean": bool,
+    "null": type(None),
+}
+
+def _is_type(value: Any, name: str) -> bool:
+    if name == "integer":
+        return isinstance(value, int) and not isinstance(value, bool)
+    if name == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return isinstance(value, _TYPES.get(name, object))
+
+def validate(value: Any, schema: dict[str, Any], where: str = "$") -> list[str]:
+    """
+    Checks `value` against the JSON Schema subset the commands use (type,
+    properties, required, items, maxItems, enum). Returns the problems found.
+    """
+    types = schema.get("type")
+    if types:
+        allowed = types if isinstance(types, list) else [types]
+        if not any(_is_type(value, t) for t in allowed):
+            return [f"{where}: expected {' or '.join(allowed)}, got {type(value).__name__}"]
+    if "enum" in schema and value not in schema["enum"]:
+        return [f"{where}: must be one of {schema['enum']}"]
+
+    errors = []
+    if isinstance(value, dict):
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{where}: missing required key '{key}'")
+        for key, sub in schema.get("properties", {}).items():
+            if key in value:
+                errors.extend(validate(value[key], sub, f"{where}.{key}"))
+    elif isinstance(value, list):
+        if "maxItems" in schema and len(value) > schema["maxItems"]:
+            errors.append(f"{where}: at most {schema['maxItems']} items allowed, got {len(value)}")
+        if "items" in schema:
+            for i, item in enumerate(value):
+                errors.extend(validate(item, schema["items"], f"{where}[{i}]"))
+    return errors
+
+def coerce(value: Any, schema: dict[str, Any]) -> Any:
+    """
+    Harmless normalization before validation: a lone object where a list of
+    objects is expected becomes a one-item list.
+    """
+    if schema.get("type") == "array" and isinstance(value, dict):
+        return [value]
+    return value
+
+def schema_instructions(schema: dict[str, Any]) -> str:
+    return f"\nThe response MUST be ONLY a JSON value matching this JSON Schema (no markdown, no prose):\n{json.dumps(schema)}\n"
+
+def _check(result: str | None, schema: dict[str, Any]) -> tuple[Any, list[str]]:
+    value = parse_json_response(result)
+    if value is None:
+        return None, ["the answer contains no parseable JSON object or array"]
+    value = coerce(value, schema)
+    return value, validate(value, schema)
+
+def generate_structured(
+    prompt: str,
+    schema: dict[str, Any],
+    mode: str = "fast",
+    context: str | None = None,
+    records: Iterable[tuple[str, str]] | None = None,
+) -> Any | None:
+    """
+    Generates a JSON value matching `schema`. The schema is sent to models
+    that support response schemas and spelled out in the prompt for the rest.
+    An answer that fails validation gets one targeted repair call (without
+    the context) quoting the problems. Returns None if that fails too.
+    """
+    prompt = prompt + schema_instructions(schema)
+    if records is not None:
+        result = generate_from_records(prompt, records, mode=mode, schema=schema)
+    else:
+        result = generate_content(prompt, mode=mode, context=context, schema=schema)
+    if not result or result.startswith("No relevant information"):
+        # Every model failed; a repair call would fail the same way
+        return None
+    value, errors = _check(result, schema)
+    if not errors:
+        get_telemetry().record(kind="structured", mode=mode, outcome="ok")
+        return value
+
+    console.print(f"[yellow]Response did not match the expected format ({errors[0]}). Asking for a repair...[/yellow]")
+    repair = REPAIR_PROMPT.format(
+        errors="\n".join(f"- {e}" for e in errors[:10]),
+        answer=(result or "")[:REPAIR_QUOTE_CHARS],
+        schema=json.dumps(schema),
+    )
+    value, errors = _check(generate_content(repair, mode=mode, schema=schema), schema)
+    get_telemetry().record(kind="structured", mode=mode, outcome="failed" if errors else "repaired")
+    if errors:
+        console.print(f"[red]Response still invalid after repair:[/red] {errors[0]}")
+        return None
+    return value
@@ -0,0 +1,220 @@
+import os
+import json
+import hashlib
+import tempfile
+from typing import Any, Optional
+from rich.console import Console
+from .core import (
+    generate_content_async, gather_bounded, run_sync, context_budget, estimate_tokens,
+)
+from .chunker import pack_records, parse_file_records
+from .utils import run_shell, get_cache_dir, collect_codebase_files, parse_json_response
+
+console = Console()
+
+INDEX_VERSION = 1
+
+BATCH_PROMPT = """
+Task: Summarize each file in the provided context for a codebase index.
+For every file give: its purpose, key classes/functions (with signatures), important dependencies and notable behaviour.
+Max 120 words per file.
+Return ONLY a JSON object mapping each file path, exactly as written after "--- FILE:", to its summary string.
+"""
+
+FILE_PROMPT = """
+Task: Summarize the file "{path}" (provided as context) for a codebase index.
+Give its purpose, key classes/functions (with signatures), important dependencies and notable behaviour.
+Max 200 words. Output only the summary.
+"""
+
+def content_sha(content: str) -> str:
+    """
+    SHA-1 (in git's blob format) of a file's content as the model sees it,
+    i.e. after newline normalization and compression. It only equals the
+    `git ls-tree` object id for LF files that compression leaves unchanged;
+    working-tree and `--rev` reads of the same content share the key either way.
+    """
+    data = content.encode("utf-8", errors="replace")
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+def repo_prefix() -> str:
+    """
+    The current directory relative to the repository root (`src/`), or "".
+    """
+    return run_shell("git rev-parse --show-prefix", suppress_errors=True) or ""
+
+def default_index_path() -> str:
+    """
+    `.git/alchemist/summaries.json` inside a repository, or a per-directory
+    file in the cache directory elsewhere.
+    """
+    git_dir = run_shell("git rev-parse --git-dir", suppress_errors=True)
+    if git_dir:
+        return os.path.join(os.path.abspath(git_dir), "alchemist", "summaries.json")
+    key = hashlib.sha1(os.path.abspath(".").encode("utf-8")).hexdigest()[:16]
+    return os.path.join(get_cache_dir(), "indexes", f"{key}.json")
+
+class SummaryIndex:
+    """
+    Persistent per-repository index of LLM file summaries keyed by content hash.
+    Only new or changed files are summarized; unchanged files reuse their entry.
+    Paths are stored relative to the repository root, so scans from different
+    subdirectories share entries.
+    """
+
+    def __init__(self, path: str | None = None, prefix: str | None = None):
+        self.path = path or default_index_path()
+        self.prefix = repo_prefix() if prefix is None else prefix
+        self.summaries: dict[str, str] = {}  # content sha -> summary
+        self.paths: dict[str, str] = {}      # repository path -> content sha
+        self._load()
+
+    def repo_path(self, path: str) -> str:
+        """
+        `./path` relative to the current directory as `./path` relative to the repository root.
+        """
+        return f"./{self.prefix}{path[2:] if path.startswith('./') else path}"
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != INDEX_VERSION:
+            return
+        self.summaries = dict(data.get("summaries", {}))
+        self.paths = dict(data.get("paths", {}))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"version": INDEX_VERSION, "paths": self.paths, "summaries": self.summaries}
+
+    def save(self, path: str | None = None) -> None:
+        target = path or self.path
+        os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(target)), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, target)
+
+    def import_from(self, path: str) -> int:
+        """
+        Merges summaries from an exported index; returns how many were new.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version: {data.get('version')}")
+        new = {sha: s for sha, s in data.get("summaries", {}).items() if sha not in self.summaries}
+        self.summaries.update(new)
+        for file_path, sha in data.get("paths", {}).items():
+            self.paths.setdefault(file_path, sha)
+        return len(new)
+
+    def stale(self, files: list[tuple[str, str]]) -> list[tuple[str, str, str]]:
+        """
+        (path, content, sha) for files without a summary for their current content.
+        """
+        pending = []
+        for path, content in files:
+            sha = content_sha(content)
+            if sha not in self.summaries:
+                pending.append((path, content, sha))
+        return pending
+
+    def update(self, files: list[tuple[str, str]], mode: str = "fast", silent: bool = False, prune: bool = True) -> int:
+        """
+        Summarizes new or changed files, prunes entries for deleted content
+        (unless `prune` is False) and saves the index. Returns the number of
+        files summarized.
+        """
+        pending = self.stale(files)
+        if pending:
+            if not silent:
+                console.print(f"[cyan]Indexing {len(pending)} new or changed files ({len(files) - len(pending)} cached)...[/cyan]")
+            run_sync(self._summarize_async(pending, mode, silent))
+
+        if prune:
+            # Only entries under the scanned directory can have been deleted
+            scope = self.repo_path("./")
+            self.paths = {path: sha for path, sha in self.paths.items() if not path.startswith(scope)}
+            self.paths.update((self.repo_path(path), content_sha(content)) for path, content in files)
+            live = set(self.paths.values())
+            self.summaries = {sha: s for sha, s in self.summaries.items() if sha in live}
+        self.save()
+        return sum(1 for _, _, sha in pending if sha in self.summaries)
+
+    async def _summarize_async(self, pending: list[tuple[str, str, str]], mode: str, silent: bool = False) -> None:
+        sha_by_path = {path: sha for path, _, sha in pending}
+        budget = context_budget(BATCH_PROMPT, mode)
+        small = [(path, content) for path, content, _ in pending if estimate_tokens(content) <= budget // 2]
+        large = [(path, content) for path, content, _ in pending if estimate_tokens(content) > budget // 2]
+
+        async def summarize_batch(batch: str) -> None:
+            result = parse_json_response(await generate_content_async(BATCH_PROMPT, mode=mode, context=batch, silent=silent))
+            if not isinstance(result, dict):
+                return
+            for path, _ in parse_file_records(batch):
+                summary = result.get(path)
+                if path in sha_by_path and isinstance(summary, str) and summary.strip():
+                    self.summaries[sha_by_path[path]] = summary.strip()
+
+        async def summarize_file(path: str, content: str) -> None:
+            summary = await generate_content_async(FILE_PROMPT.format(path=path), mode=mode, context=content, silent=silent)
+            if summary and not summary.startswith("No relevant information"):
+                self.summaries[sha_by_path[path]] = summary.strip()
+
+        # Small files are packed into shared calls; large ones get their own
+        # (map-reduced if needed) call.
+        small_chars = sum(len(path) + len(content) for path, content in small)
+        small_tokens = sum(estimate_tokens(path) + estimate_tokens(content) for path, content in small)
+        batches = pack_records(small, int(budget * small_chars / max(1, small_tokens))) if small else []
+        results = await gather_bounded(
+            [summarize_batch(batch) for batch in batches] + [summarize_file(p, c) for p, c in large]
+        )
+        failed = sum(1 for r in results if isinstance(r, Exception))
+        if failed and not silent:
+            console.print(f"[yellow]{failed} indexing calls failed; those files will be retried next run.[/yellow]")
+
+    def findings(self, files: list[tuple[str, str]]) -> list[str]:
+        """
+        Per-file summaries in repository order, ready for the reduce step.
+        """
+        findings = []
+        for path, content in files:
+            summary = self.summaries.get(content_sha(content))
+            if summary:
+                findings.append(f"FILE: {path}\n{summary}")
+        return findings
+
+def run_index_command(action: str, path: Optional[str] = None, mode: str = "fast") -> None:
+    """
+    `alchemist index build|status|export|import` entry point.
+    """
+    index = SummaryIndex()
+    if action == "build":
+        files = collect_codebase_files()
+        count = index.update(files, mode=mode)
+        console.print(f"[green]Index up to date: {len(index.summaries)} summaries ({count} new).[/green]")
+    elif action == "status":
+        files = collect_codebase_files()
+        pending = index.stale(files)
+        console.print(f"[cyan]Index:[/cyan] {index.path}")
+        console.print(f"  {len(files) - len(pending)}/{len(files)} files summarized, {len(pending)} new or changed.")
+    elif action == "export":
+        if not path:
+            console.print("[red]Export needs a destination file.[/red]")
+            return
+        index.save(path)
+        console.print(f"[green]Exported {len(index.summaries)} summaries to {path}[/green]")
+    elif action == "import":
+        if not path or not os.path.exists(path):
+            console.print(f"[red]Index file not found:[/red] {path}")
+            return
+        try:
+            added = index.import_from(path)
+        except (OSError, ValueError) as e:
+            console.print(f"[red]Failed to import index:[/red] {e}")
+            return
+        index.save()
+        console.print(f"[green]Imported {added} new summaries into {index.path}[/green]")
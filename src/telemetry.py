@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import atexit
+import threading
+from typing import Any, Iterator
+from .utils import get_cache_dir
+
+# Rotation: telemetry.jsonl -> telemetry.jsonl.1 -> ... -> telemetry.jsonl.N
+MAX_FILE_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 3
+FLUSH_EVERY = 20
+
+class TelemetryStore:
+    """
+    Append-only JSONL store of LLM call records with size-based rotation.
+    Records are buffered in memory and flushed every FLUSH_EVERY records and
+    at interpreter exit.
+    """
+
+    def __init__(self, path: str | None = None, enabled: bool = True):
+        self.path = path or os.path.join(get_cache_dir(), "telemetry.jsonl")
+        self.enabled = enabled
+        self.command: str | None = None
+        self._buffer: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def record(self, **fields: Any) -> None:
+        if not self.enabled:
+            return
+        entry = {"ts": round(time.time(), 3), "command": self.command, **fields}
+        with self._lock:
+            self._buffer.append(entry)
+            should_flush = len(self._buffer) >= FLUSH_EVERY
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._buffer = self._buffer, []
+        if not pending:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._rotate_if_needed()
+            with open(self.path, "a", encoding="utf-8") as f:
+                for entry in pending:
+                    f.write(json.dumps(entry) + "\n")
+        except OSError:
+            pass
+
+    def _rotate_if_needed(self) -> None:
+        try:
+            if os.path.getsize(self.path) < MAX_FILE_BYTES:
+                return
+        except OSError:
+            return
+        for i in range(BACKUP_COUNT - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def iter_records(self, since: float = 0.0) -> Iterator[dict[str, Any]]:
+        """
+        Yields stored records (oldest first), including rotated files.
+        """
+        self.flush()
+        paths = [f"{self.path}.{i}" for i in range(BACKUP_COUNT, 0, -1)] + [self.path]
+        for path in paths:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue
+                        if entry.get("ts", 0) >= since:
+                            yield entry
+            except OSError:
+                continue
+
+def write_prometheus_textfile(records: list[dict[str, Any]], path: str) -> None:
+    """
+    Writes aggregate call metrics in the Prometheus textfile-collector format.
+    """
+    calls: dict[tuple[str, str], int] = {}
+    latency: dict[str, list[float]] = {}
+    tokens: dict[tuple[str, str], int] = {}
+    for r in records:
+        if r.get("kind") != "call":
+            continue
+        model = r.get("model") or "none"
+        key = (model, r.get("outcome", "unknown"))
+        calls[key] = calls.get(key, 0) + 1
+        if r.get("cache") != "hit" and r.get("latency_ms") is not None:
+            sums = latency.setdefault(model, [0.0, 0])
+            sums[0] += r["latency_ms"] / 1000.0
+            sums[1] += 1
+        for kind in ("prompt_tokens", "output_tokens"):
+            if r.get(kind):
+                tkey = (model, kind.replace("_tokens", ""))
+                tokens[tkey] = tokens.get(tkey, 0) + r[kind]
+
+    lines = [
+        "# HELP alchemist_llm_calls_total LLM calls by model and outcome.",
+        "# TYPE alchemist_llm_calls_total counter",
+    ]
+    lines += [f'alchemist_llm_calls_total{{model="{m}",outcome="{o}"}} {n}' for (m, o), n in sorted(calls.items())]
+    lines += [
+        "# HELP alchemist_llm_latency_seconds Latency of uncached LLM calls.",
+        "# TYPE alchemist_llm_latency_seconds summary",
+    ]
+    for model, (total, count) in sorted(latency.items()):
+        lines.append(f'alchemist_llm_latency_seconds_sum{{model="{model}"}} {total:.3f}')
+        lines.append(f'alchemist_llm_latency_seconds_count{{model="{model}"}} {count}')
+    lines += [
+        "# HELP alchemist_llm_tokens_total Tokens reported by the API.",
+        "# TYPE alchemist_llm_tokens_total counter",
+    ]
+    lines += [f'alchemist_llm_tokens_total{{model="{m}",kind="{k}"}} {n}' for (m, k), n in sorted(tokens.items())]
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp, path)
+
+def usage_tokens(response: Any) -> tuple[int | None, int | None]:
+    """
+    Returns (prompt_tokens, output_tokens) from a response's usage metadata.
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return None, None
+    return getattr(usage, "prompt_token_count", None), getattr(usage, "candidates_token_count", None)
+
+_telemetry: TelemetryStore | None = None
+
+def get_telemetry() -> TelemetryStore:
+    """
+    Returns the process-wide store. Disable with ALCHEMIST_NO_TELEMETRY=1.
+    """
+    global _telemetry
+    if _telemetry is None:
+        _telemetry = TelemetryStore(enabled=not os.getenv("ALCHEMIST_NO_TELEMETRY"))
+        atexit.register(_telemetry.flush)
+    return _telemetry
@@ -0,0 +1,236 @@
+import os
+import re
+import json
+import atexit
+import tempfile
+import threading
+from collections import OrderedDict
+from .utils import get_cache_dir
+
+# Characters per token by content class, measured offline on the Gemini/Gemma
+# tokenizer. Prose stays at the historic 4.0; dense code, JSON and non-Latin
+# scripts pack far fewer characters into a token.
+CHARS_PER_TOKEN_BY_CLASS = {
+    "prose": 4.0,
+    "markdown": 3.7,
+    "python": 3.5,
+    "javascript": 3.2,
+    "c": 3.1,
+    "shell": 3.3,
+    "code": 3.3,      # Code of unknown language
+    "config": 3.4,
+    "json": 2.9,
+    "cjk": 1.2,       # Chinese, Japanese and Korean characters
+    "unicode": 2.5,   # Other non-ASCII characters (accents, Cyrillic, emoji...)
+}
+
+LANGUAGE_BY_EXTENSION = {
+    ".py": "python",
+    ".js": "javascript", ".ts": "javascript",
+    ".c": "c", ".cpp": "c", ".h": "c",
+    ".sh": "shell", ".ps1": "shell", ".Dockerfile": "shell",
+    ".yml": "config", ".yaml": "config", ".toml": "config",
+    ".json": "json",
+    ".md": "markdown",
+}
+
+# Sniffing looks at this many leading characters of a text or file record
+SNIFF_CHARS = 512
+# Share of code punctuation above which text is treated as code
+CODE_DENSITY = 0.03
+
+# Learned corrections: EWMA weight, bounds, and the smallest prompt worth learning from
+CALIBRATION_ALPHA = 0.2
+CALIBRATION_BOUNDS = (0.5, 2.0)
+MIN_CALIBRATION_TOKENS = 50
+# A prompt only calibrates its dominant class when that class is at least this share of it
+DOMINANT_SHARE = 0.6
+
+# Memoized estimates (by content hash); each entry is a few small numbers
+MEMO_SIZE = 4096
+
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]")
+RECORD_PREFIX = "--- FILE: "
+_RECORD_RE = re.compile(r"--- FILE: (.+?)(?: \(part \d+/\d+\))? ---$")
+_CODE_CHARS_RE = re.compile(r"[{}()\[\];=<>:]")
+_CODE_LINE_RE = re.compile(r"^\s*(def|class|import|from|function|const|let|var|#include|return)\b", re.MULTILINE)
+_MARKDOWN_LINE_RE = re.compile(r"^(#{1,6} |```|[-*] |\d+\. )", re.MULTILINE)
+
+def _extension(path: str) -> str:
+    name = os.path.basename(path)
+    return ".Dockerfile" if name == "Dockerfile" else os.path.splitext(name)[1]
+
+def classify(text: str, path: str | None = None) -> str:
+    """
+    Content class of `text`: the file's language when it looks like code,
+    otherwise json, markdown or prose from its leading characters.
+    """
+    language = LANGUAGE_BY_EXTENSION.get(_extension(path)) if path else None
+    if language in ("json", "markdown"):
+        return language
+    sample = text[:SNIFF_CHARS]
+    if not sample.strip():
+        return "prose"
+    density = len(_CODE_CHARS_RE.findall(sample)) / len(sample)
+    if language:
+        # Comment- or docstring-heavy files tokenize like prose
+        return language if density >= CODE_DENSITY or _CODE_LINE_RE.search(sample) else "prose"
+    stripped = sample.lstrip()
+    if stripped[:1] in ("{", "[") and density >= 0.1:
+        return "json"
+    if density >= CODE_DENSITY and _CODE_LINE_RE.search(sample):
+        return "code"
+    if _MARKDOWN_LINE_RE.search(sample):
+        return "markdown"
+    return "prose"
+
+def _segments(text: str) -> list[tuple[str | None, int, int]]:
+    """
+    (path, start, end) per `--- FILE:` record, or one span for plain text.
+    Headers are found with str.find, which is much faster than a multiline regex.
+    """
+    starts: list[tuple[int, str]] = []
+    pos = 0
+    while True:
+        pos = text.find(RECORD_PREFIX, pos)
+        if pos < 0:
+            break
+        eol = text.find("\n", pos)
+        eol = len(text) if eol < 0 else eol
+        if pos == 0 or text[pos - 1] == "\n":
+            match = _RECORD_RE.match(text, pos, eol)
+            if match:
+                starts.append((pos, match.group(1)))
+        pos = eol
+    if not starts:
+        return [(None, 0, len(text))]
+    segments: list[tuple[str | None, int, int]] = []
+    if starts[0][0] > 0:
+        segments.append((None, 0, starts[0][0]))
+    for i, (start, path) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else len(text)
+        segments.append((path, start, end))
+    return segments
+
+def _breakdown(text: str) -> dict[str, float]:
+    """
+    Uncalibrated tokens per content class. Non-ASCII characters are counted
+    apart from the text's class, since they tokenize alike in any file.
+    """
+    tokens: dict[str, float] = {}
+    plain = text.isascii()
+    for path, start, end in _segments(text):
+        cls = classify(text[start:start + SNIFF_CHARS], path)
+        size = end - start
+        if not plain:
+            segment = text[start:end]
+            if not segment.isascii():
+                ascii_size = len(segment.encode("ascii", "ignore"))
+                cjk = size - len(_CJK_RE.sub("", segment))
+                tokens["cjk"] = tokens.get("cjk", 0.0) + cjk / CHARS_PER_TOKEN_BY_CLASS["cjk"]
+                tokens["unicode"] = tokens.get("unicode", 0.0) + (size - ascii_size - cjk) / CHARS_PER_TOKEN_BY_CLASS["unicode"]
+                size = ascii_size
+        tokens[cls] = tokens.get(cls, 0.0) + size / CHARS_PER_TOKEN_BY_CLASS[cls]
+    return tokens
+
+class TokenEstimator:
+    """
+    Offline token estimates per content class, memoized by content hash and
+    corrected by factors learned from the usage metadata of real responses.
+    Corrections persist across runs in the cache directory.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(get_cache_dir(), "token_calibration.json")
+        self.factors: dict[str, float] = {}
+        self._memo: OrderedDict[tuple[int, int], dict[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        low, high = CALIBRATION_BOUNDS
+        self.factors = {
+            cls: min(high, max(low, float(factor)))
+            for cls, factor in data.get("factors", {}).items()
+            if cls in CHARS_PER_TOKEN_BY_CLASS
+        }
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            factors = dict(self.factors)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"factors": factors}, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    def breakdown(self, text: str) -> dict[str, float]:
+        key = (hash(text), len(text))
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is not None:
+                self._memo.move_to_end(key)
+                return cached
+        tokens = _breakdown(text)
+        with self._lock:
+            self._memo[key] = tokens
+            if len(self._memo) > MEMO_SIZE:
+                self._memo.popitem(last=False)
+        return tokens
+
+    def _tokens(self, text: str) -> float:
+        return sum(t * self.factors.get(cls, 1.0) for cls, t in self.breakdown(text).items())
+
+    def estimate(self, text: str) -> int:
+        if not text:
+            return 0
+        return int(self._tokens(text))
+
+    def chars_per_token(self, text: str) -> float:
+        """
+        Effective characters per token of `text` (4.0 for empty text).
+        """
+        tokens = self._tokens(text) if text else 0.0
+        return len(text) / tokens if tokens else CHARS_PER_TOKEN_BY_CLASS["prose"]
+
+    def observe(self, text: str, actual_tokens: int | None) -> None:
+        """
+        Learns from a prompt's actual token count: the dominant class's
+        correction factor moves toward actual / uncorrected estimate.
+        """
+        if not text or not actual_tokens:
+            return
+        tokens = self.breakdown(text)
+        raw = sum(tokens.values())
+        if raw < MIN_CALIBRATION_TOKENS:
+            return
+        cls, dominant = max(tokens.items(), key=lambda kv: kv[1])
+        if dominant / raw < DOMINANT_SHARE:
+            return
+        low, high = CALIBRATION_BOUNDS
+        target = min(high, max(low, actual_tokens / raw))
+        with self._lock:
+            factor = self.factors.get(cls, 1.0)
+            self.factors[cls] = factor + CALIBRATION_ALPHA * (target - factor)
+            self._dirty = True
+
+_token_estimator: TokenEstimator | None = None
+
+def get_token_estimator() -> TokenEstimator:
+    global _token_estimator
+    if _token_estimator is None:
+        _token_estimator = TokenEstimator()
+        atexit.register(_token_estimator.save)
+    return _token_estimator
@@ -1,10 +1,13 @@
 import os
+import ast
 import shutil
 import subprocess
 import sys
 import json
 import re
-from typing import Any 
+from typing import Any, Iterator
+from .scanner import ScanReport, iter_codebase_files, iter_revision_files
+from .compress import CompressionReport, compress_records
 
 def run_shell(command: str, suppress_errors: bool = False, **kwargs: Any) -> str | None:
     """
@@ -34,62 +37,123 @@ def run_shell(command: str, suppress_errors: bool = False, **kwargs: Any) -> str
             print(f"[Shell Exception] {e}", file=sys.stderr)
         return None
 
+# An opener only starts a span if a JSON (or Python-literal) value can follow it,
+# so brackets in prose such as "[a-z" or "{build" are skipped
+_JSON_OPEN_RE = re.compile(r"""\{(?=\s*["'}])|\[(?=\s*[-\d"'{\[\]tfnTFN])""")
+# Inside a span: strings (double- or single-quoted) and brackets; everything else is skipped
+_JSON_TOKEN_RE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|\'[^\'\\\n]*(?:\\.[^\'\\\n]*)*\'|[\[\]{}]')
+_JSON_CLOSERS = {"}": "{", "]": "["}
+_JSON_DECODER = json.JSONDecoder()
+
+def iter_json_spans(text: str) -> Iterator[str]:
+    """
+    Yields balanced top-level {...} / [...] spans of `text` in order, ignoring
+    brackets inside strings. A single left-to-right pass: a span with a
+    mismatched closer is abandoned where it broke, and a span that never
+    closes (truncated output) ends the scan without yielding its inner values.
+    """
+    pos = 0
+    while True:
+        opener = _JSON_OPEN_RE.search(text, pos)
+        if not opener:
+            return
+        start, pos = opener.start(), opener.end()
+        stack = [opener.group()]
+        while stack:
+            match = _JSON_TOKEN_RE.search(text, pos)
+            if not match:
+                return
+            pos = match.end()
+            token = match.group()
+            if token in ("{", "["):
+                stack.append(token)
+            elif token in _JSON_CLOSERS:
+                if stack.pop() != _JSON_CLOSERS[token]:
+                    break
+                if not stack:
+                    yield text[start:pos]
+
 def parse_json_response(result: str | None) -> Any | None:
     """
-    Attempts to parse a JSON object from a string, handling common issues like
-    markdown code blocks and partial JSON.
+    Parses the first JSON object or array in a model response, wherever it
+    sits (markdown code blocks, surrounding prose). Python-style literals
+    (single quotes, True/None) are accepted as a fallback.
     """
     if not result:
         return None
 
-    # 1. Strip markdown blocks
-    # Handles ```json ... ```, ``` ... ```, and even just ``` at the start/end
-    clean_result = re.sub(r'```(?:json)?', '', result).strip()
-    clean_result = clean_result.replace('```', '').strip()
+    # Fast path: well-formed JSON right at the first bracket parses in C
+    opener = _JSON_OPEN_RE.search(result)
+    if opener:
+        try:
+            return _JSON_DECODER.raw_decode(result, opener.start())[0]
+        except json.JSONDecodeError:
+            pass
 
-    # 2. Try direct load
-    try:
-        return json.loads(clean_result)
-    except json.JSONDecodeError:
-        # 3. Last ditch effort: Try to find everything between first { and last }
-        # or first [ and last ]
+    for span in iter_json_spans(result):
         try:
-            match = re.search(r'(\{.*\}|\[.*\])', clean_result, re.DOTALL)
-            if match:
-                return json.loads(match.group(1))
-        except (json.JSONDecodeError, AttributeError):
+            return json.loads(span)
+        except json.JSONDecodeError:
             pass
-        
-        # 4. If all fails, print error and return None
-        print(f"[JSON Parse Error] Failed to parse: {str(result)[:100]}...", file=sys.stderr)
-        return None
+        try:
+            value = ast.literal_eval(span)
+        except (ValueError, SyntaxError, MemoryError, RecursionError):
+            continue
+        if isinstance(value, (dict, list)):
+            return value
+
+    print(f"[JSON Parse Error] Failed to parse: {str(result)[:100]}...", file=sys.stderr)
+    return None
 
-def get_codebase_context() -> str:
+def stream_codebase_files(report: bool = True, rev: str | None = None, compress: bool = True) -> Iterator[tuple[str, str]]:
+    """
+    Yields (path, content) for every source file as it is read, so callers
+    never need the whole codebase in memory. With `rev`, files are read from
+    that commit in the git object database instead of the working tree.
+    Binary, generated, minified and oversized files are skipped (see
+    scanner.py) and the rest go through the compression rules (see
+    compress.py); `report` prints what was left out and saved once the scan
+    is done.
+    """
+    scan_report = ScanReport()
+    compression_report = CompressionReport()
+    records = iter_revision_files(rev, report=scan_report) if rev else iter_codebase_files(report=scan_report)
+    if compress:
+        records = compress_records(records, report=compression_report)
+    yield from records
+    if report:
+        scan_report.print()
+        compression_report.print()
+
+def collect_codebase_files(report: bool = True, rev: str | None = None) -> list[tuple[str, str]]:
+    """
+    Scans the repository (at `rev`, if given) and returns (path, content) for every source file.
+    """
+    return list(stream_codebase_files(report, rev))
+
+def render_file_records(records: list[tuple[str, str]]) -> str:
+    """
+    Joins (path, content) records into the `--- FILE: path ---` context format.
+    """
+    return "\n".join(f"--- FILE: {path} ---\n{content}\n" for path, content in records)
+
+def get_codebase_context(rev: str | None = None) -> str:
     """
     Scans the repository and aggregates source code into a single context string.
     """
-    context = []
-    # Extensions to include
-    extensions = {'.py', '.md', '.ps1', '.sh', '.js', '.ts', '.c', '.cpp', '.h', '.yml', '.yaml', '.Dockerfile', '.json', '.toml'}
-    # Folders to ignore
-    ignore_dirs = {'__pycache__', '.git', 'venv', 'node_modules', '.tmp', 'docs', 'dist', 'build', '.gemini'}
+    return render_file_records(collect_codebase_files(rev=rev))
 
-    for root, dirs, files in os.walk("."):
-        # Filter directories in-place
-        dirs[:] = [d for d in dirs if d not in ignore_dirs]
-        
-        for file in files:
-            ext = os.path.splitext(file)[1]
-            if ext in extensions:
-                path = os.path.join(root, file)
-                try:
-                    with open(path, "r", encoding="utf-8") as f:
-                        content = f.read()
-                        context.append(f"--- FILE: {path} ---\n{content}\n")
-                except Exception:
-                    continue
-                    
-    return "\n".join(context)
+def get_cache_dir() -> str:
+    """
+    Returns the directory where Git-Alchemist keeps its local state (response
+    cache, model health, telemetry). Overridable via ALCHEMIST_CACHE_DIR.
+    """
+    base = os.getenv("ALCHEMIST_CACHE_DIR")
+    if not base:
+        xdg = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        base = os.path.join(xdg, "git-alchemist")
+    os.makedirs(base, exist_ok=True)
+    return base
 
 def check_gh_auth() -> str | None:
     """
@@ -0,0 +1,64 @@
+import pytest
+import src.cache
+import src.core
+import src.scheduler
+import src.health
+import src.telemetry
+import src.providers
+import src.tokens
+from src.cache import ResponseCache
+from src.scheduler import RateLimiter
+from src.health import HealthRegistry
+from src.telemetry import TelemetryStore
+from src.providers import GeminiProvider
+from src.tokens import TokenEstimator
+
+class FakeResponse:
+    """
+    A response in the SDK's shape, without usage metadata.
+    """
+
+    def __init__(self, text):
+        self.text = text
+
+class FakeModels:
+    """
+    Answers every call with "merged finding" and records the prompts.
+    """
+
+    def __init__(self):
+        self.prompts = []
+
+    async def generate_content(self, model, contents):
+        self.prompts.append(contents)
+        return FakeResponse("merged finding")
+
+class FakeAio:
+    def __init__(self, models):
+        self.models = models
+
+class FakeClient:
+    """
+    A client in the SDK's shape whose `aio.models` is `models` (FakeModels by default).
+    """
+
+    def __init__(self, models=None):
+        self.aio = FakeAio(FakeModels() if models is None else models)
+        self.models = self.aio.models
+
+@pytest.fixture(autouse=True)
+def isolated_engine(tmp_path, monkeypatch):
+    """
+    Keep tests away from the user's on-disk state and real quota limits.
+    """
+    monkeypatch.setenv("ALCHEMIST_CACHE_DIR", str(tmp_path / "alchemist-cache"))
+    monkeypatch.setattr(src.cache, "_response_cache", ResponseCache(directory=str(tmp_path / "responses"), enabled=False))
+    monkeypatch.setattr(src.scheduler, "MODEL_RATE_LIMITS", {})
+    monkeypatch.setattr(src.scheduler, "DEFAULT_RATE_LIMIT", (100000, 100000000))
+    monkeypatch.setattr(src.scheduler, "_rate_limiter", RateLimiter())
+    monkeypatch.setattr(src.health, "_health_registry", HealthRegistry(path=str(tmp_path / "health.json")))
+    monkeypatch.setattr(src.providers, "_provider", GeminiProvider())
+    monkeypatch.setattr(src.tokens, "_token_estimator", TokenEstimator(path=str(tmp_path / "token_calibration.json")))
+    monkeypatch.setattr(src.telemetry, "_telemetry", TelemetryStore(path=str(tmp_path / "telemetry.jsonl")))
+    # Engine tests count map calls exactly; triage has its own tests
+    monkeypatch.setattr(src.core, "TRIAGE_ENABLED", False)
@@ -0,0 +1,69 @@
+import os
+import time
+from src.cache import ResponseCache, make_key
+
+class TestResponseCache:
+    def test_roundtrip_and_counters(self, tmp_path):
+        cache = ResponseCache(directory=str(tmp_path))
+        assert cache.get("gemma-3-27b-it", "prompt", "fast") is None
+        cache.put("gemma-3-27b-it", "prompt", "fast", "answer")
+        assert cache.get("gemma-3-27b-it", "prompt", "fast") == "answer"
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_key_separates_model_and_mode(self, tmp_path):
+        assert make_key("a", "p", "fast") != make_key("b", "p", "fast")
+        assert make_key("a", "p", "fast") != make_key("a", "p", "smart")
+        cache = ResponseCache(directory=str(tmp_path))
+        cache.put("a", "p", "fast", "answer")
+        assert cache.get("a", "p", "smart") is None
+
+    def test_key_separates_response_schema(self, tmp_path):
+        schema = {"type": "array", "items": {"type": "string"}}
+        cache = ResponseCache(directory=str(tmp_path))
+        cache.put("a", "p", "fast", "free text")
+        assert cache.get("a", "p", "fast", schema) is None
+        cache.put("a", "p", "fast", '["x"]', schema)
+        assert cache.get("a", "p", "fast", schema) == '["x"]'
+        assert cache.get("a", "p", "fast") == "free text"
+
+    def test_lookup_counts_once(self, tmp_path):
+        cache = ResponseCache(directory=str(tmp_path))
+        cache.put("m2", "p", "fast", "answer")
+        assert cache.lookup(["m1", "m2", "m3"], "p", "fast") == ("m2", "answer")
+        assert cache.lookup(["m1", "m3"], "p", "fast") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_ttl_expiry(self, tmp_path):
+        cache = ResponseCache(directory=str(tmp_path), ttl=0.01)
+        cache.put("m", "p", "fast", "answer")
+        time.sleep(0.05)
+        assert cache.get("m", "p", "fast") is None
+
+    def test_hits_do_not_extend_the_ttl(self, tmp_path):
+        cache = ResponseCache(directory=str(tmp_path), ttl=0.2)
+        cache.put("m", "p", "fast", "answer")
+        time.sleep(0.1)
+        assert cache.get("m", "p", "fast") == "answer"
+        time.sleep(0.15)
+        # Eviction expires entries by creation time, like reads do
+        cache.evict()
+        assert not os.path.exists(cache._path(make_key("m", "p", "fast")))
+
+    def test_lru_eviction(self, tmp_path):
+        cache = ResponseCache(directory=str(tmp_path), max_bytes=600)
+        for i in range(10):
+            cache.put("m", f"prompt-{i}", "fast", "x" * 50)
+            path = cache._path(make_key("m", f"prompt-{i}", "fast"))
+            os.utime(path, (time.time() - 100 + i, time.time() - 100 + i))
+        cache.evict()
+        assert cache.stats()["evictions"] > 0
+        assert cache.get("m", "prompt-9", "fast") == "x" * 50
+        assert cache.get("m", "prompt-0", "fast") is None
+
+    def test_disabled_cache_bypasses(self, tmp_path):
+        cache = ResponseCache(directory=str(tmp_path), enabled=False)
+        cache.put("m", "p", "fast", "answer")
+        assert cache.get("m", "p", "fast") is None
+        assert cache.stats()["misses"] == 0
@@ -0,0 +1,27 @@
+import os
+import sys
+import subprocess
+from src.cli import COMMANDS
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+def _run(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+
+def test_cli_import_does_not_load_commands_or_genai():
+    result = _run(
+        "import sys, src.cli; "
+        "heavy = [m for m in ('google.genai', 'httpx', 'src.core', 'src.sage', 'src.forge', 'src.architect') if m in sys.modules]; "
+        "print(','.join(heavy))"
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
+
+def test_audit_module_does_not_load_genai():
+    result = _run("import sys, src.audit; print('google.genai' in sys.modules)")
+    assert result.stdout.strip() == "False"
+
+def test_every_command_is_registered_with_a_parser():
+    result = subprocess.run([sys.executable, "-m", "src.cli", "--help"], cwd=ROOT, capture_output=True, text=True)
+    for command in COMMANDS:
+        assert command in result.stdout
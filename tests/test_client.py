@@ -0,0 +1,23 @@
+from src.client import ClientPool
+
+class TestClientPool:
+    def test_clients_are_built_once_and_rotated(self, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEYS", "key-a, key-b")
+        built = []
+        pool = ClientPool(factory=lambda key: built.append(key) or f"client-{key}")
+        picks = [pool.next() for _ in range(4)]
+        assert picks == ["client-key-a", "client-key-b", "client-key-a", "client-key-b"]
+        assert built == ["key-a", "key-b"]
+
+    def test_single_key_fallback(self, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEYS", raising=False)
+        monkeypatch.setenv("GEMINI_API_KEY", "solo")
+        pool = ClientPool(factory=lambda key: key)
+        assert pool.next() == "solo"
+        assert pool.keys() == ["solo"]
+
+    def test_missing_key_returns_none(self, monkeypatch, tmp_path):
+        monkeypatch.chdir(tmp_path)  # No .env to pick up
+        monkeypatch.delenv("GEMINI_API_KEYS", raising=False)
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        assert ClientPool(factory=lambda key: key).next() is None
@@ -0,0 +1,74 @@
+import ast
+from src.compress import compress_records, strip_comments, minify_yaml, collapse_literals, CompressionReport
+
+PY_SOURCE = '''#!/usr/bin/env python
+"""Module docstring."""
+import os  # inline comments stay
+# A full-line comment
+TEMPLATE = """
+# not a comment, part of a string
+"""
+
+def only_doc():
+    """Removing me would leave an empty body."""
+
+class Widget:
+    """Class docstring."""
+    size = 1
+'''
+
+class TestRules:
+    def test_python_comments_and_docstrings(self):
+        out = strip_comments("a.py", PY_SOURCE)
+        ast.parse(out)
+        assert out.startswith("#!/usr/bin/env python")
+        assert "docstring" not in out and "A full-line comment" not in out
+        assert "# inline comments stay" in out
+        assert "# not a comment, part of a string" in out
+        assert "def only_doc():\n    pass" in out
+
+    def test_c_style_comments_skip_strings(self):
+        out = strip_comments("a.js", "/* License */\nconst glob = 'src/*/x';\n// note\nrun();\n")
+        assert out == "const glob = 'src/*/x';\nrun();\n"
+
+    def test_yaml_keeps_block_scalars(self):
+        source = "# header\nsteps:\n  - run: |\n      # kept: part of the script\n      echo hi\n\n  # dropped\n  - name: done\n"
+        assert minify_yaml("ci.yml", source) == "steps:\n  - run: |\n      # kept: part of the script\n      echo hi\n\n  - name: done\n"
+
+    def test_long_literals_are_collapsed(self):
+        out = collapse_literals("a.py", f'DATA = "{"A" * 500}"\n')
+        assert out.startswith('DATA = "' + "A" * 40 + "...<500 chars>")
+
+    def test_prose_and_docstrings_are_not_literals(self):
+        readme = "It's a small tool. " + "More words. " * 30 + "Please don't skip this.\n"
+        assert collapse_literals("README.md", readme) == readme
+        code = '"""' + "A long docstring about the module. " * 10 + '"""\n# It\'s ' + "x " * 120 + "don't\n"
+        assert collapse_literals("a.py", code) == code
+        js = "// It's " + "word " * 60 + "don't\n"
+        assert collapse_literals("a.js", js) == js
+
+class TestCompressRecords:
+    def test_defaults_report_savings_and_dedupe(self):
+        records = [
+            ("./data.json", '{\n    "a": [1, 2, 3],\n    "b": {"c": true}\n}\n'),
+            ("./vendor/lib.py", "x = 1   \n\n\n\n\ny = 2\nnames = ['alpha', 'beta', 'gamma']\n"),
+            ("./third_party/lib.py", "x = 1   \n\n\n\n\ny = 2\nnames = ['alpha', 'beta', 'gamma']\n"),
+        ]
+        report = CompressionReport()
+        out = dict(compress_records(records, report=report))
+        assert out["./data.json"] == '{"a":[1,2,3],"b":{"c":true}}\n'
+        assert out["./vendor/lib.py"] == "x = 1\n\ny = 2\nnames = ['alpha', 'beta', 'gamma']\n"
+        assert out["./third_party/lib.py"] == "(identical to ./vendor/lib.py)\n"
+        assert set(report.saved) == {"json", "whitespace", "dedupe"}
+        assert report.before - report.after == sum(report.saved.values())
+
+    def test_tiny_duplicates_are_kept(self):
+        report = CompressionReport()
+        out = dict(compress_records([("./a/__init__.py", ""), ("./b/__init__.py", "")], report=report))
+        assert out == {"./a/__init__.py": "", "./b/__init__.py": ""}
+        assert "dedupe" not in report.saved
+
+    def test_disabled_by_env(self, monkeypatch):
+        monkeypatch.setenv("ALCHEMIST_COMPRESS", "none")
+        records = [("./a.py", "x = 1   \n")]
+        assert list(compress_records(records)) == records
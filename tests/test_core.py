@@ -1,5 +1,16 @@
+import time
+import random
+import asyncio
 import pytest
-from src.core import estimate_tokens, split_context, CHARS_PER_TOKEN
+import src.cache
+import src.core
+import src.scheduler
+import src.health
+import src.providers
+from src.cache import ResponseCache
+from src.core import estimate_tokens, split_context, group_summaries, reduce_summaries_async, run_sync, generate_content, generate_with_fallback, generate_from_records, triage_chunk_async, map_order, generate_hedged_async, CHARS_PER_TOKEN
+from src.chunker import stream_records
+from conftest import FakeClient, FakeModels, FakeResponse
 
 class TestTokenEstimation:
     @pytest.mark.parametrize("text, expected",[
@@ -37,4 +48,366 @@ class TestContextSplitting:
     def test_split_null_fail(self):
         # This documents that the function currently crashes on context=None
         with pytest.raises(TypeError):
-            split_context(None, 1)
\ No newline at end of file
+            split_context(None, 1)
+
+class TestFileAwareChunking:
+    @staticmethod
+    def _record(path, body):
+        return f"--- FILE: {path} ---\n{body}\n"
+
+    def test_whole_files_are_never_split_when_they_fit(self):
+        files = [self._record(f"./f{i}.py", "x = 1\n" * 20) for i in range(6)]
+        chunks = split_context("\n".join(files), 100)
+        for chunk in chunks:
+            assert len(chunk) <= 100 * CHARS_PER_TOKEN
+            # Every file body starts right after its header
+            assert chunk.startswith("--- FILE: ")
+        joined = "\n".join(chunks)
+        for i in range(6):
+            assert joined.count(f"--- FILE: ./f{i}.py ---") == 1
+
+    def test_small_files_are_packed_together(self):
+        files = [self._record(f"./f{i}.py", "y") for i in range(10)]
+        assert len(split_context("\n".join(files), 100)) == 1
+
+    def test_first_fit_decreasing_fills_gaps(self):
+        big = self._record("./big.py", "b" * 250)
+        small = [self._record(f"./s{i}.py", "s" * 40) for i in range(2)]
+        # limit 90 tokens -> 360 chars; big + one small fit in the first chunk
+        chunks = split_context("\n".join([small[0], big, small[1]]), 90)
+        assert len(chunks) == 2
+        assert "./big.py" in chunks[0] and "./s0.py" in chunks[0]
+
+    def test_oversized_file_split_on_definitions_with_path_prefix(self):
+        body = "\n".join(f"def f{i}():\n    return {i}\n" for i in range(40))
+        chunks = split_context(self._record("./big.py", body), 50)
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert chunk.startswith("--- FILE: ./big.py (part ")
+            assert len(chunk) <= 50 * CHARS_PER_TOKEN
+            first_line = chunk.split("\n", 2)[1]
+            assert first_line.startswith("def ")
+
+
+class TestTreeReduce:
+    def test_group_summaries_respects_budget(self):
+        summaries = ["x" * 400] * 10  # 100 tokens each
+        groups = group_summaries(summaries, 250)
+        assert len(groups) == 5
+        assert sum(len(g) for g in groups) == 10
+
+    def test_group_summaries_splits_oversized(self):
+        groups = group_summaries(["y" * 4000], 250)
+        assert len(groups) > 1
+
+    def test_small_findings_reduce_in_one_call(self):
+        client = FakeClient()
+        run_sync(reduce_summaries_async(client, ["a", "b"], "question", ["m"], "fast", 1000))
+        assert len(client.models.prompts) == 1
+
+    def test_large_findings_reduce_in_levels(self):
+        client = FakeClient()
+        summaries = ["finding " * 100] * 40  # ~200 tokens each, ~8000 total
+        result = run_sync(reduce_summaries_async(client, summaries, "question", ["m"], "fast", 1000))
+        assert result == "merged finding"
+        # Several merge calls on level 1, then the final synthesis
+        assert len(client.models.prompts) > 2
+        assert all(estimate_tokens(p) <= 1000 for p in client.models.prompts)
+
+
+class _SlowModels(FakeModels):
+    async def generate_content(self, model, contents):
+        self.prompts.append(model)
+        if model == "slow":
+            await asyncio.sleep(5)
+        return FakeResponse(f"answer from {model}")
+
+class TestAsyncEngine:
+    def test_generate_content_map_reduce_runs_on_engine(self, monkeypatch):
+        client = FakeClient()
+        monkeypatch.setattr(src.core, "get_llm_client", lambda: client)
+        context = "\n".join(f"--- FILE: ./f{i}.py ---\n" + "z = 1\n" * 2000 for i in range(8))
+        result = generate_content("question", mode="fast", context=context)
+        assert result == "merged finding"
+        # One call per chunk plus the final synthesis
+        assert len(client.models.prompts) == len(split_context(context, src.core.SAFE_TOKEN_LIMIT_FAST)) + 1
+
+    def test_call_timeout_falls_back_to_next_model(self, monkeypatch):
+        client = FakeClient()
+        client.aio.models = _SlowModels()
+        monkeypatch.setattr(src.core, "CALL_TIMEOUT_SECONDS", 0.05)
+        assert generate_with_fallback(client, "p", ["slow", "fast-model"], silent=True) == "answer from fast-model"
+
+    def test_concurrent_calls_wait_for_half_open_probes(self):
+        health = src.health.get_health_registry()
+        for model in ("m1", "m2"):
+            health.record_failure(model, throttled=True, retry_after=0)
+            health._get(model).open_until = time.time() - 1
+        client = FakeClient()
+        client.aio.models = _CountingModels()
+
+        async def calls():
+            return await asyncio.gather(*[
+                src.core.generate_with_fallback_async(client, f"p{i}", ["m1", "m2"], silent=True) for i in range(6)
+            ])
+
+        assert run_sync(calls()) == ["merged finding"] * 6
+
+    def test_map_calls_queue_for_saturated_quota(self, monkeypatch):
+        client = FakeClient()
+        limiter = src.scheduler.get_rate_limiter().for_model("m")
+        acquired = limiter.acquire
+        attempts = []
+
+        async def saturated_twice(tokens, max_wait=30.0):
+            attempts.append(tokens)
+            return len(attempts) > 2 and await acquired(tokens)
+
+        monkeypatch.setattr(limiter, "acquire", saturated_twice)
+        assert generate_with_fallback(client, "p", ["m"], silent=True) is None
+        attempts.clear()
+        assert run_sync(src.core.generate_with_fallback_async(client, "p", ["m"], silent=True, wait_for_quota=True)) == "merged finding"
+        assert len(attempts) == 3
+
+    def test_failed_chunks_are_reported_before_the_reduce(self, monkeypatch):
+        client = FakeClient()
+        client.aio.models = _FailingModels("./f0.py")
+        monkeypatch.setattr(src.core, "get_llm_client", lambda: client)
+        warnings = []
+        monkeypatch.setattr(src.core, "warn_failed_chunks", lambda failed, total: warnings.append((failed, total)))
+        records = ((f"./f{i}.py", "z = 1\n" * 2000) for i in range(6))
+        assert generate_from_records("question", records) == "merged finding"
+        assert warnings and warnings[0][0] == 1
+
+    def test_missing_client_exits_on_the_calling_thread(self, monkeypatch):
+        monkeypatch.setattr(src.providers.get_provider(), "client", lambda: None)
+        with pytest.raises(SystemExit) as exit_info:
+            generate_content("question")
+        assert exit_info.value.code == 1
+        # The engine loop survived and still runs work
+        assert run_sync(asyncio.sleep(0, result="alive")) == "alive"
+
+
+class _FailingModels(FakeModels):
+    """
+    Every call for the chunk containing `marker` fails.
+    """
+
+    def __init__(self, marker):
+        super().__init__()
+        self.marker = marker
+
+    async def generate_content(self, model, contents):
+        if self.marker in contents and "findings" not in contents:
+            raise RuntimeError("500 internal error")
+        return await super().generate_content(model, contents)
+
+class _CountingModels(FakeModels):
+    def __init__(self):
+        super().__init__()
+        self.in_flight = 0
+        self.peak = 0
+
+    async def generate_content(self, model, contents):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            return await super().generate_content(model, contents)
+        finally:
+            self.in_flight -= 1
+
+class TestStreamingPipeline:
+    def test_stream_records_matches_budget_and_keeps_every_file(self):
+        records = [(f"./f{i}.py", "x = 1\n" * (50 + i * 7)) for i in range(40)]
+        chunks = list(stream_records(iter(records), 2000))
+        assert all(len(c) <= 2000 for c in chunks)
+        joined = "\n".join(chunks)
+        assert all(f"--- FILE: ./f{i}.py" in joined for i in range(40))
+
+    def test_small_input_is_one_call(self, monkeypatch):
+        client = FakeClient()
+        monkeypatch.setattr(src.core, "get_llm_client", lambda: client)
+        result = generate_from_records("question", iter([("./a.py", "a = 1\n")]))
+        assert result == "merged finding"
+        assert len(client.models.prompts) == 1
+        assert "--- FILE: ./a.py ---" in client.models.prompts[0]
+
+    def test_large_input_streams_with_bounded_in_flight(self, monkeypatch):
+        client = FakeClient()
+        client.aio.models = _CountingModels()
+        monkeypatch.setattr(src.core, "get_llm_client", lambda: client)
+        monkeypatch.setattr(src.core, "MAX_IN_FLIGHT", 3)
+        records = ((f"./f{i}.py", "z = 1\n" * 2000) for i in range(12))
+        assert generate_from_records("question", records) == "merged finding"
+        assert client.aio.models.peak <= 3
+        # Several map calls plus the final synthesis
+        assert len(client.aio.models.prompts) > 2
+
+    def test_large_input_streams_the_answer(self, monkeypatch):
+        client = FakeClient()
+        monkeypatch.setattr(src.core, "get_llm_client", lambda: client)
+        pieces = []
+        records = ((f"./f{i}.py", "z = 1\n" * 2000) for i in range(6))
+        assert generate_from_records("question", records, stream=pieces.append) == "merged finding"
+        # Only the final synthesis reaches the sink
+        assert pieces == ["merged finding"]
+
+
+class _TriageModels(FakeModels):
+    """
+    The triage model only considers chunks mentioning "needle" relevant.
+    """
+
+    async def generate_content(self, model, contents):
+        self.prompts.append((model, contents))
+        if "YES or NO" in contents:
+            return FakeResponse("YES" if "needle" in contents.split("PARTIAL CONTEXT", 1)[1] else "NO")
+        return FakeResponse("merged finding")
+
+class TestTriage:
+    def _client(self, monkeypatch, model=True):
+        client = FakeClient()
+        client.aio.models = _TriageModels()
+        monkeypatch.setattr(src.core, "get_llm_client", lambda: client)
+        monkeypatch.setattr(src.core, "TRIAGE_ENABLED", True)
+        monkeypatch.setattr(src.core, "TRIAGE_MODEL", model)
+        return client
+
+    def test_local_triage_skips_chunks_without_question_terms(self, monkeypatch):
+        client = self._client(monkeypatch, model=False)
+        context = "\n".join(f"--- FILE: ./f{i}.py ---\n" + "z = 1\n" * 2000 for i in range(6))
+        context += "\n--- FILE: ./needle.py ---\nneedle = True\n"
+        question = "Where is the needle defined?"
+        assert generate_content(question, mode="fast", context=context, question=question) == "merged finding"
+        # No triage calls by default; only the needle chunk and the final synthesis
+        assert all("YES or NO" not in p for _, p in client.aio.models.prompts)
+        assert len(client.aio.models.prompts) == 2
+
+    def test_irrelevant_chunks_skip_the_strong_model(self, monkeypatch):
+        client = self._client(monkeypatch)
+        context = "\n".join(f"--- FILE: ./f{i}.py ---\n" + "z = 1\n" * 2000 for i in range(6))
+        context += "\n--- FILE: ./needle.py ---\nneedle = True\n"
+        question = "Where is the needle defined?"
+        assert generate_content(question, mode="fast", context=context, question=question) == "merged finding"
+        extraction = [p for _, p in client.aio.models.prompts if "YES or NO" not in p]
+        # Only the chunk with the needle is extracted, then the final synthesis
+        assert len(extraction) == 2
+        # The triage model sees a sample, not the whole chunk
+        triage = [p for _, p in client.aio.models.prompts if "YES or NO" in p]
+        assert triage and all(len(p) < src.core.TRIAGE_SAMPLE_CHARS + 500 for p in triage)
+
+    def test_no_question_means_no_triage(self, monkeypatch):
+        client = self._client(monkeypatch)
+        context = "\n".join(f"--- FILE: ./f{i}.py ---\n" + "z = 1\n" * 2000 for i in range(6))
+        generate_content("Where is the needle defined?", mode="fast", context=context)
+        assert not [p for _, p in client.aio.models.prompts if "YES or NO" in p]
+
+    def test_decisions_are_cached_per_chunk_and_prompt(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(src.cache, "_response_cache", ResponseCache(directory=str(tmp_path / "triage")))
+        client = self._client(monkeypatch)
+        chunk = "--- FILE: ./a.py ---\nz = 1\n"
+        assert run_sync(triage_chunk_async(client, chunk, "Where is the flag?", "fast")) is False
+        assert run_sync(triage_chunk_async(client, chunk, "Where is the flag?", "fast")) is False
+        assert len(client.aio.models.prompts) == 1
+
+    def test_lexical_match_needs_no_call(self, monkeypatch):
+        client = self._client(monkeypatch)
+        assert run_sync(triage_chunk_async(client, "def audit_score(): ...", "audit score", "fast")) is True
+        assert client.aio.models.prompts == []
+
+
+class TestMapFanOut:
+    def test_map_spreads_over_tier_and_reserves_strongest(self, monkeypatch):
+        client = FakeClient()
+        client.aio.models = _TriageModels()
+        monkeypatch.setattr(src.core, "get_llm_client", lambda: client)
+        # Same measured speed for both map models, so neither starts with an edge
+        for model in src.core.FAST_MODELS:
+            src.scheduler.get_rate_limiter().for_model(model).latency = 0.01
+        random.seed(0)
+        context = "\n".join(f"--- FILE: ./f{i}.py ---\n" + "z = 1\n" * 2000 for i in range(30))
+        generate_content("question", mode="fast", context=context)
+        *map_calls, final = [m for m, _ in client.aio.models.prompts]
+        assert final == src.core.FAST_MODELS[0]
+        assert set(map_calls) == set(src.core.FAST_MODELS[1:])
+
+    def test_single_model_tier_is_unchanged(self):
+        assert map_order(["only"], 100) == ["only"]
+
+
+class TestHedging:
+    def _prime(self, model, seconds):
+        limiter = src.scheduler.get_rate_limiter().for_model(model)
+        for _ in range(src.scheduler.MIN_LATENCY_SAMPLES):
+            limiter.observe_latency(seconds)
+
+    def test_straggler_is_hedged_to_next_model(self, monkeypatch):
+        monkeypatch.setattr(src.scheduler, "_hedge_budget", src.scheduler.HedgeBudget(ratio=1.0))
+        client = FakeClient()
+        client.aio.models = _SlowModels()
+        self._prime("slow", 0.02)
+        result = run_sync(asyncio.wait_for(generate_hedged_async(client, "p", ["slow", "fast-model"]), 2))
+        assert result == "answer from fast-model"
+
+    def test_hedge_budget_caps_duplicates(self, monkeypatch):
+        monkeypatch.setattr(src.scheduler, "_hedge_budget", src.scheduler.HedgeBudget(ratio=0.0))
+        monkeypatch.setattr(src.core, "CALL_TIMEOUT_SECONDS", 0.2)
+        client = FakeClient()
+        client.aio.models = _SlowModels()
+        self._prime("slow", 0.02)
+        # No hedge allowed: the slow model times out and the fallback answers instead
+        assert run_sync(generate_hedged_async(client, "p", ["slow", "fast-model"])) == "answer from fast-model"
+        assert client.aio.models.prompts == ["slow", "fast-model"]
+
+
+class _StreamingModels(FakeModels):
+    """
+    Streams the answer in pieces; "broken" fails after its first piece.
+    """
+
+    async def generate_content_stream(self, model, contents):
+        self.prompts.append(contents)
+
+        async def pieces():
+            for word in ["streamed ", "answer ", f"from {model}"]:
+                yield FakeResponse(word)
+                if model == "broken":
+                    raise RuntimeError("connection reset")
+        return pieces()
+
+class TestStreamingOutput:
+    def test_pieces_reach_the_sink_and_full_text_is_cached(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(src.cache, "_response_cache", ResponseCache(directory=str(tmp_path / "responses")))
+        client = FakeClient()
+        client.aio.models = _StreamingModels()
+        pieces = []
+        assert generate_with_fallback(client, "p", ["m"], silent=True, on_text=pieces.append) == "streamed answer from m"
+        assert pieces == ["streamed ", "answer ", "from m"]
+
+        cached = []
+        assert generate_with_fallback(client, "p", ["m"], silent=True, on_text=cached.append) == "streamed answer from m"
+        assert cached == ["streamed answer from m"]
+        assert len(client.aio.models.prompts) == 1
+
+    def test_interrupted_stream_falls_back_to_next_model(self):
+        client = FakeClient()
+        client.aio.models = _StreamingModels()
+        pieces = []
+        assert generate_with_fallback(client, "p", ["broken", "m"], silent=True, on_text=pieces.append) == "streamed answer from m"
+        assert pieces[-3:] == ["streamed ", "answer ", "from m"]
+
+    def test_clients_without_streaming_emit_the_whole_answer(self):
+        client = FakeClient()
+        pieces = []
+        assert generate_with_fallback(client, "p", ["m"], silent=True, on_text=pieces.append) == "merged finding"
+        assert pieces == ["merged finding"]
+
+    def test_only_the_final_reduce_call_is_streamed(self, monkeypatch):
+        client = FakeClient()
+        client.aio.models = _StreamingModels()
+        monkeypatch.setattr(src.core, "get_llm_client", lambda: client)
+        context = "\n".join(f"--- FILE: ./f{i}.py ---\n" + "z = 1\n" * 2000 for i in range(8))
+        pieces = []
+        result = generate_content("question", mode="fast", context=context, stream=pieces.append)
+        assert "".join(pieces) == result
@@ -0,0 +1,77 @@
+import time
+from src.health import HealthRegistry, parse_retry_after, FAILURE_THRESHOLD, PROBE_WAIT
+
+class _FakeHttpResponse:
+    headers = {"retry-after": "17"}
+
+class _FakeApiError(Exception):
+    response = _FakeHttpResponse()
+
+class TestRetryAfter:
+    def test_header(self):
+        assert parse_retry_after(_FakeApiError("429")) == 17.0
+
+    def test_retry_info_in_message(self):
+        err = Exception("429 RESOURCE_EXHAUSTED {'@type': 'RetryInfo', 'retryDelay': '23s'}")
+        assert parse_retry_after(err) == 23.0
+
+    def test_retry_in_prose(self):
+        assert parse_retry_after(Exception("Please retry in 4.5s.")) == 4.5
+
+    def test_no_hint(self):
+        assert parse_retry_after(Exception("500 INTERNAL")) is None
+
+class TestCircuitBreaker:
+    def test_quota_error_opens_immediately_with_hint(self, tmp_path):
+        health = HealthRegistry(path=str(tmp_path / "h.json"))
+        cooldown = health.record_failure("m", throttled=True, retry_after=30)
+        assert 30 <= cooldown <= 31
+        assert not health.allow("m")
+        assert health.seconds_until_available(["m"]) > 29
+
+    def test_other_errors_open_after_threshold(self, tmp_path):
+        health = HealthRegistry(path=str(tmp_path / "h.json"))
+        for _ in range(FAILURE_THRESHOLD - 1):
+            assert health.record_failure("m") == 0.0
+        assert health.allow("m")
+        assert health.record_failure("m") > 0
+        assert not health.allow("m")
+
+    def test_half_open_admits_single_probe(self, tmp_path):
+        health = HealthRegistry(path=str(tmp_path / "h.json"))
+        health.record_failure("m", throttled=True, retry_after=0)
+        time.sleep(1.1)
+        assert health.allow("m")
+        assert not health.allow("m")
+        health.record_success("m")
+        assert health.allow("m") and health.allow("m")
+
+    def test_state_persists_across_instances(self, tmp_path):
+        path = str(tmp_path / "h.json")
+        HealthRegistry(path=path).record_failure("gemma-3-27b-it", throttled=True, retry_after=60)
+        fresh = HealthRegistry(path=path)
+        assert not fresh.allow("gemma-3-27b-it")
+        assert fresh.allow("gemma-3-12b-it")
+
+    def test_probing_circuit_means_wait_not_unavailable(self, tmp_path):
+        health = HealthRegistry(path=str(tmp_path / "h.json"))
+        health.record_failure("m", throttled=True, retry_after=0)
+        time.sleep(1.1)
+        assert health.allow("m")
+        assert 0 < health.seconds_until_available(["m"]) <= PROBE_WAIT
+
+    def test_in_flight_failures_do_not_escalate_the_backoff(self, tmp_path):
+        health = HealthRegistry(path=str(tmp_path / "h.json"))
+        sent = time.time()
+        first = health.record_failure("m", throttled=True, started=sent)
+        for _ in range(7):
+            assert health.record_failure("m", throttled=True, started=sent) <= first
+        assert health.snapshot()["m"]["opens"] == 1
+
+    def test_failed_probe_escalates(self, tmp_path):
+        health = HealthRegistry(path=str(tmp_path / "h.json"))
+        health.record_failure("m", throttled=True, retry_after=0)
+        time.sleep(1.1)
+        assert health.allow("m")
+        assert health.record_failure("m", throttled=True, started=time.time()) > 0
+        assert health.snapshot()["m"]["opens"] == 2
@@ -0,0 +1,59 @@
+import src.helper
+from src.helper import HelperSession
+from src.utils import render_file_records
+
+class TestHelperSession:
+    def _session(self, tmp_path, monkeypatch, files):
+        monkeypatch.chdir(tmp_path)
+        for name, body in files.items():
+            (tmp_path / name).write_text(body)
+        session = HelperSession()
+        session.refresh()
+        return session
+
+    def test_digest_is_reused_until_files_change(self, tmp_path, monkeypatch):
+        session = self._session(tmp_path, monkeypatch, {"a.py": "x = 1\n" * 20000, "b.py": "y = 2\n" * 20000})
+        builds = []
+
+        class _FakeIndex:
+            def update(self, files, mode="fast", silent=False):
+                builds.append(len(files))
+            def findings(self, files):
+                return [f"FILE: {path}\nsummary" for path, _ in files]
+
+        monkeypatch.setattr(src.helper, "SummaryIndex", _FakeIndex)
+        first = session.context_for("how does everything fit together?", "prompt")
+        assert first.startswith("CODEBASE DIGEST")
+        session.context_for("and the data flow?", "prompt")
+        assert builds == [2]
+
+        assert session.refresh() is False
+        (tmp_path / "c.py").write_text("z = 3\n")
+        assert session.refresh() is True
+        session.context_for("what changed?", "prompt")
+        assert builds == [2, 3]
+
+    def test_small_codebase_is_sent_whole(self, tmp_path, monkeypatch):
+        session = self._session(tmp_path, monkeypatch, {"a.py": "def a():\n    return 1\n"})
+        assert session.context_for("what does a do?", "prompt") == render_file_records(session.files)
+
+    def test_history_keeps_recent_turns(self):
+        session = HelperSession()
+        for i in range(src.helper.HISTORY_TURNS + 2):
+            session.remember(f"q{i}", "answer " * 1000)
+        assert len(session.history) == src.helper.HISTORY_TURNS
+        assert session.history[0][0] == "q2"
+        assert len(session.history[-1][1]) == src.helper.HISTORY_ANSWER_CHARS
+
+    def test_warm_up_is_local_unless_the_digest_is_requested(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "a.py").write_text("x = 1\n" * 20000)
+        monkeypatch.setattr(HelperSession, "_build_digest", lambda self, silent: "digest")
+        session = HelperSession()
+        session.start_warm_up().join(timeout=10)
+        assert session.ready.is_set() and session.summary_index is not None
+        assert session.digest is None
+
+        session = HelperSession()
+        session.start_warm_up(build_digest=True).join(timeout=10)
+        assert session.digest == "digest"
@@ -4,7 +4,7 @@ import os
 # Ensure src is in path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.utils import parse_json_response
+from src.utils import parse_json_response, iter_json_spans
 
 def test_parse_clean_json():
     text = '{"key": "value"}'
@@ -30,6 +30,38 @@ def test_parse_list():
     text = '[1, 2, 3]'
     assert parse_json_response(text) == [1, 2, 3]
 
+def test_parse_skips_brackets_in_prose_and_strings():
+    text = 'Plan [draft]: {"cmd": "echo }] done", "n": [1, {"k": 2}]} trailing }'
+    assert parse_json_response(text) == {"cmd": "echo }] done", "n": [1, {"k": 2}]}
+
+def test_parse_apostrophes_before_json():
+    text = "Here's the list: [\"it's\", \"ok\"]"
+    assert parse_json_response(text) == ["it's", "ok"]
+
+def test_parse_python_style_literal():
+    text = "{'commands': ['mkdir src', \"echo 'hi' > a\"], 'ok': True}"
+    assert parse_json_response(text) == {"commands": ["mkdir src", "echo 'hi' > a"], "ok": True}
+
+def test_iter_json_spans_is_balanced():
+    assert list(iter_json_spans('a {"x": [1]} b [2, 3] c {broken]')) == ['{"x": [1]}', "[2, 3]"]
+
+def test_parse_after_unclosed_bracket_in_prose():
+    text = 'Use a pattern like [a-z to match names.\n```json\n{"title": "x", "body": "y"}\n```'
+    assert parse_json_response(text) == {"title": "x", "body": "y"}
+
+def test_parse_list_after_unclosed_brace_in_prose():
+    text = 'Step 1) run {build first.\n["python", "cli"]'
+    assert parse_json_response(text) == ["python", "cli"]
+
+def test_truncated_array_does_not_yield_an_inner_value():
+    text = '[' + ','.join(f'{{"a":{i}}}' for i in range(50))
+    assert list(iter_json_spans(text)) == []
+    assert parse_json_response(text) is None
+
+def test_unclosed_brackets_in_prose_are_skipped_in_one_pass():
+    text = 'x [ ' * 8000 + 'done.\n{"ok": true}'
+    assert parse_json_response(text) == {"ok": True}
+
 if __name__ == "__main__":
     tests = [
         test_parse_clean_json,
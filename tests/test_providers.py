@@ -0,0 +1,138 @@
+import json
+import asyncio
+import httpx
+import pytest
+import src.core
+import src.providers
+from src.core import generate_content, generate_with_fallback, tier_models, safe_token_limit, get_llm_client, MissingClientError
+from src.providers import Provider, OpenAICompatibleProvider, GeminiProvider, make_provider
+from src.client import ClientPool, set_client_pool, get_client_pool
+from src.health import get_health_registry
+from src.scheduler import get_rate_limiter
+
+def _local(handler, **kwargs) -> OpenAICompatibleProvider:
+    provider = OpenAICompatibleProvider(base_url="http://llm.test/v1", models=["qwen-coder"], **kwargs)
+    provider.client()._http = httpx.AsyncClient(base_url="http://llm.test/v1", transport=httpx.MockTransport(handler))
+    return provider
+
+def _completion(request: httpx.Request) -> httpx.Response:
+    body = json.loads(request.content)
+    text = f"{body['model']} says: {body['messages'][0]['content'][:12]}"
+    return httpx.Response(200, json={
+        "choices": [{"message": {"role": "assistant", "content": text}}],
+        "usage": {"prompt_tokens": 7, "completion_tokens": 3},
+    })
+
+class TestProviders:
+    def test_gemini_is_the_default(self):
+        assert isinstance(make_provider("gemini"), GeminiProvider)
+        assert tier_models("fast") == src.providers.GEMINI_TIERS["fast"]
+        assert safe_token_limit("smart") == src.providers.GEMINI_TOKEN_LIMITS["smart"]
+
+    def test_providers_must_define_a_client(self):
+        with pytest.raises(TypeError):
+            Provider(tiers={"fast": ["m"], "smart": ["m"]}, token_limits={"fast": 1, "smart": 1})
+
+    def test_gemini_keys_have_their_own_health_and_quota(self, monkeypatch):
+        class Exhausted:
+            class aio:
+                class models:
+                    @staticmethod
+                    async def generate_content(model, contents):
+                        raise RuntimeError("429 RESOURCE_EXHAUSTED")
+
+        class Fresh:
+            class aio:
+                class models:
+                    @staticmethod
+                    async def generate_content(model, contents):
+                        return type("Response", (), {"text": f"{model} ok", "usage_metadata": None})()
+
+        previous = get_client_pool()
+        set_client_pool(ClientPool(factory=lambda key: Exhausted if key == "key-a" else Fresh, keys=["key-a", "key-b"]))
+        try:
+            pool = get_client_pool()
+            exhausted, fresh = pool.next(), pool.next()
+            assert generate_with_fallback(exhausted, "p", ["m"], silent=True) is None
+            # The other key still reaches the model, and keys share no token buckets
+            assert generate_with_fallback(fresh, "p", ["m"], silent=True) == "m ok"
+            provider = src.providers.get_provider()
+            a, b = provider.quota_key(exhausted, "m"), provider.quota_key(fresh, "m")
+            assert a != b and "key-a" not in a
+            assert not get_health_registry().available(a) and get_health_registry().available(b)
+            assert get_rate_limiter().for_model(a) is not get_rate_limiter().for_model(b)
+        finally:
+            set_client_pool(previous)
+
+    def test_local_provider_has_its_own_tiers_limits_and_concurrency(self, monkeypatch):
+        provider = _local(_completion, context_tokens=4000, concurrency=2)
+        monkeypatch.setattr(src.providers, "_provider", provider)
+        assert tier_models("fast") == tier_models("smart") == ["qwen-coder"]
+        assert safe_token_limit("fast") == 4000
+        get_llm_client()
+        limiter = get_rate_limiter().for_model("qwen-coder")
+        assert limiter.max_concurrency == 2 and limiter.limit <= 2
+
+    def test_chat_completion_through_the_engine(self, monkeypatch):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return _completion(request)
+
+        monkeypatch.setattr(src.providers, "_provider", _local(handler))
+        assert generate_content("Describe it") == "qwen-coder says: Describe it"
+        assert requests[0].url.path == "/v1/chat/completions"
+
+    def test_streamed_completion(self, monkeypatch):
+        def handler(request):
+            assert json.loads(request.content)["stream"] is True
+            events = [{"choices": [{"delta": {"content": piece}}]} for piece in ["Hel", "lo"]]
+            events.append({"choices": [], "usage": {"prompt_tokens": 2, "completion_tokens": 2}})
+            body = "".join(f"data: {json.dumps(e)}\n\n" for e in events) + "data: [DONE]\n\n"
+            return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+
+        provider = _local(handler)
+        pieces = []
+        result = generate_with_fallback(provider.client(), "hi", ["qwen-coder"], silent=True, on_text=pieces.append)
+        assert result == "Hello"
+        assert pieces == ["Hel", "lo"]
+
+    def test_server_errors_fall_back_to_the_next_model(self, monkeypatch):
+        def handler(request):
+            if json.loads(request.content)["model"] == "big":
+                return httpx.Response(503, json={"error": "loading model"})
+            return _completion(request)
+
+        provider = _local(handler)
+        assert generate_with_fallback(provider.client(), "hello", ["big", "small"], silent=True) == "small says: hello"
+
+    def test_client_timeout_overrides_the_engine_default(self, monkeypatch):
+        async def slow(request):
+            await asyncio.sleep(0.3)
+            return _completion(request)
+
+        monkeypatch.setattr(src.core, "CALL_TIMEOUT_SECONDS", 0.05)
+        provider = _local(slow)
+        assert provider.client().call_timeout == src.providers.LOCAL_TIMEOUT_SECONDS
+        assert generate_with_fallback(provider.client(), "hello", ["qwen-coder"], silent=True) == "qwen-coder says: hello"
+
+    def test_missing_client_names_the_provider_setting(self, monkeypatch):
+        provider = _local(_completion)
+        monkeypatch.setattr(provider, "client", lambda: None)
+        monkeypatch.setattr(src.providers, "_provider", provider)
+        with pytest.raises(MissingClientError, match="ALCHEMIST_LOCAL_URL"):
+            get_llm_client()
+
+    def test_schema_becomes_response_format(self, monkeypatch):
+        bodies = []
+
+        def handler(request):
+            bodies.append(json.loads(request.content))
+            return _completion(request)
+
+        provider = _local(handler)
+        monkeypatch.setattr(src.providers, "_provider", provider)
+        schema = {"type": "array", "items": {"type": "string"}}
+        generate_with_fallback(provider.client(), "topics", ["qwen-coder"], silent=True, schema=schema)
+        assert bodies[0]["response_format"] == {"type": "json_schema", "json_schema": {"name": "response", "schema": schema}}
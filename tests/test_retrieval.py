@@ -0,0 +1,54 @@
+import json
+from src.retrieval import LexicalIndex, select_relevant_context, tokenize
+from src.core import estimate_tokens
+
+RECORDS = [
+    ("./src/audit.py", "def run_audit(repo_name):\n    checks = {'README.md': 20}\n    total_score = sum(checks.values())\n"),
+    ("./src/forge.py", "def forge_pr(mode):\n    diff = get_branch_diff()\n    open_pull_request(diff)\n"),
+    ("./src/cache.py", "class ResponseCache:\n    def evict(self):\n        pass  # LRU eviction by mtime\n"),
+    ("./README.md", "# Project\n\nA CLI tool for repositories.\n"),
+]
+
+class TestTokenize:
+    def test_identifiers_are_split(self):
+        terms = tokenize("getRepoTopics and run_audit")
+        assert "getrepotopics" in terms and "repo" in terms and "topics" in terms
+        assert "run_audit" in terms and "audit" in terms
+        assert "and" not in terms
+
+class TestLexicalIndex:
+    def test_search_ranks_matching_file_first(self):
+        index = LexicalIndex(RECORDS)
+        hits = index.search("How is the audit score computed?")
+        assert RECORDS[hits[0][0]][0] == "./src/audit.py"
+
+    def test_symbols_and_paths_are_boosted(self):
+        index = LexicalIndex(RECORDS)
+        hits = index.search("ResponseCache eviction")
+        assert RECORDS[hits[0][0]][0] == "./src/cache.py"
+
+    def test_select_context_within_budget(self):
+        index = LexicalIndex(RECORDS)
+        context, paths = select_relevant_context(index, "audit score", budget_tokens=1000)
+        assert paths[0] == "./src/audit.py"
+        assert context.startswith("--- FILE: ./src/audit.py ---")
+        assert estimate_tokens(context) <= 1000
+
+    def test_uncertain_recall_falls_back(self):
+        index = LexicalIndex(RECORDS)
+        assert select_relevant_context(index, "kubernetes helm deployment strategy", budget_tokens=1000) is None
+
+    def test_oversized_file_contributes_its_best_piece(self):
+        body = "\n\n".join(f"def filler_{i}():\n    return {i}\n" for i in range(200))
+        body += "\n\ndef quantum_flux():\n    return 'flux'\n"
+        index = LexicalIndex([("./big.py", body)])
+        context, _ = select_relevant_context(index, "quantum flux", budget_tokens=100)
+        assert "quantum_flux" in context
+        assert estimate_tokens(context) <= 100
+
+    def test_dense_files_are_sized_in_tokens(self):
+        # JSON packs fewer characters per token than the old flat 4
+        data = json.dumps({f"key_{i}": [i, i * 2, {"flux": i}] for i in range(400)}, indent=1)
+        index = LexicalIndex([("./flux.json", data)])
+        context, _ = select_relevant_context(index, "flux key", budget_tokens=500)
+        assert estimate_tokens(context) <= 500
@@ -0,0 +1,100 @@
+import subprocess
+import pytest
+from src.scanner import scan_codebase, is_ignored, resolve_revision, GitObjectReader
+from src.summary_index import content_sha
+
+def _write(root, files):
+    for name, body in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(body, bytes):
+            path.write_bytes(body)
+        else:
+            path.write_text(body)
+
+class TestScanner:
+    def test_honors_gitignore_and_alchemistignore(self, tmp_path):
+        _write(tmp_path, {
+            "app.py": "print('hi')\n",
+            "secret.py": "KEY = 1\n",
+            "fixtures/big.json": "{}\n",
+            ".gitignore": "secret.py\n",
+            ".alchemistignore": "fixtures/\n",
+        })
+        subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+        records, report = scan_codebase(str(tmp_path))
+        assert [path for path, _ in records] == ["./app.py"]
+        assert report.skipped == {"ignored": ["./fixtures/big.json"]}
+
+    def test_skips_binary_minified_generated_and_oversized(self, tmp_path):
+        _write(tmp_path, {
+            "ok.py": "x = 1\r\ny = 2\r\n",
+            "blob.json": b"\x00\x01\x02" * 10,
+            "vendor.js": "var a=1;" * 5000,
+            "app.min.js": "var b=2;\n",
+            "gen.py": "# Code generated by protoc. DO NOT EDIT.\nx = 1\n",
+            "huge.md": "line\n" * 100000,
+        })
+        records, report = scan_codebase(str(tmp_path), max_file_bytes=100 * 1024)
+        assert records == [("./ok.py", "x = 1\ny = 2\n")]
+        assert report.skipped == {
+            "binary": ["./blob.json"],
+            "minified": ["./vendor.js"],
+            "generated": ["./app.min.js", "./gen.py"],
+            "too large": ["./huge.md"],
+        }
+
+    def test_total_cap(self, tmp_path):
+        _write(tmp_path, {f"m{i}.py": "x = 1\n" * 100 for i in range(5)})
+        records, report = scan_codebase(str(tmp_path), max_total_bytes=1500)
+        assert len(records) == 2
+        assert len(report.skipped["total cap"]) == 3
+
+    def test_ignore_patterns(self):
+        assert is_ignored("src/gen/api.py", ["gen/"])
+        assert is_ignored("a/b.json", ["*.json"])
+        assert not is_ignored("a/b.json", ["*.json", "!b.json"])
+        assert is_ignored("src/x.py", ["src/*.py"])
+        assert not is_ignored("lib/src/x.py", ["src/*.py"])
+
+
+class TestRevisionScan:
+    def _repo(self, tmp_path):
+        def git(*args):
+            subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", *args], cwd=tmp_path, check=True, capture_output=True)
+        git("init", "-q")
+        _write(tmp_path, {"app.py": "VERSION = 1\n", "logo.json": b"\x00\x01"})
+        git("add", "-A")
+        git("commit", "-qm", "one")
+        _write(tmp_path, {"app.py": "VERSION = 2\n", "new.py": "x = 1\n"})
+        return tmp_path
+
+    def test_reads_committed_content_not_working_tree(self, tmp_path):
+        root = str(self._repo(tmp_path))
+        records, report = scan_codebase(root, rev="HEAD")
+        assert records == [("./app.py", "VERSION = 1\n")]
+        assert report.skipped == {"binary": ["./logo.json"]}
+
+    def test_blob_reader_keys_match_content_sha(self, tmp_path):
+        root = str(self._repo(tmp_path))
+        tree = resolve_revision("HEAD", root)
+        listing = subprocess.run(["git", "ls-tree", tree, "app.py"], cwd=root, capture_output=True, text=True).stdout
+        sha = listing.split()[2]
+        with GitObjectReader(root) as reader:
+            assert reader.read(sha) == b"VERSION = 1\n"
+            assert reader.read("0" * 40) is None
+        assert content_sha("VERSION = 1\n") == sha
+
+    def test_subdirectory_paths_match_working_tree_scan(self, tmp_path):
+        root = self._repo(tmp_path)
+        _write(root, {"pkg/mod.py": "y = 1\n"})
+        subprocess.run(["git", "add", "pkg"], cwd=root, check=True)
+        subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "two"], cwd=root, check=True)
+        sub = str(root / "pkg")
+        assert [p for p, _ in scan_codebase(sub, rev="HEAD")[0]] == [p for p, _ in scan_codebase(sub)[0]] == ["./mod.py"]
+
+    def test_unknown_revision(self, tmp_path):
+        root = str(self._repo(tmp_path))
+        assert resolve_revision("no-such-branch", root) is None
+        with pytest.raises(ValueError):
+            scan_codebase(root, rev="no-such-branch")
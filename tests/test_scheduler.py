@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+import src.scheduler
+from src.scheduler import TokenBucket, ModelLimiter, RateLimiter, INITIAL_CONCURRENCY, quota_key
+
+class TestTokenBucket:
+    def test_full_bucket_has_no_delay(self):
+        bucket = TokenBucket(60)
+        assert bucket.delay_for(10) == 0.0
+
+    def test_deficit_translates_to_delay(self):
+        bucket = TokenBucket(60)  # 1 unit per second
+        bucket.consume(60)
+        assert bucket.delay_for(5) == pytest.approx(5.0, abs=0.1)
+
+    def test_oversized_request_is_clamped_to_capacity(self):
+        bucket = TokenBucket(60)
+        assert bucket.delay_for(10_000) == 0.0
+
+class TestModelLimiter:
+    def test_aimd_halves_on_throttle_and_grows_on_success(self):
+        limiter = ModelLimiter(rpm=1000, tpm=1_000_000)
+        assert asyncio.run(limiter.acquire(10))
+        limiter.release(10, throttled=True)
+        assert limiter.limit == INITIAL_CONCURRENCY / 2
+
+        before = limiter.limit
+        limiter.tokens.level = limiter.tokens.capacity
+        limiter.requests.level = limiter.requests.capacity
+        assert asyncio.run(limiter.acquire(10))
+        limiter.release(10)
+        assert limiter.limit > before
+
+    def test_token_budget_limits_in_flight(self):
+        limiter = ModelLimiter(rpm=1000, tpm=1000)
+        assert asyncio.run(limiter.acquire(800))
+        # A second large chunk cannot fit next to the first one
+        assert not asyncio.run(limiter.acquire(800, max_wait=0.05))
+        limiter.release(800)
+        assert limiter.in_flight == 0
+
+    def test_exhausted_quota_gives_up_after_max_wait(self):
+        limiter = ModelLimiter(rpm=1, tpm=1_000_000)
+        assert asyncio.run(limiter.acquire(1))
+        limiter.release(1)
+        assert not asyncio.run(limiter.acquire(1, max_wait=0.05))
+
+    def test_score_tracks_throughput_and_headroom(self):
+        fast, slow = ModelLimiter(rpm=600, tpm=1_000_000), ModelLimiter(rpm=600, tpm=1_000_000)
+        fast.observe_latency(0.1)
+        slow.observe_latency(10.0)
+        assert fast.score(100) > slow.score(100)
+
+        fast.requests.consume(fast.requests.capacity)
+        assert fast.score(100) == pytest.approx(0.0, abs=0.1)
+
+def test_registry_reuses_limiters():
+    registry = RateLimiter()
+    assert registry.for_model("gemma-3-27b-it") is registry.for_model("gemma-3-27b-it")
+
+def test_per_key_limiters_use_the_model_quota(monkeypatch):
+    monkeypatch.setattr(src.scheduler, "MODEL_RATE_LIMITS", {"gemma-3-27b-it": (30, 15000)})
+    registry = RateLimiter()
+    limiter = registry.for_model(quota_key("gemma-3-27b-it", "abc123"))
+    assert limiter is not registry.for_model("gemma-3-27b-it")
+    assert limiter.tpm == 15000
@@ -0,0 +1,65 @@
+import src.core
+import src.structured
+from src.structured import generate_structured, validate, coerce
+from src.issue_gen import ISSUES_SCHEMA
+from src.repo_tools import TOPICS_SCHEMA
+from conftest import FakeClient, FakeResponse
+
+class _ScriptedModels:
+    """
+    Answers each call with the next scripted response; records prompts and options.
+    """
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.calls = []
+
+    async def generate_content(self, model, contents, **options):
+        self.calls.append((model, contents, options))
+        return FakeResponse(self.answers.pop(0))
+
+def _client(monkeypatch, answers):
+    client = FakeClient(_ScriptedModels(answers))
+    monkeypatch.setattr(src.core, "get_llm_client", lambda: client)
+    return client.aio.models
+
+class TestValidation:
+    def test_valid_issue_list(self):
+        issues = [{"title": "Fix typo", "body": "In cli.py", "label": "bug", "easy": True}]
+        assert validate(issues, ISSUES_SCHEMA) == []
+
+    def test_problems_are_reported_with_paths(self):
+        errors = validate([{"title": 3}], ISSUES_SCHEMA)
+        assert "$[0]: missing required key 'body'" in errors
+        assert "$[0].title: expected string, got int" in errors
+        assert validate(["a"] * 6, TOPICS_SCHEMA) == ["$: at most 5 items allowed, got 6"]
+
+    def test_lone_object_becomes_a_list(self):
+        assert coerce({"title": "t", "body": "b"}, ISSUES_SCHEMA) == [{"title": "t", "body": "b"}]
+
+class TestGenerateStructured:
+    def test_valid_answer_needs_one_call(self, monkeypatch):
+        models = _client(monkeypatch, ['```json\n["python", "cli"]\n```'])
+        assert generate_structured("Suggest topics.", TOPICS_SCHEMA) == ["python", "cli"]
+        assert len(models.calls) == 1
+        assert "JSON Schema" in models.calls[0][1]
+
+    def test_mismatch_gets_one_repair_call(self, monkeypatch):
+        models = _client(monkeypatch, ['{"title": "Only a title"}', '[{"title": "T", "body": "B"}]'])
+        assert generate_structured("Draft issues.", ISSUES_SCHEMA) == [{"title": "T", "body": "B"}]
+        repair = models.calls[1][1]
+        assert "missing required key 'body'" in repair and "Only a title" in repair
+
+    def test_gives_up_after_the_repair(self, monkeypatch):
+        models = _client(monkeypatch, ["no json here", "still none"])
+        assert generate_structured("Suggest topics.", TOPICS_SCHEMA) is None
+        assert len(models.calls) == 2
+
+    def test_schema_is_sent_only_to_models_that_support_it(self, monkeypatch):
+        models = _client(monkeypatch, ['["a"]', '["b"]'])
+        generate_structured("Suggest topics.", TOPICS_SCHEMA, mode="fast")
+        generate_structured("Suggest more topics.", TOPICS_SCHEMA, mode="smart")
+        (gemma, _, gemma_options), (gemini, _, gemini_options) = models.calls
+        assert gemma.startswith("gemma") and gemma_options == {}
+        assert gemini.startswith("gemini")
+        assert gemini_options["config"]["response_json_schema"] == TOPICS_SCHEMA
@@ -0,0 +1,69 @@
+import json
+import re
+import src.core
+from src.summary_index import SummaryIndex, content_sha
+from conftest import FakeClient, FakeResponse
+
+class _IndexModels:
+    """
+    Answers batch prompts with a JSON summary per file header in the prompt.
+    """
+
+    def __init__(self):
+        self.prompts = []
+
+    async def generate_content(self, model, contents):
+        self.prompts.append(contents)
+        paths = re.findall(r"^--- FILE: (.+?)(?: \(part \d+/\d+\))? ---$", contents, re.MULTILINE)
+        return FakeResponse(json.dumps({path: f"summary of {path}" for path in paths}))
+
+FILES = [("./a.py", "def a():\n    return 1\n"), ("./b.py", "def b():\n    return 2\n")]
+
+class TestSummaryIndex:
+    def test_content_sha_uses_the_git_blob_format(self):
+        # Same digest as `printf 'hello\n' | git hash-object --stdin` for unchanged LF text
+        assert content_sha("hello\n") == "ce013625030ba8dba906f756967f9e9ca394464a"
+
+    def test_only_changed_files_are_resummarized(self, tmp_path, monkeypatch):
+        client = FakeClient(_IndexModels())
+        monkeypatch.setattr(src.core, "get_llm_client", lambda: client)
+        path = str(tmp_path / "summaries.json")
+
+        assert SummaryIndex(path).update(FILES) == 2
+        assert len(client.aio.models.prompts) == 1  # Both small files share one call
+
+        changed = [FILES[0], ("./b.py", "def b():\n    return 3\n")]
+        index = SummaryIndex(path)
+        assert index.update(changed) == 1
+        assert "./a.py" not in client.aio.models.prompts[-1]
+        assert index.findings(changed) == ["FILE: ./a.py\nsummary of ./a.py", "FILE: ./b.py\nsummary of ./b.py"]
+        # The summary of the old b.py content is pruned
+        assert len(index.summaries) == 2
+
+    def test_export_and_import(self, tmp_path, monkeypatch):
+        client = FakeClient(_IndexModels())
+        monkeypatch.setattr(src.core, "get_llm_client", lambda: client)
+        built = SummaryIndex(str(tmp_path / "ci.json"))
+        built.update(FILES)
+        built.save(str(tmp_path / "export.json"))
+
+        local = SummaryIndex(str(tmp_path / "local.json"))
+        assert local.import_from(str(tmp_path / "export.json")) == 2
+        assert local.stale(FILES) == []
+        calls = len(client.aio.models.prompts)
+        assert local.update(FILES) == 0
+        assert len(client.aio.models.prompts) == calls
+
+    def test_paths_are_repository_relative(self, tmp_path, monkeypatch):
+        client = FakeClient(_IndexModels())
+        monkeypatch.setattr(src.core, "get_llm_client", lambda: client)
+        path = str(tmp_path / "summaries.json")
+        SummaryIndex(path, prefix="").update([("./src/a.py", FILES[0][1]), ("./README.md", "# Title\n")])
+
+        # The same file scanned from src/ maps to the same entry, and the
+        # rest of the repository is not pruned
+        index = SummaryIndex(path, prefix="src/")
+        assert index.update([FILES[0]]) == 0
+        assert set(index.paths) == {"./src/a.py", "./README.md"}
+        assert len(index.summaries) == 2
+
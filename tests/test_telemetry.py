@@ -0,0 +1,73 @@
+import src.core
+import src.telemetry
+from src.core import generate_with_fallback
+from src.stats import percentile, summarize
+from src.telemetry import TelemetryStore, write_prometheus_textfile
+
+class _Usage:
+    prompt_token_count = 12
+    candidates_token_count = 3
+
+class _Response:
+    text = "ok"
+    usage_metadata = _Usage()
+
+class _Models:
+    async def generate_content(self, model, contents):
+        if model == "broken":
+            raise RuntimeError("500 INTERNAL")
+        return _Response()
+
+class _Aio:
+    models = _Models()
+
+class _Client:
+    aio = _Aio()
+
+class TestTelemetryStore:
+    def test_records_roundtrip_through_rotation(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(src.telemetry, "MAX_FILE_BYTES", 200)
+        store = TelemetryStore(path=str(tmp_path / "t.jsonl"))
+        for i in range(30):
+            store.record(kind="call", i=i)
+            store.flush()
+        records = list(store.iter_records())
+        assert [r["i"] for r in records] == sorted(r["i"] for r in records)
+        assert (tmp_path / "t.jsonl.1").exists()
+
+    def test_call_records_fallback_depth_and_usage(self):
+        store = src.telemetry.get_telemetry()
+        store.command = "sage"
+        assert generate_with_fallback(_Client(), "p", ["broken", "good"], silent=True) == "ok"
+        (record,) = [r for r in store.iter_records() if r["kind"] == "call"]
+        assert record["command"] == "sage"
+        assert record["model"] == "good"
+        assert record["fallback_depth"] == 1
+        assert record["failed_attempts"] == 1
+        assert record["prompt_tokens"] == 12 and record["output_tokens"] == 3
+        assert record["outcome"] == "ok"
+
+class TestStats:
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 95) == 95
+        assert percentile([], 50) is None
+
+    def test_summary_and_prometheus(self, tmp_path):
+        records = [
+            {"kind": "call", "command": "sage", "model": "m", "outcome": "ok", "latency_ms": 100, "fallback_depth": 0, "est_tokens": 10, "prompt_tokens": 8},
+            {"kind": "call", "command": "sage", "model": "m", "outcome": "ok", "latency_ms": 300, "fallback_depth": 1, "est_tokens": 10},
+            {"kind": "call", "command": "sage", "model": "m", "cache": "hit", "outcome": "ok", "est_tokens": 10},
+            {"kind": "chunk", "command": "sage", "outcome": "relevant"},
+        ]
+        summary = summarize(records)
+        assert summary["models"]["m"]["fallbacks"] == 1
+        assert summary["commands"]["sage"]["cache_hits"] == 1
+        assert summary["commands"]["sage"]["relevant_chunks"] == 1
+
+        path = tmp_path / "alchemist.prom"
+        write_prometheus_textfile(records, str(path))
+        text = path.read_text()
+        assert 'alchemist_llm_calls_total{model="m",outcome="ok"} 3' in text
+        assert 'alchemist_llm_latency_seconds_count{model="m"} 2' in text
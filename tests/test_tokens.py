@@ -0,0 +1,57 @@
+import pytest
+from src.core import estimate_tokens, chars_for_tokens, split_context
+from src.tokens import TokenEstimator, classify, get_token_estimator
+
+PYTHON = "def handler(event):\n    return {'status': event.get('code', 200)}\n" * 30
+JSON = '{"name": "alchemist", "tags": ["cli", "git"], "stars": 42}\n' * 30
+
+class TestClassification:
+    @pytest.mark.parametrize("text, path, expected", [
+        (PYTHON, "./app.py", "python"),
+        ("Just a few words about the project, nothing more.\n" * 5, "./notes.py", "prose"),
+        (JSON, None, "json"),
+        ("# Title\n\nSome words.\n- item\n", None, "markdown"),
+        ("Plain English sentences without any markup.", None, "prose"),
+        (PYTHON, None, "code"),
+    ])
+    def test_classify(self, text, path, expected):
+        assert classify(text, path) == expected
+
+class TestTokenEstimator:
+    def test_dense_content_counts_more_tokens_than_prose(self):
+        prose = "a" * len(PYTHON)
+        assert estimate_tokens(PYTHON) > estimate_tokens(prose)
+        assert estimate_tokens(JSON) > estimate_tokens("a" * len(JSON))
+        # CJK characters are roughly a token each
+        assert estimate_tokens("漢字" * 50) > estimate_tokens("ab" * 50) * 3
+
+    def test_records_are_estimated_per_file(self):
+        context = f"--- FILE: ./app.py ---\n{PYTHON}\n--- FILE: ./README.md ---\n{'word ' * 200}\n"
+        assert chars_for_tokens(1000, context) < 1000 * 4
+        for chunk in split_context(context, 200):
+            assert estimate_tokens(chunk) <= 200
+
+    def test_estimates_are_memoized(self):
+        estimator = get_token_estimator()
+        first = estimator.breakdown(PYTHON)
+        assert estimator.breakdown(PYTHON) is first
+
+    def test_usage_metadata_calibrates_and_persists(self, tmp_path):
+        path = str(tmp_path / "calibration.json")
+        estimator = TokenEstimator(path)
+        before = estimator.estimate(PYTHON)
+        for _ in range(30):
+            estimator.observe(PYTHON, int(before * 1.5))
+        after = estimator.estimate(PYTHON)
+        assert before * 1.4 < after <= before * 1.5
+        # Other classes are untouched
+        assert estimator.estimate("a" * 400) == 100
+
+        estimator.save()
+        assert TokenEstimator(path).estimate(PYTHON) == after
+
+    def test_small_or_mixed_prompts_do_not_calibrate(self, tmp_path):
+        estimator = TokenEstimator(str(tmp_path / "calibration.json"))
+        estimator.observe("short", 1000)
+        estimator.observe(f"--- FILE: ./a.py ---\n{PYTHON[:400]}\n--- FILE: ./b.md ---\n{JSON[:400]}", 1000)
+        assert estimator.factors == {}